@@ -0,0 +1,350 @@
+# Python built in modules
+import argparse
+import contextlib
+import io
+import json
+import re
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from pathlib import Path
+from typing import Iterator
+
+# Root of the project
+ROOT_DIR: Path = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR.joinpath("src")))
+
+# Custom modules
+from smi2ass import smi2ass
+from smi_encoding import decode_smi
+
+TEST_SMIS_DIR: Path = ROOT_DIR.joinpath("test_smis")
+BASELINE_PATH: Path = Path(__file__).resolve().parent.joinpath("baseline.json")
+
+# Stages reported by "smi2ass.set_stage_hook", in the order they run
+STAGES: tuple[str, ...] = (
+    "read",
+    "decode",
+    "normalize",
+    "parse",
+    "convert",
+    "time_lan",
+    "core",
+    "save",
+)
+
+# Allowed slowdown from the baseline, 0.25 is 25% slower
+REGRESSION_THRESHOLD: float = 0.25
+# Differences smaller than this are ignored, since short runs are noisy.
+# Small files take 10-30 ms, and noise alone can make them 10 ms slower.
+REGRESSION_MIN_MS: float = 15.0
+
+# Large file case, Psycho-Pass is repeated this many times one after another
+LARGE_SOURCE: str = "Psycho-Pass - S01E15.smi"
+LARGE_REPEAT: int = 10
+
+START_TIME: re.Pattern = re.compile(r"(Start\s*=\s*)(\d+)", re.IGNORECASE)
+
+
+class StageRecorder:
+    def __init__(self, trace_memory: bool = False) -> None:
+        """Hook for "smi2ass.set_stage_hook" that adds up time of each stage
+        and keeps the highest traced memory while the stage runs
+
+        Args:
+            trace_memory (bool, optional): Read tracemalloc peak, tracemalloc
+            has to be started by the caller. Defaults to False.
+        """
+
+        self.trace_memory: bool = trace_memory
+        self.times: dict[str, float] = defaultdict(float)  # In second
+        self.peaks: dict[str, int] = defaultdict(int)  # In bytes
+
+    @contextlib.contextmanager
+    def __call__(self, name: str) -> Iterator[None]:
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        start: float = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.times[name] += time.perf_counter() - start
+            if self.trace_memory:
+                self.peaks[name] = max(
+                    self.peaks[name], tracemalloc.get_traced_memory()[1]
+                )
+
+
+def cmd_arg() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Benchmark of smi2ass over test_smis, time and memory "
+        + "of each conversion stage"
+    )
+
+    parser.add_argument(
+        "-n",
+        "--runs",
+        type=int,
+        default=7,
+        help="Number of timed runs for each file, fastest time of each "
+        + "stage and median of total time are used (default: 7)",
+    )
+
+    parser.add_argument(
+        "--baseline",
+        type=str,
+        default=str(BASELINE_PATH),
+        help="Baseline file to compare with or to update",
+    )
+
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=REGRESSION_THRESHOLD,
+        help="Allowed slowdown and memory growth from the baseline "
+        + f"(default: {REGRESSION_THRESHOLD})",
+    )
+
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Exit with error when there is a regression from the baseline",
+    )
+
+    parser.add_argument(
+        "--update",
+        action="store_true",
+        help="Save this result as the baseline",
+    )
+
+    parser.add_argument(
+        "--skip_large",
+        action="store_true",
+        help=f"Skip the large file case ({LARGE_SOURCE} x{LARGE_REPEAT})",
+    )
+
+    return parser
+
+
+def make_large_case(out_dir: Path) -> Path:
+    """Making large SMI by repeating SYNC blocks of "LARGE_SOURCE". Each
+    copy starts after the previous one ends, so time codes keep increasing.
+
+    Args:
+        out_dir (Path): Where large SMI is saved
+
+    Returns:
+        Path: Path of the large SMI file
+    """
+
+    with open(TEST_SMIS_DIR.joinpath(LARGE_SOURCE), "rb") as f:
+        text, _, _ = decode_smi(f.read())
+
+    body_start: int = text.lower().index("<sync")
+    body_end: int = text.lower().rindex("</body")
+    body: str = text[body_start:body_end]
+    duration: int = (
+        max(int(tmp.group(2)) for tmp in START_TIME.finditer(body)) + 1000
+    )
+
+    copies: list[str] = []
+    for idx in range(LARGE_REPEAT):
+        offset: int = duration * idx
+        copies.append(
+            START_TIME.sub(
+                lambda tmp: tmp.group(1) + str(int(tmp.group(2)) + offset),
+                body,
+            )
+        )
+
+    large_path: Path = out_dir.joinpath(
+        f"{Path(LARGE_SOURCE).stem} x{LARGE_REPEAT}.smi"
+    )
+    with open(large_path, "w", encoding="utf-8") as f:
+        f.write(text[:body_start] + "".join(copies) + text[body_end:])
+
+    return large_path
+
+
+def convert_once(
+    smi_path: Path, out_dir: Path, recorder: StageRecorder
+) -> int:
+    """Converting one file with the stage hook
+
+    Args:
+        smi_path (Path): SMI file
+        out_dir (Path): Where ASS file is saved
+        recorder (StageRecorder): Stage hook
+
+    Returns:
+        int: Number of events in all languages
+    """
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        obj_smi2ass = smi2ass()
+        obj_smi2ass.set_stage_hook(recorder)
+        obj_smi2ass.update_file2conv(str(smi_path))
+        obj_smi2ass.to_ass()
+        obj_smi2ass.save(out_dir)
+
+    return sum(len(tmp) for tmp in obj_smi2ass.smi_lines.values())
+
+
+def run_case(smi_path: Path, out_dir: Path, runs: int) -> dict[str, any]:
+    """Benchmarking one file. Time is measured without tracemalloc, since it
+    slows down allocation, and memory is measured in separate run. Total
+    time is the median of the runs, so one slow or fast run does not change
+    the result of the check.
+
+    Args:
+        smi_path (Path): SMI file
+        out_dir (Path): Where ASS file is saved
+        runs (int): Number of timed runs
+
+    Returns:
+        dict[str, any]: Result of the file
+    """
+
+    size: int = smi_path.stat().st_size
+    events: int = 0
+
+    # Fastest time of each stage, and total time of each run
+    best: dict[str, float] = {}
+    totals: list[float] = []
+    for _ in range(runs):
+        recorder = StageRecorder()
+        events = convert_once(smi_path, out_dir, recorder)
+        for stage, tmp_time in recorder.times.items():
+            best[stage] = min(best.get(stage, tmp_time), tmp_time)
+        totals.append(sum(recorder.times.values()))
+
+    tracemalloc.start()
+    try:
+        recorder = StageRecorder(trace_memory=True)
+        convert_once(smi_path, out_dir, recorder)
+    finally:
+        tracemalloc.stop()
+
+    stages: dict[str, dict[str, float]] = {}
+    for stage in STAGES:
+        tmp_time: float = max(best.get(stage, 0.0), 1e-9)
+        stages[stage] = {
+            "ms": round(tmp_time * 1000, 3),
+            "events_per_s": round(events / tmp_time),
+            "mb_per_s": round(size / tmp_time / 1e6, 2),
+            "peak_kb": recorder.peaks.get(stage, 0) // 1024,
+        }
+
+    return {
+        "bytes": size,
+        "events": events,
+        "total_ms": round(statistics.median(totals) * 1000, 3),
+        "peak_kb": max(recorder.peaks.values(), default=0) // 1024,
+        "stages": stages,
+    }
+
+
+def print_case(name: str, result: dict[str, any]) -> None:
+    print(
+        f"\n{name} ({result['bytes']} bytes, {result['events']} events, "
+        + f"{result['total_ms']:.1f} ms, peak {result['peak_kb']} KB)"
+    )
+    print(
+        f"  {'stage':<10}{'ms':>10}{'events/s':>12}{'MB/s':>10}"
+        + f"{'peak KB':>10}"
+    )
+    for stage, tmp in result["stages"].items():
+        print(
+            f"  {stage:<10}{tmp['ms']:>10.2f}{tmp['events_per_s']:>12}"
+            + f"{tmp['mb_per_s']:>10.2f}{tmp['peak_kb']:>10}"
+        )
+
+
+def find_regressions(
+    results: dict[str, dict[str, any]],
+    baseline: dict[str, dict[str, any]],
+    threshold: float,
+) -> list[str]:
+    """Comparing total time and peak memory of each file with the baseline
+
+    Args:
+        results (dict[str, dict[str, any]]): Result of this run
+        baseline (dict[str, dict[str, any]]): Result in the baseline file
+        threshold (float): Allowed growth from the baseline
+
+    Returns:
+        list[str]: Message of each regression
+    """
+
+    regressions: list[str] = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        base: dict[str, any] = baseline[name]
+
+        limit_ms: float = max(
+            base["total_ms"] * (1 + threshold),
+            base["total_ms"] + REGRESSION_MIN_MS,
+        )
+        if result["total_ms"] > limit_ms:
+            regressions.append(
+                f"{name}: {result['total_ms']:.1f} ms, baseline "
+                + f"{base['total_ms']:.1f} ms"
+            )
+
+        if result["peak_kb"] > base["peak_kb"] * (1 + threshold):
+            regressions.append(
+                f"{name}: peak {result['peak_kb']} KB, baseline "
+                + f"{base['peak_kb']} KB"
+            )
+
+    return regressions
+
+
+def main() -> None:
+    args: argparse.Namespace = cmd_arg().parse_args()
+
+    results: dict[str, dict[str, any]] = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        out_dir: Path = Path(tmp_dir)
+        cases: list[Path] = sorted(TEST_SMIS_DIR.glob("*.smi"))
+        if not args.skip_large:
+            cases.append(make_large_case(out_dir))
+
+        for smi_path in cases:
+            results[smi_path.stem] = run_case(smi_path, out_dir, args.runs)
+            print_case(smi_path.stem, results[smi_path.stem])
+
+    baseline_path: Path = Path(args.baseline)
+    if args.update:
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4, ensure_ascii=False)
+            f.write("\n")
+        print(f"\nBaseline has been saved as... \n{baseline_path}")
+        return
+
+    if not baseline_path.exists():
+        print(f"\nBaseline is not found: {baseline_path}")
+        return
+
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline: dict[str, dict[str, any]] = json.load(f)
+
+    regressions: list[str] = find_regressions(
+        results, baseline, args.threshold
+    )
+    if regressions:
+        print(f"\nRegressions over {args.threshold:.0%} from the baseline:")
+        for tmp in regressions:
+            print(f"  {tmp}")
+        if args.check:
+            sys.exit(1)
+    else:
+        print(f"\nNo regression over {args.threshold:.0%} from the baseline")
+
+
+if __name__ == "__main__":
+    main()
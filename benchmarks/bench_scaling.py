@@ -0,0 +1,157 @@
+# Python built in modules
+import argparse
+import math
+import sys
+import tempfile
+from pathlib import Path
+
+# Custom modules
+from bench_convert import StageRecorder, convert_once
+from smi_corpus import generate_smi
+
+# Stages of each group, "__preprocess" is everything until the lines are
+# separated by language
+STAGE_GROUPS: dict[str, tuple[str, ...]] = {
+    "preprocess": ("read", "decode", "normalize", "parse"),
+    "time_lan": ("convert", "time_lan"),
+    "core": ("core", "save"),
+}
+
+# Growth exponent that is allowed, 1.0 is linear
+MAX_EXPONENT: float = 1.15
+
+# Number of events of each language in generated files
+DEFAULT_EVENTS: str = "2000,4000,8000,16000,32000"
+
+
+def cmd_arg() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Measuring how conversion time grows with the size of "
+        + "SMI, using generated SMI files"
+    )
+
+    parser.add_argument(
+        "--events",
+        type=str,
+        default=DEFAULT_EVENTS,
+        help=f'Comma separated number of events (default: "{DEFAULT_EVENTS}")',
+    )
+
+    parser.add_argument(
+        "-n",
+        "--runs",
+        type=int,
+        default=3,
+        help="Number of runs for each size, fastest is used (default: 3)",
+    )
+
+    parser.add_argument(
+        "--max_exponent",
+        type=float,
+        default=MAX_EXPONENT,
+        help="Allowed growth exponent of time over number of events "
+        + f"(default: {MAX_EXPONENT})",
+    )
+
+    parser.add_argument(
+        "--languages", type=int, default=2, help="Number of languages"
+    )
+
+    parser.add_argument(
+        "--tag_density", type=float, default=0.2, help="Chance of tags"
+    )
+
+    parser.add_argument(
+        "--malformed_rate",
+        type=float,
+        default=0.01,
+        help="Chance of malformed markup",
+    )
+
+    parser.add_argument(
+        "--encoding", type=str, default="utf-8", help="Encoding of files"
+    )
+
+    return parser
+
+
+def fit_exponent(sizes: list[int], times: list[float]) -> float:
+    """Fitting time = a * size ^ k with least squares on log-log scale
+
+    Args:
+        sizes (list[int]): Size of each input
+        times (list[float]): Time of each input
+
+    Returns:
+        float: Growth exponent k
+    """
+
+    log_x: list[float] = [math.log(tmp) for tmp in sizes]
+    log_y: list[float] = [math.log(max(tmp, 1e-9)) for tmp in times]
+    mean_x: float = sum(log_x) / len(log_x)
+    mean_y: float = sum(log_y) / len(log_y)
+
+    return sum(
+        (x - mean_x) * (y - mean_y) for x, y in zip(log_x, log_y)
+    ) / sum((x - mean_x) ** 2 for x in log_x)
+
+
+def main() -> None:
+    args: argparse.Namespace = cmd_arg().parse_args()
+    event_counts: list[int] = [int(tmp) for tmp in args.events.split(",")]
+    if len(event_counts) < 2:
+        print("At least two sizes are needed")
+        sys.exit(2)
+
+    # Fastest time of each group, for each size
+    results: dict[str, list[float]] = {key: [] for key in STAGE_GROUPS}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        out_dir: Path = Path(tmp_dir)
+        smi_path: Path = out_dir.joinpath("scaling.smi")
+
+        print(
+            f"{'events':>8}{'bytes':>12}"
+            + "".join(f"{key + ' ms':>16}" for key in STAGE_GROUPS)
+        )
+        for events in event_counts:
+            with open(smi_path, "wb") as f:
+                f.write(
+                    generate_smi(
+                        events,
+                        languages=args.languages,
+                        tag_density=args.tag_density,
+                        malformed_rate=args.malformed_rate,
+                    ).encode(args.encoding)
+                )
+
+            best: dict[str, float] = {}
+            for _ in range(args.runs):
+                recorder = StageRecorder()
+                convert_once(smi_path, out_dir, recorder)
+                for key, stages in STAGE_GROUPS.items():
+                    tmp_time: float = sum(
+                        recorder.times[tmp] for tmp in stages
+                    )
+                    best[key] = min(best.get(key, tmp_time), tmp_time)
+
+            for key in STAGE_GROUPS:
+                results[key].append(best[key])
+            print(
+                f"{events:>8}{smi_path.stat().st_size:>12}"
+                + "".join(f"{best[key] * 1000:>16.1f}" for key in STAGE_GROUPS)
+            )
+
+    flag_success: bool = True
+    print(f"\nGrowth exponent (allowed up to {args.max_exponent})")
+    for key, times in results.items():
+        exponent: float = fit_exponent(event_counts, times)
+        flag_ok: bool = exponent <= args.max_exponent
+        flag_success = flag_success and flag_ok
+        print(f"  {key:<12}{exponent:>6.2f}  {'ok' if flag_ok else 'FAIL'}")
+
+    if not flag_success:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
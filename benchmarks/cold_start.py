@@ -0,0 +1,113 @@
+# Python built in modules
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Root of the project
+ROOT_DIR: Path = Path(__file__).resolve().parents[1]
+IS_WIN: bool = os.name == "nt"
+
+
+def cmd_arg() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Measuring cold start time of smi2ass for single file"
+    )
+
+    parser.add_argument(
+        "-n",
+        "--runs",
+        type=int,
+        default=10,
+        help="Number of runs for each command (default: 10)",
+    )
+
+    parser.add_argument(
+        "--smi",
+        type=str,
+        default=str(ROOT_DIR.joinpath("test_smis", "Bakemonogatari-01.smi")),
+        help="SMI file to convert",
+    )
+
+    parser.add_argument(
+        "--binary",
+        type=str,
+        default=str(
+            ROOT_DIR.joinpath("build", "smi2ass" + (".exe" if IS_WIN else ""))
+        ),
+        help="Built executable from build.py, skipped when it is not exist",
+    )
+
+    return parser
+
+
+def measure(command: list[str], runs: int, env: dict[str, str]) -> list[float]:
+    """Running command in new process and measuring wall time
+
+    Args:
+        command (list[str]): Command to run
+        runs (int): Number of runs
+        env (dict[str, str]): Environment variables of the process
+
+    Returns:
+        list[float]: Time of each run in millisecond
+    """
+
+    times: list[float] = []
+    for _ in range(runs):
+        start: float = time.perf_counter()
+        subprocess.run(
+            command,
+            check=True,
+            cwd=ROOT_DIR,
+            env=env,
+            stdout=subprocess.DEVNULL,
+        )
+        times.append((time.perf_counter() - start) * 1000)
+
+    return times
+
+
+def main() -> None:
+    args: argparse.Namespace = cmd_arg().parse_args()
+
+    # Flat modules in src are imported by their name
+    env: dict[str, str] = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [str(ROOT_DIR.joinpath("src")), env.get("PYTHONPATH", "")]
+    )
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        commands: dict[str, list[str]] = {
+            "interpreter only": [sys.executable, "-c", "pass"],
+            "import smi2ass": [sys.executable, "-c", "import smi2ass"],
+            "python -m src": [
+                sys.executable,
+                "-m",
+                "src",
+                "-o",
+                out_dir,
+                args.smi,
+            ],
+        }
+        if Path(args.binary).exists():
+            commands["built binary"] = [args.binary, "-o", out_dir, args.smi]
+        else:
+            print(f"Built binary is not found, skipping: {args.binary}")
+
+        print(f"Cold start of {args.runs} runs, in millisecond")
+        print(f"{'command':<20}{'min':>10}{'median':>10}{'max':>10}")
+        for name, command in commands.items():
+            times: list[float] = measure(command, args.runs, env)
+            print(
+                f"{name:<20}{min(times):>10.1f}"
+                + f"{statistics.median(times):>10.1f}{max(times):>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
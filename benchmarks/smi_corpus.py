@@ -0,0 +1,288 @@
+# Python built in modules
+import argparse
+import random
+import sys
+from pathlib import Path
+
+# Root of the project
+ROOT_DIR: Path = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR.joinpath("src")))
+
+# Custom modules
+from css_colors import CSS3_NAMES_TO_HEX
+from default_settings import DEFAULT_LAN_CODE
+
+# Words of the generated lines
+WORDS: dict[str, list[str]] = {
+    "latin": [
+        "the", "signal", "is", "coming", "from", "inside", "city", "hold",
+        "on", "we", "have", "to", "go", "now", "what", "did", "you", "see",
+        "I", "don't", "know", "anymore", "run", "quiet", "listen", "please",
+    ],
+    "hangul": [
+        "신호가", "도시", "안에서", "오고", "있어", "잠깐만", "지금", "가야",
+        "해", "뭘", "봤어", "모르겠어", "조용히", "들어봐", "제발", "어서",
+    ],
+}  # fmt: skip
+
+# Tags that are added in the line, with the tag density
+TAG_KINDS: tuple[str, ...] = ("font", "b", "i", "br", "rt")
+
+# Broken markup that the converter has to survive, in the line and in the
+# SYNC block
+WORD_MALFORMED: tuple[str, ...] = (
+    "unclosed",  # Tag that is never closed
+    "stray_close",  # Closing tag without opening tag
+    "bad_font",  # < ="font name"> instead of <font face="font name">
+    "bare_amp",  # & that is not an entity
+)
+LINE_MALFORMED: tuple[str, ...] = (
+    "no_class",  # <P> without class
+    "bad_start",  # Start time that is not a number
+)
+
+
+def make_header(class_names: list[str]) -> str:
+    """Making SAMI header with the style of each language
+
+    Args:
+        class_names (list[str]): Class name of each language
+
+    Returns:
+        str: SAMI header until <BODY>
+    """
+
+    styles: str = "".join(
+        f"  .{tmp} {{Name:{tmp}; lang:{tmp.lower()}; SAMIType:CC;}}\n"
+        for tmp in class_names
+    )
+    return (
+        "<SAMI>\n<HEAD>\n<TITLE>smi2ass synthetic corpus</TITLE>\n"
+        + '<STYLE TYPE="text/css">\n<!--\n'
+        + "  P {margin-left:8pt; margin-right:8pt; text-align:center;}\n"
+        + styles
+        + "-->\n</STYLE>\n</HEAD>\n<BODY>\n"
+    )
+
+
+def make_text(
+    rng: random.Random,
+    words: list[str],
+    tag_density: float,
+    malformed_rate: float,
+) -> str:
+    """Making contents of one line
+
+    Args:
+        rng (random.Random): Random generator
+        words (list[str]): Words to use
+        tag_density (float): Chance of each word to be wrapped in a tag
+        malformed_rate (float): Chance of each word to have broken markup
+
+    Returns:
+        str: Contents of the line
+    """
+
+    parts: list[str] = []
+    for _ in range(rng.randint(2, 9)):
+        word: str = rng.choice(words)
+
+        if rng.random() < tag_density:
+            kind: str = rng.choice(TAG_KINDS)
+            if kind == "font":
+                if rng.random() < 0.5:
+                    color: str = f"#{rng.randrange(0x1000000):06x}"
+                else:
+                    color = rng.choice(list(CSS3_NAMES_TO_HEX))
+                face: str = (
+                    ' face="Malgun Gothic"' if rng.random() < 0.2 else ""
+                )
+                word = f'<font color="{color}"{face}>{word}</font>'
+            elif kind == "br":
+                word = f"{word}<br>"
+            elif kind == "rt":
+                word = f"<ruby>{word}<rt>{rng.choice(words)}</rt></ruby>"
+            else:
+                word = f"<{kind}>{word}</{kind}>"
+
+        if rng.random() < malformed_rate:
+            kind = rng.choice(WORD_MALFORMED)
+            if kind == "unclosed":
+                word = f"<{rng.choice(('b', 'i', 'font'))}>{word}"
+            elif kind == "stray_close":
+                word = f"{word}</{rng.choice(('b', 'i', 'font', 'p'))}>"
+            elif kind == "bad_font":
+                word = f'< ="Malgun Gothic">{word}</font>'
+            else:
+                word = f"{word} & {rng.choice(words)}"
+
+        parts.append(word)
+
+    return " ".join(parts)
+
+
+def generate_smi(
+    events: int,
+    languages: int = 1,
+    tag_density: float = 0.2,
+    malformed_rate: float = 0.0,
+    seed: int = 0,
+) -> str:
+    """Generating SAMI subtitle
+
+    Args:
+        events (int): Number of SYNC events of each language
+        languages (int, optional): Number of languages, class names are
+        taken from "lan_code.json". Defaults to 1.
+        tag_density (float, optional): Chance of each word to be wrapped in
+        a tag (font, b, i, br or rt). Defaults to 0.2.
+        malformed_rate (float, optional): Chance of each word and SYNC block
+        to have broken markup. Defaults to 0.0.
+        seed (int, optional): Seed of random generator. Defaults to 0.
+
+    Returns:
+        str: Generated SAMI
+    """
+
+    rng: random.Random = random.Random(seed)
+
+    # First class name of each language in lan_code.json
+    class_names: list[str] = []
+    found_languages: set[str] = set()
+    for tmp_class, tmp_lang in DEFAULT_LAN_CODE.items():
+        if tmp_lang not in found_languages and tmp_lang != "und":
+            found_languages.add(tmp_lang)
+            class_names.append(tmp_class)
+    class_names = class_names[: max(1, languages)]
+
+    lines: list[str] = [make_header(class_names)]
+    time_ms: int = rng.randint(500, 5000)
+    for _ in range(events):
+        for tmp_class in class_names:
+            words: list[str] = WORDS[
+                "hangul" if DEFAULT_LAN_CODE[tmp_class] == "kor" else "latin"
+            ]
+            start: str = str(time_ms)
+            p_tag: str = f"<P Class={tmp_class}>"
+            if rng.random() < malformed_rate:
+                if rng.choice(LINE_MALFORMED) == "no_class":
+                    p_tag = "<P>"
+                else:
+                    start = f"{start}ms"
+            text: str = make_text(rng, words, tag_density, malformed_rate)
+            lines.append(f"<SYNC Start={start}>{p_tag}{text}\n")
+
+        # Some lines are cleared before the next line
+        duration: int = rng.randint(800, 5000)
+        if rng.random() < 0.5:
+            for tmp_class in class_names:
+                lines.append(
+                    f"<SYNC Start={time_ms + duration}>"
+                    + f"<P Class={tmp_class}>&nbsp;\n"
+                )
+            duration += rng.randint(100, 2000)
+        time_ms += duration
+
+    lines.append("</BODY>\n</SAMI>\n")
+
+    return "".join(lines)
+
+
+def generate_smi_size(size: int, encoding: str = "utf-8", **kwargs) -> bytes:
+    """Generating SAMI subtitle that is about the given size
+
+    Args:
+        size (int): Size of generated file in bytes
+        encoding (str, optional): Encoding of the file. Defaults to "utf-8".
+        kwargs: Other options of "generate_smi"
+
+    Returns:
+        bytes: Encoded SAMI
+    """
+
+    # Size of one event is estimated from small sample
+    sample: int = len(generate_smi(200, **kwargs).encode(encoding))
+    events: int = max(1, round(size / (sample / 200)))
+
+    return generate_smi(events, **kwargs).encode(encoding)
+
+
+def cmd_arg() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Generating synthetic SAMI subtitle for benchmarks"
+    )
+
+    parser.add_argument("output", type=str, help="Output SMI file")
+
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument(
+        "--size",
+        type=float,
+        help="Approximate size of the file in MB",
+    )
+    group.add_argument(
+        "--events",
+        type=int,
+        help="Number of SYNC events of each language",
+    )
+
+    parser.add_argument(
+        "--languages",
+        type=int,
+        default=1,
+        help="Number of languages (default: 1)",
+    )
+
+    parser.add_argument(
+        "--tag_density",
+        type=float,
+        default=0.2,
+        help="Chance of each word to have a tag (default: 0.2)",
+    )
+
+    parser.add_argument(
+        "--malformed_rate",
+        type=float,
+        default=0.0,
+        help="Chance of each word and line to be malformed (default: 0)",
+    )
+
+    parser.add_argument(
+        "--encoding",
+        type=str,
+        default="utf-8",
+        help='Encoding of the file, e.g. "utf-16" or "cp949" '
+        + "(default: utf-8)",
+    )
+
+    parser.add_argument(
+        "--seed", type=int, default=0, help="Random seed (default: 0)"
+    )
+
+    return parser
+
+
+def main() -> None:
+    args: argparse.Namespace = cmd_arg().parse_args()
+
+    options: dict[str, any] = {
+        "languages": args.languages,
+        "tag_density": args.tag_density,
+        "malformed_rate": args.malformed_rate,
+        "seed": args.seed,
+    }
+    smi_raw: bytes
+    if args.size is not None:
+        smi_raw = generate_smi_size(
+            int(args.size * 1024 * 1024), args.encoding, **options
+        )
+    else:
+        smi_raw = generate_smi(args.events, **options).encode(args.encoding)
+
+    with open(args.output, "wb") as f:
+        f.write(smi_raw)
+    print(f"Generated {len(smi_raw)} bytes as... \n{args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,26 @@
-from . import ass_settings
-from .ass_settings import AssStyle
-from . import smi2ass
-from .smi2ass import smi2ass
+# Python built in modules
+import importlib
+
+# Names of the package and the module they are imported from. They are
+# imported only when they are used, so "python -m src" does not load the
+# modules before "__main__" imports them
+_LAZY_NAMES: dict[str, tuple[str, str | None]] = {
+    "ass_settings": (".ass_settings", None),
+    "AssStyle": (".ass_settings", "AssStyle"),
+    "smi2ass": (".smi2ass", "smi2ass"),
+}
+
+
+def __getattr__(name: str) -> any:
+    if name not in _LAZY_NAMES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    module_name, attr_name = _LAZY_NAMES[name]
+    module = importlib.import_module(module_name, __name__)
+    value = module if attr_name is None else getattr(module, attr_name)
+    globals()[name] = value  # Later access does not come here again
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(list(globals()) + list(_LAZY_NAMES))
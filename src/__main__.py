@@ -1,9 +1,21 @@
 # Built in modules
 import argparse
+import contextlib
+import io
+import json
+import os
+import sys
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-# Custom made modules
-from smi2ass import smi2ass
+# Custom made modules. Modules of the other modes (process pool, cache,
+# --sync, --watch, --serve and cProfile) are imported only in the branch
+# that uses them, so converting single file starts fast.
+from conv_profile import ConversionProfile
+from smi2ass import smi2ass, PARSER_ENGINES
+
+if TYPE_CHECKING:
+    from conv_cache import ConversionCache
 
 
 def cmd_arg() -> argparse.ArgumentParser:
@@ -16,8 +28,9 @@ def cmd_arg() -> argparse.ArgumentParser:
         "file_name",
         metavar="File_Name",
         type=str,
-        nargs="+",
-        help="SMI file name to  be processed",
+        nargs="*",
+        help="SMI file name to  be processed, or folders with --sync or "
+        + "--watch",
     )
 
     parser.add_argument(
@@ -68,6 +81,187 @@ def cmd_arg() -> argparse.ArgumentParser:
         help="Time in millisecond to subtract on subtitle",
     )
 
+    parser.add_argument(
+        "--from",
+        dest="time_from",
+        type=int,
+        help="Convert only lines that start from this time in millisecond",
+    )
+
+    parser.add_argument(
+        "--to",
+        dest="time_to",
+        type=int,
+        help="Convert only lines that start before this time in millisecond",
+    )
+
+    parser.add_argument(
+        "--rebase",
+        action="store_true",
+        help="Move start of --from to 0, time offset is added after that",
+    )
+
+    parser.add_argument(
+        "--format",
+        dest="formats",
+        type=str,
+        help="Comma separated subtitle formats to save, from ass, srt and vtt "
+        + "(default: ass)",
+    )
+
+    parser.add_argument(
+        "--variants",
+        type=str,
+        help="JSON file with a list of variants that are saved along with "
+        + 'the subtitle from one parse, each is {"name", "style": {"title", '
+        + '"font", "font_size", "resolution"}, "time_offset"} and saved as '
+        + "FILE.NAME.ass",
+    )
+
+    parser.add_argument(
+        "--parser",
+        type=str,
+        choices=PARSER_ENGINES,
+        default="sami",
+        help="Parser engine, built in tokenizer (sami) or BeautifulSoup (bs4)",
+    )
+
+    parser.add_argument(
+        "--legacy_encodings",
+        type=str,
+        help="Comma separated encodings to try when SMI is not in UTF-8 "
+        + '(default: "cp949")',
+    )
+
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of processes to convert files, 0 to use all CPU cores",
+    )
+
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=1,
+        help="Number of processes to convert single large SMI (1 MB or "
+        + "larger) by splitting it, 0 to use all CPU cores",
+    )
+
+    parser.add_argument(
+        "--lazy",
+        action="store_true",
+        help="Memory-map SMI and decode, parse and convert it by <SYNC> "
+        + "blocks, which lowers memory of large SMI. Not used with --shards "
+        + "and --pipeline",
+    )
+
+    parser.add_argument(
+        "--cache_dir",
+        type=str,
+        help="Folder to cache converted subtitle, unchanged files are not "
+        + "converted again",
+    )
+
+    parser.add_argument(
+        "--cache_size",
+        type=int,
+        default=256,
+        help="Maximum size of the cache in MB (default: 256)",
+    )
+
+    parser.add_argument(
+        "--profile",
+        type=str,
+        help="Save time of each stage and counters of each file into this "
+        + "file, as one JSON record per line",
+    )
+
+    parser.add_argument(
+        "-q",
+        "--quiet",
+        action="store_true",
+        help="Do not print summary of the warnings (e.g. <SYNC> without "
+        + "language class) for each file",
+    )
+
+    parser.add_argument(
+        "--diagnostics",
+        type=str,
+        help="Save counts and first samples of the warnings of each file "
+        + "into this file, as one JSON record per line",
+    )
+
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Convert files in asyncio pipeline that reads next files and "
+        + "writes converted files while converting, -j sets number of "
+        + "processes to convert files. Cache, profile and diagnostics are "
+        + "not used, and it cannot be used with --format, --variants, --lazy "
+        + "and --shards",
+    )
+
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help="Convert SMI files under the given folders, keeping the folder "
+        + "structure in the output folder. Only new or changed files are "
+        + "converted, using the index that is saved in the output folder",
+    )
+
+    parser.add_argument(
+        "--sync_index",
+        type=str,
+        help="Index file of --sync (default: .smi2ass-index.json in the "
+        + "output folder)",
+    )
+
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and convert SMI files that are added or changed "
+        + "under the given folder, once they stop changing. Converted files "
+        + "are recorded in the index of --sync",
+    )
+
+    parser.add_argument(
+        "--settle",
+        type=float,
+        help="Seconds that file has to stay same before --watch converts it "
+        + "(default: 2)",
+    )
+
+    parser.add_argument(
+        "--poll",
+        type=float,
+        help="Seconds between the scans of --watch, folder is scanned when "
+        + "it is changed as well on Linux (default: 1)",
+    )
+
+    parser.add_argument(
+        "--metrics",
+        type=str,
+        help="Write queue depth and conversion latency of --watch into this "
+        + "file as JSON after each scan",
+    )
+
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Keep running and convert jobs that are given as JSON lines on "
+        + "stdin, one JSON result per job is written on stdout. -j sets "
+        + "number of jobs that are converted at once",
+    )
+
+    parser.add_argument(
+        "--cprofile",
+        type=str,
+        help="Run with cProfile and save the statistics into this file, "
+        + "files are converted in single process",
+    )
+
     return parser
 
 
@@ -118,13 +312,24 @@ def update_style(obj: smi2ass, args: argparse.Namespace) -> None:
         )
 
 
-def main() -> None:
-    parser: argparse.ArgumentParser = cmd_arg()
-    args: argparse.Namespace = parser.parse_args()
+def create_converter(args: argparse.Namespace) -> smi2ass:
+    """Creating smi2ass object that is set up with the user inputs
+
+    Args:
+        args (argparse.Namespace): Input arguments
+
+    Returns:
+        smi2ass: smi2ass class object
+    """
 
-    obj_smi2ass = smi2ass()  # Create object for smi2ass
+    obj_smi2ass = smi2ass(parser=args.parser)  # Create object for smi2ass
     update_style(obj_smi2ass, args)
 
+    if args.legacy_encodings != None:  # Update encodings to try
+        obj_smi2ass.set_legacy_encodings(
+            [tmp.strip() for tmp in args.legacy_encodings.split(",")]
+        )
+
     # Check if user gave time offset
     if args.add_time != None or args.sub_time != None:
         time_offset: int
@@ -136,9 +341,464 @@ def main() -> None:
         # Update time offset
         obj_smi2ass.set_time_offset(time_offset)
 
+    # Check if user gave time window
+    if args.time_from != None or args.time_to != None:
+        obj_smi2ass.set_window(
+            args.time_from or 0, args.time_to, rebase=args.rebase
+        )
+
+    if args.formats != None:  # Save other subtitle formats
+        obj_smi2ass.set_formats(
+            [tmp.strip().lower() for tmp in args.formats.split(",")]
+        )
+
+    if args.variants != None:  # Save other renderings of the subtitle
+        with open(args.variants, "r", encoding="utf-8") as f:
+            obj_smi2ass.set_variants(json.load(f))
+
+    if args.shards != 1:  # Split large SMI into multiple processes
+        obj_smi2ass.set_shards(args.shards)
+
+    if args.lazy:  # Convert SMI by <SYNC> blocks
+        obj_smi2ass.set_lazy()
+
+    if args.quiet:  # Do not print summary of the warnings
+        obj_smi2ass.set_quiet()
+
+    if args.cache_dir != None:  # Use cache of converted subtitle
+        from conv_cache import ConversionCache
+
+        obj_smi2ass.set_cache(
+            ConversionCache(args.cache_dir, args.cache_size * 1024 * 1024)
+        )
+
+    return obj_smi2ass
+
+
+# smi2ass object of the worker process, so settings are loaded only once
+worker_smi2ass: smi2ass
+worker_output_dir: str
+worker_flag_profile: bool
+worker_flag_diagnostics: bool
+
+
+def convert_file(
+    obj_smi2ass: smi2ass,
+    smi_path: str,
+    output_dir: str,
+    flag_profile: bool = False,
+    flag_diagnostics: bool = False,
+) -> dict[str, any] | None:
+    """Converting one file, with profile when it is asked
+
+    Args:
+        obj_smi2ass (smi2ass): Converter
+        smi_path (str): SMI file path
+        output_dir (str): Where converted file is saved
+        flag_profile (bool, optional): Collecting profile record. Defaults to
+        False.
+        flag_diagnostics (bool, optional): Collecting warnings of the file.
+        Defaults to False.
+
+    Returns:
+        dict[str, any] | None: Profile record, or record with only "file"
+        and "diagnostics" when only warnings are asked. None when neither is
+        asked.
+    """
+
+    if not flag_profile:
+        obj_smi2ass.to_ass(smi_path, stream=True).save(output_dir)
+        if flag_diagnostics:
+            return {
+                "file": smi_path,
+                "diagnostics": obj_smi2ass.diagnostics.report(),
+            }
+        return None
+
+    profile: ConversionProfile = ConversionProfile()
+    profile.attach(obj_smi2ass)
+    try:
+        obj_smi2ass.to_ass(smi_path, stream=True).save(output_dir)
+    finally:
+        obj_smi2ass.set_stage_hook(None)
+        obj_smi2ass.set_counter_hook(None)
+
+    return profile.record(obj_smi2ass, smi_path)
+
+
+def write_profile(path: str, records: list[dict[str, any]]) -> None:
+    """Saving profile records, one JSON record per line
+
+    Args:
+        path (str): Output file
+        records (list[dict[str, any]]): Records of the files
+    """
+
+    with open(path, "w", encoding="utf-8") as f:
+        for tmp in records:
+            f.write(json.dumps(tmp, ensure_ascii=False) + "\n")
+    print(f"Profile has been saved as... \n{path}")
+
+
+def write_diagnostics(path: str, records: list[dict[str, any]]) -> None:
+    """Saving warnings of the files, one JSON record per line
+
+    Args:
+        path (str): Output file
+        records (list[dict[str, any]]): Records of the files, from
+        "convert_file"
+    """
+
+    with open(path, "w", encoding="utf-8") as f:
+        for tmp in records:
+            f.write(
+                json.dumps(
+                    {"file": tmp["file"], **tmp["diagnostics"]},
+                    ensure_ascii=False,
+                )
+                + "\n"
+            )
+    print(f"Diagnostics has been saved as... \n{path}")
+
+
+def init_worker(args: argparse.Namespace) -> None:
+    """Initializer of the worker process in the batch conversion
+
+    Args:
+        args (argparse.Namespace): Input arguments
+    """
+
+    global worker_smi2ass, worker_output_dir, worker_flag_profile
+    global worker_flag_diagnostics
+    worker_smi2ass = create_converter(args)
+    worker_output_dir = args.output_dir
+    worker_flag_profile = args.profile != None
+    worker_flag_diagnostics = args.diagnostics != None
+
+
+def convert_worker(
+    smi_path: str,
+) -> tuple[str, str | None, dict[str, int], dict[str, any] | None]:
+    """Converting one file in the worker process. Messages are kept and
+    returned, so they can be printed in the order of the input.
+
+    Args:
+        smi_path (str): SMI file path
+
+    Returns:
+        tuple[str, str | None, dict[str, int], dict[str, any] | None]:
+        Printed messages, error message, cache statistics and record from
+        "convert_file" of this file. Error message is None when conversion is
+        successful, and record is None when it is not asked
+    """
+
+    cache: "ConversionCache | None" = worker_smi2ass.cache
+    stats_before: dict[str, int] = dict(cache.stats) if cache else {}
+
+    msg: io.StringIO = io.StringIO()
+    error: str | None = None
+    record: dict[str, any] | None = None
+    with contextlib.redirect_stdout(msg):
+        try:
+            record = convert_file(
+                worker_smi2ass,
+                smi_path,
+                worker_output_dir,
+                worker_flag_profile,
+                worker_flag_diagnostics,
+            )
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+
+    stats: dict[str, int] = (
+        {key: cache.stats[key] - value for key, value in stats_before.items()}
+        if cache
+        else {}
+    )
+
+    return msg.getvalue(), error, stats, record
+
+
+def find_duplicates(file_names: list[str]) -> dict[int, int]:
+    """Finding files that have same content. Only files with same size are
+    hashed.
+
+    Args:
+        file_names (list[str]): SMI file paths
+
+    Returns:
+        dict[int, int]: Index of duplicated file as key and index of the
+        first file with same content as value
+    """
+
+    import hashlib
+
+    by_size: dict[int, list[int]] = {}
+    for idx, tmp_name in enumerate(file_names):
+        try:
+            by_size.setdefault(os.path.getsize(tmp_name), []).append(idx)
+        except OSError:
+            continue
+
+    duplicates: dict[int, int] = {}
+    for tmp_idxs in by_size.values():
+        if len(tmp_idxs) < 2:
+            continue
+        first_by_hash: dict[str, int] = {}
+        for idx in tmp_idxs:
+            try:
+                with open(file_names[idx], "rb") as f:
+                    tmp_hash: str = hashlib.sha256(f.read()).hexdigest()
+            except OSError:
+                continue
+            if tmp_hash in first_by_hash:
+                duplicates[idx] = first_by_hash[tmp_hash]
+            else:
+                first_by_hash[tmp_hash] = idx
+
+    return duplicates
+
+
+def convert_parallel(args: argparse.Namespace) -> bool:
+    """Converting files with process pool. Larger files are started first,
+    so single large file does not hold up the end of the batch. When cache is
+    used, files with same content are converted after the first one is done,
+    so they are read from the cache.
+
+    Args:
+        args (argparse.Namespace): Input arguments
+
+    Returns:
+        bool: True when all files are converted
+    """
+
+    from concurrent.futures import Future, ProcessPoolExecutor
+
+    jobs: int = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    file_names: list[str] = args.file_name
+
+    def file_size(idx: int) -> int:
+        try:
+            return os.path.getsize(file_names[idx])
+        except OSError:
+            return 0
+
+    # Duplicated files are only converted once, when cache is used
+    duplicates: dict[int, int] = (
+        find_duplicates(file_names) if args.cache_dir != None else {}
+    )
+
+    schedule: list[int] = sorted(
+        (idx for idx in range(len(file_names)) if idx not in duplicates),
+        key=file_size,
+        reverse=True,
+    )
+
+    flag_success: bool = True
+    cache_stats: dict[str, int] = {}
+    records: list[dict[str, any]] = []
+    with ProcessPoolExecutor(
+        max_workers=min(jobs, len(file_names)),
+        initializer=init_worker,
+        initargs=(args,),
+    ) as executor:
+        futures: dict[int, Future] = {
+            idx: executor.submit(convert_worker, file_names[idx])
+            for idx in schedule
+        }
+
+        # Reporting result in the order of the input. First file of the
+        # duplicates always comes earlier, so it is done at this point.
+        for idx in range(len(file_names)):
+            if idx in duplicates:
+                futures[idx] = executor.submit(convert_worker, file_names[idx])
+            msg, error, stats, record = futures[idx].result()
+            print(msg, end="")
+            if error is not None:
+                flag_success = False
+                print(f"Failed to convert {file_names[idx]}: {error}")
+            for key, value in stats.items():
+                cache_stats[key] = cache_stats.get(key, 0) + value
+            if record is not None:
+                records.append(record)
+
+    if args.cache_dir != None:
+        from conv_cache import cache_summary
+
+        print("\n" + cache_summary(cache_stats))
+
+    if args.profile != None:
+        write_profile(args.profile, records)
+    if args.diagnostics != None:
+        write_diagnostics(args.diagnostics, records)
+
+    return flag_success
+
+
+def convert_pipeline(args: argparse.Namespace) -> bool:
+    """Converting files with asyncio pipeline, see "convert_batch"
+
+    Args:
+        args (argparse.Namespace): Input arguments
+
+    Returns:
+        bool: True when all files are converted
+    """
+
+    # Imported only here, so asyncio is not imported on every start
+    import asyncio
+    from concurrent.futures import ProcessPoolExecutor
+
+    from conv_async import convert_batch
+
+    obj_smi2ass = create_converter(args)
+    obj_smi2ass.set_cache(None)
+    jobs: int = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+
+    with contextlib.ExitStack() as stack:
+        # Files are converted in the threads when there is single job
+        executor: ProcessPoolExecutor | None = (
+            stack.enter_context(ProcessPoolExecutor(max_workers=jobs))
+            if jobs > 1
+            else None
+        )
+        results: list[dict[str, any]] = asyncio.run(
+            convert_batch(
+                args.file_name,
+                obj_smi2ass,
+                args.output_dir,
+                obj_smi2ass.time_offset if obj_smi2ass.flag_time_offset else 0,
+                executor=executor,
+                jobs=jobs,
+                legacy_encodings=obj_smi2ass.legacy_encodings,
+                parser=obj_smi2ass.parser,
+                time_from=obj_smi2ass.time_from,
+                time_to=obj_smi2ass.time_to,
+                rebase=obj_smi2ass.flag_rebase,
+                quiet=obj_smi2ass.flag_quiet,
+            )
+        )
+
+    flag_success: bool = True
+    for tmp in results:
+        if tmp["error"] is not None:
+            flag_success = False
+            print(f"Failed to convert {tmp['file']}: {tmp['error']}")
+
+    return flag_success
+
+
+def convert_serial(args: argparse.Namespace) -> None:
+    """Converting files one by one in this process
+
+    Args:
+        args (argparse.Namespace): Input arguments
+    """
+
+    obj_smi2ass = create_converter(args)
+
+    records: list[dict[str, any]] = []
     for tmp_file_name in args.file_name:
-        obj_smi2ass.to_ass(tmp_file_name).save(args.output_dir)
+        record = convert_file(
+            obj_smi2ass,
+            tmp_file_name,
+            args.output_dir,
+            args.profile != None,
+            args.diagnostics != None,
+        )
+        if record is not None:
+            records.append(record)
+
+    if obj_smi2ass.cache is not None:
+        print("\n" + obj_smi2ass.cache.summary())
+
+    if args.profile != None:
+        write_profile(args.profile, records)
+    if args.diagnostics != None:
+        write_diagnostics(args.diagnostics, records)
+
+
+def main() -> None:
+    parser: argparse.ArgumentParser = cmd_arg()
+    args: argparse.Namespace = parser.parse_args()
+
+    if args.serve:
+        from conv_server import serve
+
+        jobs: int = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+        serve(create_converter(args), args.output_dir, jobs)
+        return
+
+    if len(args.file_name) == 0:
+        parser.error("the following arguments are required: File_Name")
+
+    # cProfile only sees this process, so files are converted here
+    if args.cprofile != None:
+        import cProfile
+
+        profiler: cProfile.Profile = cProfile.Profile()
+        profiler.runcall(convert_serial, args)
+        profiler.dump_stats(args.cprofile)
+        print(f"cProfile statistics has been saved as... \n{args.cprofile}")
+        return
+
+    if args.sync:
+        from conv_library import sync_library
+
+        summary: dict[str, any] = sync_library(
+            create_converter(args),
+            args.file_name,
+            args.output_dir,
+            args.sync_index,
+            args.jobs if args.jobs > 0 else (os.cpu_count() or 1),
+        )
+        if len(summary["failed"]) != 0:
+            sys.exit(1)
+        return
+
+    if args.watch:
+        if len(args.file_name) != 1:
+            parser.error("--watch needs one folder")
+        from conv_watch import WATCH_INTERVAL, WATCH_SETTLE, WatchFolder
+
+        WatchFolder(
+            create_converter(args),
+            args.file_name[0],
+            args.output_dir,
+            jobs=args.jobs if args.jobs > 0 else (os.cpu_count() or 1),
+            settle=args.settle if args.settle != None else WATCH_SETTLE,
+            interval=args.poll if args.poll != None else WATCH_INTERVAL,
+            index_path=args.sync_index,
+        ).run(metrics_path=args.metrics)
+        return
+
+    if args.pipeline:
+        # Pipeline saves only ASS of the whole SMI
+        for tmp_option, tmp_flag in (
+            ("--format", args.formats != None),
+            ("--variants", args.variants != None),
+            ("--lazy", args.lazy),
+            ("--shards", args.shards != 1),
+        ):
+            if tmp_flag:
+                parser.error(f"--pipeline cannot be used with {tmp_option}")
+        if not convert_pipeline(args):
+            sys.exit(1)
+        return
+
+    if args.jobs != 1 and len(args.file_name) > 1:
+        if not convert_parallel(args):
+            sys.exit(1)
+        return
+
+    convert_serial(args)
 
 
 if __name__ == "__main__":
+    # Needed for the process pool in the compiled executable, it does
+    # nothing otherwise so multiprocessing is not imported
+    if getattr(sys, "frozen", False):
+        import multiprocessing
+
+        multiprocessing.freeze_support()
     main()
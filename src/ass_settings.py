@@ -1,11 +1,25 @@
 # Python builtin modules
+import copy
 import os
 import sys
 import json
 from pathlib import Path
 
-# PIP installed modules
-import webcolors
+# Custom modules
+from css_colors import CSS3_NAMES_TO_HEX
+from default_settings import DEFAULT_ASS_STYLES, DEFAULT_LAN_CODE
+from smi_diagnostics import Diagnostics
+
+# Parsed setting files of this process. Resolved path of the file is used as
+# key and value is [modification time in ns, parsed data]
+SETTING_CACHE: dict[str, tuple[int, dict[str, any]]] = {}
+
+# Style overrides that "override_style" takes, and the setter of each one
+STYLE_SETTERS: dict[str, str] = {
+    "title": "update_title",
+    "font": "update_font_name",
+    "font_size": "update_font_size",
+}
 
 
 class AssStyle:
@@ -33,12 +47,12 @@ class AssStyle:
 
         # Reading language code
         self.lan_code: dict[str, str] = load_setting(
-            "lan_code.json", self.setting_path
+            "lan_code.json", self.setting_path, DEFAULT_LAN_CODE
         )
 
         # Reading ass style information
         self.ass_style: dict[str, any] = load_setting(
-            "ass_styles.json", self.setting_path
+            "ass_styles.json", self.setting_path, DEFAULT_ASS_STYLES
         )
 
         # Prepare even block of the ass header
@@ -46,6 +60,10 @@ class AssStyle:
             "[Events]\nFormat: Layer, Start, End, Style, Actor, MarginL, MarginR, MarginV, Effect, Text\n\n"
         )
 
+        # Composed ASS header, it is composed again only after the setter
+        # methods changed the style
+        self.header_cache: str | None = None
+
     def __compose_info(self) -> str:
         """Composing "Script Info" block of ASS header in string
 
@@ -98,11 +116,15 @@ class AssStyle:
 
         return f"{tmp_head}\n{tmp_format}\n{tmp_style}\n\n"
 
-    def get_lang_code(self, tmp_lang_code: str) -> str:
+    def get_lang_code(
+        self, tmp_lang_code: str, diagnostics: Diagnostics | None = None
+    ) -> str:
         """Convert SMI language code to ASS language code
 
         Args:
             tmp_lang_code (str): SMI language code in all upper case
+            diagnostics (Diagnostics | None, optional): Collector to count
+            unknown language code, instead of printing it. Defaults to None.
 
         Returns:
             str: Matching ASS language code. in case when language code is not
@@ -112,6 +134,9 @@ class AssStyle:
         try:
             return self.lan_code[tmp_lang_code.upper()]
         except:
+            if diagnostics is not None:
+                diagnostics.warn("unknown_lang_code", tmp_lang_code)
+                return self.lan_code["UNKNOWNCC"]
             print(
                 'Language code "%s" is not found, please add language code to "%s"'
                 % (tmp_lang_code, "lan_code.json")
@@ -119,6 +144,26 @@ class AssStyle:
             return self.lan_code["UNKNOWNCC"]
 
     def color2hex(self, str_color: str) -> str:
+        """Converting CSS3 color name to hex color code
+
+        Args:
+            str_color (str): Name of the color
+
+        Raises:
+            ValueError: Unknown color name
+
+        Returns:
+            str: Hex color code, e.g. "#ff0000"
+        """
+
+        try:
+            return CSS3_NAMES_TO_HEX[str_color.lower()]
+        except KeyError:
+            pass
+
+        # Not in the bundled table, let webcolors decide
+        import webcolors
+
         return webcolors.name_to_hex(str_color)
 
     def update_title(self, title: str) -> None:
@@ -129,6 +174,7 @@ class AssStyle:
         """
 
         self.ass_style["ScriptInfo"]["Title"] = title
+        self.header_cache = None
 
     @property
     def title(self) -> str:
@@ -145,6 +191,7 @@ class AssStyle:
 
         self.ass_style["ScriptInfo"]["PlayResX"] = res_x
         self.ass_style["ScriptInfo"]["PlayResY"] = res_y
+        self.header_cache = None
 
     @property
     def resolution(self) -> list[int]:
@@ -161,6 +208,7 @@ class AssStyle:
         """
 
         self.ass_style["style"]["Fontname"] = name
+        self.header_cache = None
 
     @property
     def font_name(self) -> str:
@@ -174,27 +222,83 @@ class AssStyle:
         """
 
         self.ass_style["style"]["Fontsize"] = size
+        self.header_cache = None
 
     @property
     def font_size(self) -> int | float:
         return self.ass_style["style"]["Fontsize"]
 
     def ass_header(self) -> str:
-        """Composing ASS header that contains ASS style settings
+        """Composing ASS header that contains ASS style settings. Header is
+        kept until style is changed by setter methods, so "ass_style" should
+        not be changed directly.
 
         Returns:
             str: Composed ASS header in string format
         """
 
-        return self.__compose_info() + self.__compose_styles() + self.ass_event
+        if self.header_cache is None:
+            self.header_cache = (
+                self.__compose_info()
+                + self.__compose_styles()
+                + self.ass_event
+            )
 
+        return self.header_cache
 
-def load_setting(fs_name: str, fs_path: Path | str) -> dict[str, any]:
-    """Reading json file from file
+
+def override_style(
+    base: AssStyle, overrides: dict[str, any] | None
+) -> AssStyle:
+    """Copying the style with overrides, base style is not changed. Base is
+    returned as it is when there is no override.
+
+    Args:
+        base (AssStyle): Style to copy
+        overrides (dict[str, any] | None): "title", "font", "font_size" and
+        "resolution" as [x, y]
+
+    Raises:
+        ValueError: Unknown override
+
+    Returns:
+        AssStyle: Style with the overrides
+    """
+
+    if not overrides:
+        return base
+
+    style: AssStyle = copy.copy(base)
+    style.ass_style = copy.deepcopy(base.ass_style)
+    style.header_cache = None
+    for key, value in overrides.items():
+        if key in STYLE_SETTERS:
+            getattr(style, STYLE_SETTERS[key])(value)
+        elif key == "resolution":
+            style.update_res(res_x=value[0], res_y=value[1])
+        else:
+            raise ValueError(f'Unknown style "{key}"')
+
+    return style
+
+
+def load_setting(
+    fs_name: str,
+    fs_path: Path | str,
+    default: dict[str, any] | None = None,
+) -> dict[str, any]:
+    """Reading json file from file. Parsed file is kept in "SETTING_CACHE"
+    and it is only read again when the file is modified. Copy is returned,
+    so caller can change it.
 
     Args:
         fs_name (str): JSON file name
         fs_path (str): Path to JSON file
+        default (dict[str, any] | None, optional): Bundled setting that is
+        used when the file is not exist. Defaults to None.
+
+    Raises:
+        FileNotFoundError: File is not exist and there is no default
 
     Returns:
         dict[str, any]: Parsed JSON data from file
@@ -206,8 +310,21 @@ def load_setting(fs_name: str, fs_path: Path | str) -> dict[str, any]:
     else:
         file2open: Path | str = fs_path + fs_name  # type: ignore
 
-    with open(file2open, "r") as f:
-        return json.load(f)
+    cache_key: str = os.path.abspath(file2open)
+    try:
+        mtime: int = os.stat(file2open).st_mtime_ns
+    except FileNotFoundError:
+        if default is None:
+            raise
+        return copy.deepcopy(default)
+
+    cached = SETTING_CACHE.get(cache_key)
+    if cached is None or cached[0] != mtime:
+        with open(file2open, "r") as f:
+            cached = (mtime, json.load(f))
+        SETTING_CACHE[cache_key] = cached
+
+    return copy.deepcopy(cached[1])
 
 
 def is_nuitka() -> bool:
@@ -0,0 +1,182 @@
+# Python built in modules
+import asyncio
+from concurrent.futures import Executor
+from pathlib import Path
+
+# Custom modules
+from ass_settings import AssStyle
+from smi2ass import SmiConverter, ass_paths, save_internal
+from smi_encoding import LEGACY_ENCODINGS, decode_smi
+
+# Number of files that are read ahead for each conversion that is running
+PREFETCH_PER_JOB: int = 2
+
+
+def read_smi(
+    smi_path: str, legacy_encodings: list[str]
+) -> tuple[str, str, str]:
+    """Reading and decoding SMI file, it runs in the thread
+
+    Args:
+        smi_path (str): SMI file path
+        legacy_encodings (list[str]): Encodings that are tried before chardet
+
+    Raises:
+        IOError: Neither file is not exist or cannot access file
+
+    Returns:
+        tuple[str, str, str]: Decoded SMI, encoding and tier that found the
+        encoding
+    """
+
+    try:
+        with open(smi_path, "rb") as f:
+            smi_raw: bytes = f.read()
+    except IOError as e:
+        raise IOError(f"Failed to open the file {smi_path}: {e}")
+
+    return decode_smi(smi_raw, legacy_encodings)
+
+
+def render_smi(
+    smi_sgml: str,
+    encoding: str,
+    encoding_tier: str,
+    style: AssStyle,
+    offset: int,
+    options: dict[str, any],
+) -> dict[str, str]:
+    """Converting decoded SMI to ASS subtitle of each language, it runs in
+    the executor. Only strings are returned, so it can be a process pool.
+
+    Args:
+        smi_sgml (str): Decoded SMI
+        encoding (str): Encoding of SMI file
+        encoding_tier (str): Which detection tier found the encoding
+        style (AssStyle): Style and language codes to use
+        offset (int): Time in millisecond to add on subtitle
+        options (dict[str, any]): Other options of "SmiConverter"
+
+    Returns:
+        dict[str, str]: Language code as key and ASS subtitle as value
+    """
+
+    return (
+        SmiConverter(style, offset, **options)
+        .run_text(smi_sgml, encoding, encoding_tier)
+        .to_strings()
+    )
+
+
+async def convert_batch(
+    smi_paths: list[str],
+    style: AssStyle,
+    output_dir: str | Path,
+    offset: int = 0,
+    executor: Executor | None = None,
+    jobs: int = 1,
+    max_in_flight: int | None = None,
+    legacy_encodings: list[str] | None = None,
+    **options,
+) -> list[dict[str, any]]:
+    """Converting files in the pipeline. Next files are read and decoded in
+    the threads while the current ones are converted in the executor, and
+    converted files are written in the threads. Files that are read but not
+    converted are limited by "max_in_flight", so memory stays capped.
+
+    Args:
+        smi_paths (list[str]): SMI file paths
+        style (AssStyle): Style and language codes to use, it has to be
+        picklable when "executor" is process pool
+        output_dir (str | Path): Where converted files are saved
+        offset (int, optional): Time in millisecond to add on subtitle.
+        Defaults to 0.
+        executor (Executor | None, optional): Executor to convert files.
+        Defaults to None, default executor of the event loop.
+        jobs (int, optional): Number of files that are converted at once,
+        should match the workers of "executor". Defaults to 1.
+        max_in_flight (int | None, optional): Number of files that are read
+        ahead. Defaults to None, PREFETCH_PER_JOB for each job.
+        legacy_encodings (list[str] | None, optional): Encodings that are
+        tried before chardet is used. Defaults to None, LEGACY_ENCODINGS.
+        options: Other options of "SmiConverter" (parser, shards,
+        shard_min_size, time_from, time_to and rebase), hooks are not
+        supported
+
+    Returns:
+        list[dict[str, any]]: Result of each file in the order of the input,
+        {"file": str, "encoding": str, "outputs": {language: path}, "error":
+        str or None}
+    """
+
+    loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+    ass_path: Path = Path(output_dir)
+    ass_path.mkdir(parents=True, exist_ok=True)
+    if legacy_encodings is None:
+        legacy_encodings = list(LEGACY_ENCODINGS)
+    if max_in_flight is None:
+        max_in_flight = PREFETCH_PER_JOB * jobs
+
+    results: list[dict[str, any]] = [
+        {"file": tmp, "encoding": "", "outputs": {}, "error": None}
+        for tmp in smi_paths
+    ]
+    # Decoded files waiting to be converted, None tells converter to stop
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, max_in_flight))
+
+    async def read_all() -> None:
+        for idx, smi_path in enumerate(smi_paths):
+            try:
+                decoded = await asyncio.to_thread(
+                    read_smi, smi_path, legacy_encodings
+                )
+            except Exception as e:
+                results[idx]["error"] = f"{type(e).__name__}: {e}"
+                continue
+            await queue.put((idx, decoded))
+        for _ in range(jobs):
+            await queue.put(None)
+
+    async def convert_all() -> None:
+        while (item := await queue.get()) is not None:
+            idx, (smi_sgml, encoding, encoding_tier) = item
+            smi_path: Path = Path(smi_paths[idx])
+            results[idx]["encoding"] = encoding
+            print(f"\nConverting... \n{smi_path}")
+            print(f"Encoding: {encoding} (found by {encoding_tier})")
+            try:
+                ass_texts: dict[str, str] = await loop.run_in_executor(
+                    executor,
+                    render_smi,
+                    smi_sgml,
+                    encoding,
+                    encoding_tier,
+                    style,
+                    offset,
+                    options,
+                )
+                # Decoded SMI is not needed while the files are written
+                del smi_sgml, item
+
+                file_paths: dict[str, Path] = ass_paths(
+                    ass_path, smi_path.stem, list(ass_texts.keys())
+                )
+                await asyncio.gather(
+                    *(
+                        asyncio.to_thread(
+                            save_internal, file_path, [ass_texts[key]]
+                        )
+                        for key, file_path in file_paths.items()
+                    )
+                )
+            except Exception as e:
+                results[idx]["error"] = f"{type(e).__name__}: {e}"
+                continue
+
+            for key, file_path in file_paths.items():
+                results[idx]["outputs"][key] = str(file_path)
+                print(f"Converted file has been saved as... \n{file_path}")
+
+    await asyncio.gather(read_all(), *(convert_all() for _ in range(jobs)))
+
+    return results
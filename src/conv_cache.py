@@ -0,0 +1,193 @@
+# Python built in modules
+import hashlib
+import json
+import os
+from pathlib import Path
+
+# Version of the layout of the cached files, it is part of the key so old
+# entries are never read after layout is changed
+CACHE_FORMAT: int = 1
+
+# Default maximum size of the cache directory, in bytes
+CACHE_MAX_SIZE: int = 256 * 1024 * 1024
+
+# Extension of cached conversion
+CACHE_SUFFIX: str = ".json"
+
+
+class ConversionCache:
+    def __init__(
+        self, cache_dir: str | Path, max_size: int = CACHE_MAX_SIZE
+    ) -> None:
+        """On-disk cache of converted subtitle. Each entry is saved as
+        "<key>.json", where the key is hash of SMI file and the settings that
+        changes output. Modification time of the file is used as last access
+        time, and least recently used entries are removed when cache is
+        larger than "max_size".
+
+        Args:
+            cache_dir (str | Path): Directory where cached files are saved
+            max_size (int, optional): Maximum size of cache in bytes.
+            Defaults to CACHE_MAX_SIZE.
+        """
+
+        self.cache_dir: Path = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_size: int = max_size
+
+        # Total size of the cached files, it is counted once and then kept
+        # up to date by this object
+        self.total_size: int = sum(
+            tmp.stat().st_size for tmp in self.__entries()
+        )
+
+        # Statistics of this object
+        self.stats: dict[str, int] = {
+            "hits": 0,
+            "misses": 0,
+            "bytes_saved": 0,
+        }
+
+    def __entries(self) -> list[os.DirEntry]:
+        """Listing cached files
+
+        Returns:
+            list[os.DirEntry]: Cached files in cache directory
+        """
+
+        with os.scandir(self.cache_dir) as it:
+            return [
+                tmp
+                for tmp in it
+                if tmp.is_file() and tmp.name.endswith(CACHE_SUFFIX)
+            ]
+
+    def __path(self, key: str) -> Path:
+        return self.cache_dir.joinpath(key + CACHE_SUFFIX)
+
+    def get(
+        self, key: str, input_size: int = 0
+    ) -> dict[str, list[str]] | None:
+        """Reading cached conversion
+
+        Args:
+            key (str): Key from "make_key"
+            input_size (int, optional): Size of SMI file, it is counted as
+            saved bytes when it is hit. Defaults to 0.
+
+        Returns:
+            dict[str, list[str]] | None: Converted lines by language, None
+            when it is not cached
+        """
+
+        tmp_path: Path = self.__path(key)
+        try:
+            with open(tmp_path, "r", encoding="utf-8") as f:
+                ass_lines: dict[str, list[str]] = json.load(f)
+            os.utime(tmp_path)  # Mark as recently used
+        except (OSError, ValueError):
+            # Not cached, removed by other process or broken file
+            self.stats["misses"] += 1
+            return None
+
+        self.stats["hits"] += 1
+        self.stats["bytes_saved"] += input_size
+        return ass_lines
+
+    def put(self, key: str, ass_lines: dict[str, list[str]]) -> None:
+        """Saving converted lines to the cache. File is written to temporary
+        file first, so other processes never read half written file.
+
+        Args:
+            key (str): Key from "make_key"
+            ass_lines (dict[str, list[str]]): Converted lines by language
+        """
+
+        tmp_path: Path = self.__path(key)
+        tmp_part: Path = tmp_path.with_name(f"{tmp_path.name}.{os.getpid()}")
+        try:
+            with open(tmp_part, "w", encoding="utf-8") as f:
+                json.dump(ass_lines, f, ensure_ascii=False)
+            # Same key can be saved again (e.g. by other process), size of
+            # the replaced entry is not counted twice
+            try:
+                old_size: int = tmp_path.stat().st_size
+            except FileNotFoundError:
+                old_size = 0
+            os.replace(tmp_part, tmp_path)
+            self.total_size += tmp_path.stat().st_size - old_size
+        except OSError as e:
+            # Cache is only helper, failing to save should not stop converting
+            print(f"Failed to save cache {tmp_path}: {e}")
+            return
+
+        if self.total_size > self.max_size:
+            self.evict()
+
+    def evict(self) -> None:
+        """Removing least recently used entries until cache fits in the
+        maximum size
+        """
+
+        entries: list[tuple[float, int, str]] = []
+        for tmp in self.__entries():
+            try:
+                tmp_stat = tmp.stat()
+            except OSError:
+                continue
+            entries.append((tmp_stat.st_mtime, tmp_stat.st_size, tmp.path))
+        entries.sort()
+
+        self.total_size = sum(tmp[1] for tmp in entries)
+        for _, tmp_size, tmp_path in entries:
+            if self.total_size <= self.max_size:
+                break
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                continue
+            self.total_size -= tmp_size
+
+    def summary(self) -> str:
+        return cache_summary(self.stats)
+
+
+def make_key(smi_raw: bytes, fingerprint: dict[str, any]) -> str:
+    """Making cache key from SMI file and the settings
+
+    Args:
+        smi_raw (bytes): Content of SMI file
+        fingerprint (dict[str, any]): Settings that changes output, it has to
+        be JSON serializable. Order of keys is kept, since order of ASS style
+        keys changes the header
+
+    Returns:
+        str: Hex digest of the key
+    """
+
+    tmp_hash = hashlib.sha256(smi_raw)
+    tmp_hash.update(b"\0")
+    tmp_hash.update(
+        json.dumps([CACHE_FORMAT, fingerprint], ensure_ascii=False).encode(
+            "utf-8"
+        )
+    )
+
+    return tmp_hash.hexdigest()
+
+
+def cache_summary(stats: dict[str, int]) -> str:
+    """Composing readable message of cache statistics
+
+    Args:
+        stats (dict[str, int]): Statistics from "ConversionCache.stats"
+
+    Returns:
+        str: Message of the statistics
+    """
+
+    return (
+        f"Cache hits: {stats.get('hits', 0)}, "
+        + f"misses: {stats.get('misses', 0)}, "
+        + f"bytes saved: {stats.get('bytes_saved', 0)}"
+    )
@@ -0,0 +1,402 @@
+# Python built in modules
+import contextlib
+import hashlib
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterator
+
+# Custom modules
+from smi2ass import smi2ass
+
+# Version of the layout of the index file, index with other version is not
+# read and every file is converted again
+INDEX_FORMAT: int = 1
+
+# File name of the index, it is saved in the output folder by default
+INDEX_NAME: str = ".smi2ass-index.json"
+
+# Extension of SMI files that are converted, case is ignored
+SMI_SUFFIX: str = ".smi"
+
+# Index is saved after this many files are converted, so an interrupted run
+# does not convert them again
+INDEX_SAVE_INTERVAL: int = 100
+
+
+class LibraryIndex:
+    def __init__(self, index_path: str | Path) -> None:
+        """Index of converted SMI files. Each entry is keyed by absolute path
+        of SMI file and keeps its size, modification time, SHA-256 hash, the
+        settings fingerprint and converted files.
+
+        Args:
+            index_path (str | Path): Index file, it is created when it does
+            not exist
+        """
+
+        self.index_path: Path = Path(index_path)
+        self.entries: dict[str, dict[str, any]] = {}
+
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                tmp_index: dict[str, any] = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"Failed to read index {self.index_path}: {e}")
+            return
+
+        if tmp_index.get("format") != INDEX_FORMAT:
+            print(f"Index {self.index_path} is old, converting all files")
+            return
+        self.entries = tmp_index["files"]
+
+    def is_current(
+        self, smi_path: str, tmp_stat: os.stat_result, fingerprint: str
+    ) -> bool:
+        """Checking converted files of SMI file are up to date. SMI file that
+        only has new modification time is hashed to check the content, and
+        the entry is updated when the content is same.
+
+        Args:
+            smi_path (str): Absolute path of SMI file
+            tmp_stat (os.stat_result): Status of SMI file
+            fingerprint (str): Settings fingerprint from
+            "settings_fingerprint"
+
+        Returns:
+            bool: True when SMI file does not have to be converted
+        """
+
+        entry: dict[str, any] | None = self.entries.get(smi_path)
+        if (
+            entry is None
+            or entry["fingerprint"] != fingerprint
+            or entry["size"] != tmp_stat.st_size
+            or not all(
+                os.path.exists(tmp) for tmp in entry["outputs"].values()
+            )
+        ):
+            return False
+        if entry["mtime_ns"] == tmp_stat.st_mtime_ns:
+            return True
+
+        # Only modification time is changed, e.g. file is copied again
+        try:
+            if file_hash(smi_path) != entry["sha256"]:
+                return False
+        except OSError:
+            return False
+        entry["mtime_ns"] = tmp_stat.st_mtime_ns
+        return True
+
+    def update(
+        self,
+        smi_path: str,
+        tmp_stat: os.stat_result,
+        sha256: str,
+        fingerprint: str,
+        outputs: dict[str, str],
+    ) -> None:
+        """Recording converted SMI file
+
+        Args:
+            smi_path (str): Absolute path of SMI file
+            tmp_stat (os.stat_result): Status of SMI file before it was read
+            sha256 (str): Hash of SMI file
+            fingerprint (str): Settings fingerprint
+            outputs (dict[str, str]): Converted file of each language
+        """
+
+        self.entries[smi_path] = {
+            "size": tmp_stat.st_size,
+            "mtime_ns": tmp_stat.st_mtime_ns,
+            "sha256": sha256,
+            "fingerprint": fingerprint,
+            "outputs": outputs,
+        }
+
+    def save(self) -> None:
+        """Saving the index. File is written to temporary file first, so the
+        index is never half written.
+        """
+
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_part: Path = self.index_path.with_name(
+            f"{self.index_path.name}.{os.getpid()}"
+        )
+        with open(tmp_part, "w", encoding="utf-8") as f:
+            json.dump(
+                {"format": INDEX_FORMAT, "files": self.entries},
+                f,
+                ensure_ascii=False,
+            )
+        os.replace(tmp_part, self.index_path)
+
+
+# Converter of the worker process, see "init_library_worker"
+library_converter: smi2ass
+
+
+def init_library_worker(obj: smi2ass) -> None:
+    """Initializer of the worker process in "sync_library"
+
+    Args:
+        obj (smi2ass): Converter that is set up with the settings
+    """
+
+    global library_converter
+    library_converter = obj
+
+
+def settings_fingerprint(obj: smi2ass) -> str:
+    """Hashing settings that changes converted output
+
+    Args:
+        obj (smi2ass): Converter that is set up with the settings
+
+    Returns:
+        str: Hex digest of the settings
+    """
+
+    return hashlib.sha256(
+        json.dumps(obj.cache_fingerprint(), ensure_ascii=False).encode("utf-8")
+    ).hexdigest()
+
+
+def file_hash(file_path: str | Path) -> str:
+    """Hashing content of the file without reading it at once
+
+    Args:
+        file_path (str | Path): File to hash
+
+    Returns:
+        str: Hex digest of SHA-256
+    """
+
+    with open(file_path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def scan_library(
+    roots: list[str | Path], output_dir: str | Path
+) -> Iterator[tuple[str, Path, os.stat_result]]:
+    """Finding SMI files under the folders. Folder structure is kept in the
+    output folder, and SMI file that is given directly is saved right in
+    the output folder.
+
+    Args:
+        roots (list[str | Path]): Folders to search, or SMI files
+        output_dir (str | Path): Output folder
+
+    Yields:
+        Iterator[tuple[str, Path, os.stat_result]]: Absolute path of SMI
+        file, output folder of it and its status
+    """
+
+    for root in roots:
+        root_path: Path = Path(root).resolve()
+        if root_path.is_file():
+            yield str(root_path), Path(output_dir), root_path.stat()
+            continue
+
+        for tmp_dir, tmp_dirs, tmp_files in os.walk(root_path):
+            tmp_dirs.sort()  # Files are found in the same order every time
+            for tmp_name in sorted(tmp_files):
+                if not tmp_name.lower().endswith(SMI_SUFFIX):
+                    continue
+                smi_path: str = os.path.join(tmp_dir, tmp_name)
+                try:
+                    tmp_stat: os.stat_result = os.stat(smi_path)
+                except OSError:  # Removed while searching
+                    continue
+                yield smi_path, Path(output_dir).joinpath(
+                    os.path.relpath(tmp_dir, root_path)
+                ), tmp_stat
+
+
+def convert_library_file(
+    obj: smi2ass, smi_path: str, output_dir: str
+) -> tuple[str, dict[str, str]]:
+    """Converting one file of the library
+
+    Args:
+        obj (smi2ass): Converter
+        smi_path (str): SMI file path
+        output_dir (str): Where converted files are saved
+
+    Returns:
+        tuple[str, dict[str, str]]: SHA-256 hash of SMI file and saved file
+        of each language
+    """
+
+    saved: dict[str, Path] = obj.to_ass(smi_path, stream=True).save(output_dir)
+
+    return hashlib.sha256(obj.smi_raw).hexdigest(), {
+        key: str(value) for key, value in saved.items()
+    }
+
+
+def library_worker(
+    smi_path: str, output_dir: str
+) -> tuple[str, str | None, str, dict[str, str]]:
+    """Converting one file in the worker process. Messages are kept and
+    returned, so they can be printed in the order of the files.
+
+    Args:
+        smi_path (str): SMI file path
+        output_dir (str): Where converted files are saved
+
+    Returns:
+        tuple[str, str | None, str, dict[str, str]]: Printed messages, error
+        message, hash of SMI file and saved files. Error message is None when
+        conversion is successful.
+    """
+
+    msg: io.StringIO = io.StringIO()
+    error: str | None = None
+    sha256: str = ""
+    outputs: dict[str, str] = {}
+    with contextlib.redirect_stdout(msg):
+        try:
+            sha256, outputs = convert_library_file(
+                library_converter, smi_path, output_dir
+            )
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+
+    return msg.getvalue(), error, sha256, outputs
+
+
+def sync_library(
+    obj: smi2ass,
+    roots: list[str | Path],
+    output_dir: str | Path,
+    index_path: str | Path | None = None,
+    jobs: int = 1,
+) -> dict[str, any]:
+    """Converting SMI files under the folders, only when SMI file or the
+    settings are changed since the last run. Unchanged files are found by
+    size and modification time, and files that only have new modification
+    time are hashed to check the content. Converted files whose SMI file is
+    deleted are reported.
+
+    Args:
+        obj (smi2ass): Converter that is set up with the settings, it has to
+        be picklable when "jobs" is more than 1
+        roots (list[str | Path]): Folders to search, or SMI files
+        output_dir (str | Path): Output folder, folder structure is kept
+        index_path (str | Path | None, optional): Index file. Defaults to
+        None, INDEX_NAME in the output folder.
+        jobs (int, optional): Number of processes to convert files. Defaults
+        to 1.
+
+    Returns:
+        dict[str, any]: {"converted": [SMI path], "unchanged": int, "failed":
+        {SMI path: error}, "orphaned": {SMI path: [converted file]}}
+    """
+
+    index: LibraryIndex = LibraryIndex(
+        index_path or Path(output_dir).joinpath(INDEX_NAME)
+    )
+    fingerprint: str = settings_fingerprint(obj)
+    summary: dict[str, any] = {
+        "converted": [],
+        "unchanged": 0,
+        "failed": {},
+        "orphaned": {},
+    }
+
+    # Finding files that have to be converted
+    found: set[str] = set()
+    todo: list[tuple[str, Path, os.stat_result]] = []
+    for smi_path, smi_output_dir, tmp_stat in scan_library(roots, output_dir):
+        found.add(smi_path)
+        if index.is_current(smi_path, tmp_stat, fingerprint):
+            summary["unchanged"] += 1
+            continue
+        todo.append((smi_path, smi_output_dir, tmp_stat))
+
+    def record(
+        smi_path: str,
+        tmp_stat: os.stat_result,
+        error: str | None,
+        sha256: str,
+        outputs: dict[str, str],
+    ) -> None:
+        if error is not None:
+            print(f"Failed to convert {smi_path}: {error}")
+            summary["failed"][smi_path] = error
+            index.entries.pop(smi_path, None)
+            return
+
+        summary["converted"].append(smi_path)
+        index.update(smi_path, tmp_stat, sha256, fingerprint, outputs)
+        if len(summary["converted"]) % INDEX_SAVE_INTERVAL == 0:
+            index.save()
+
+    if jobs > 1 and len(todo) > 1:
+        with ProcessPoolExecutor(
+            max_workers=min(jobs, len(todo)),
+            initializer=init_library_worker,
+            initargs=(obj,),
+        ) as executor:
+            for (smi_path, _, tmp_stat), (
+                msg,
+                error,
+                sha256,
+                outputs,
+            ) in zip(
+                todo,
+                executor.map(
+                    library_worker,
+                    [tmp[0] for tmp in todo],
+                    [str(tmp[1]) for tmp in todo],
+                ),
+            ):
+                print(msg, end="")
+                record(smi_path, tmp_stat, error, sha256, outputs)
+    else:
+        for smi_path, smi_output_dir, tmp_stat in todo:
+            try:
+                sha256, outputs = convert_library_file(
+                    obj, smi_path, str(smi_output_dir)
+                )
+            except Exception as e:
+                record(smi_path, tmp_stat, f"{type(e).__name__}: {e}", "", {})
+                continue
+            record(smi_path, tmp_stat, None, sha256, outputs)
+
+    # Converted files of deleted SMI files under the searched folders. Entry
+    # is removed once its converted files are removed as well.
+    root_paths: list[Path] = [Path(tmp).resolve() for tmp in roots]
+    for smi_path in list(index.entries.keys()):
+        if smi_path in found or os.path.exists(smi_path):
+            continue
+        if not any(Path(smi_path).is_relative_to(tmp) for tmp in root_paths):
+            continue
+        outputs: list[str] = [
+            tmp
+            for tmp in index.entries[smi_path]["outputs"].values()
+            if os.path.exists(tmp)
+        ]
+        if len(outputs) == 0:
+            del index.entries[smi_path]
+            continue
+        summary["orphaned"][smi_path] = outputs
+        print(f"SMI file is deleted, but converted files remain: {smi_path}")
+        for tmp in outputs:
+            print(f"  {tmp}")
+
+    index.save()
+    print(
+        f"\n{len(found)} SMI files: {len(summary['converted'])} converted, "
+        + f"{summary['unchanged']} unchanged, "
+        + f"{len(summary['failed'])} failed, "
+        + f"{len(summary['orphaned'])} deleted"
+    )
+
+    return summary
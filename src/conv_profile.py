@@ -0,0 +1,86 @@
+# Python built in modules
+import contextlib
+import time
+from collections import defaultdict
+from typing import Iterator
+
+# Custom modules
+from smi2ass import smi2ass
+
+
+class ConversionProfile:
+    def __init__(self) -> None:
+        """Collecting time of each stage and the counters from smi2ass hooks,
+        for one file
+        """
+
+        self.stages: dict[str, float] = defaultdict(float)  # In second
+        self.counters: dict[str, int] = defaultdict(int)
+        self.start: float = time.perf_counter()
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Hook for "smi2ass.set_stage_hook"
+
+        Args:
+            name (str): Name of the stage
+        """
+
+        start: float = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] += time.perf_counter() - start
+
+    def count(self, name: str, value: int) -> None:
+        """Hook for "smi2ass.set_counter_hook"
+
+        Args:
+            name (str): Name of the counter
+            value (int): Value to add
+        """
+
+        self.counters[name] += value
+
+    def attach(self, obj: smi2ass) -> None:
+        """Setting hooks of this profile on the converter, and starting the
+        clock of total time
+
+        Args:
+            obj (smi2ass): Converter to profile
+        """
+
+        obj.set_stage_hook(self.stage)
+        obj.set_counter_hook(self.count)
+        self.start = time.perf_counter()
+
+    def record(
+        self, obj: smi2ass, smi_path: str, error: str | None = None
+    ) -> dict[str, any]:
+        """Composing profile record of the file
+
+        Args:
+            obj (smi2ass): Converter that converted the file
+            smi_path (str): SMI file path
+            error (str | None, optional): Error message when conversion is
+            failed. Defaults to None.
+
+        Returns:
+            dict[str, any]: JSON serializable record
+        """
+
+        return {
+            "file": smi_path,
+            "bytes": len(obj.smi_raw),
+            "encoding": obj.encoding,
+            "encoding_tier": obj.encoding_tier,
+            "parser": obj.parser,
+            "total_ms": round((time.perf_counter() - self.start) * 1000, 3),
+            "stages_ms": {
+                key: round(value * 1000, 3)
+                for key, value in self.stages.items()
+            },
+            "counters": dict(self.counters),
+            "diagnostics": obj.diagnostics.report(),
+            "error": error,
+        }
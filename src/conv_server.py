@@ -0,0 +1,241 @@
+# Python built in modules
+import base64
+import io
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TextIO
+
+# Custom modules
+from ass_settings import AssStyle, override_style
+from conv_profile import ConversionProfile
+from smi2ass import ass_paths, convert, convert_text, save_internal, smi2ass
+from smi_diagnostics import Diagnostics
+
+
+class ThreadOutput(io.TextIOBase):
+    def __init__(self, stream: TextIO) -> None:
+        """Replacement of "sys.stdout" while the server runs. Messages that
+        are printed by the job are kept for the thread that runs it, so they
+        are not mixed with other jobs or with the results.
+
+        Args:
+            stream (TextIO): Where messages outside of the jobs are written
+        """
+
+        self.stream: TextIO = stream
+        self.local: threading.local = threading.local()
+
+    def capture(self) -> None:
+        """Keeping messages of this thread until "release" is called"""
+
+        self.local.buffer = io.StringIO()
+
+    def release(self) -> str:
+        """Stopping to keep messages of this thread
+
+        Returns:
+            str: Kept messages
+        """
+
+        buffer: io.StringIO = self.local.buffer
+        self.local.buffer = None
+        return buffer.getvalue()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        buffer: io.StringIO | None = getattr(self.local, "buffer", None)
+        if buffer is None:
+            return self.stream.write(text)
+        return buffer.write(text)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+
+def job_style(base: smi2ass, job: dict[str, any]) -> AssStyle:
+    """Style of the job, base style is copied only when the job overrides
+    it, since style is shared by the jobs
+
+    Args:
+        base (smi2ass): Converter that is set up with the command line
+        job (dict[str, any]): The job
+
+    Returns:
+        AssStyle: Style to convert the job with
+    """
+
+    return override_style(base, job.get("style"))
+
+
+def run_job(
+    base: smi2ass, job: dict[str, any], output_dir: str
+) -> dict[str, any]:
+    """Converting one job
+
+    Args:
+        base (smi2ass): Converter that is set up with the command line
+        job (dict[str, any]): The job, see "serve"
+        output_dir (str): Output folder when the job does not have one
+
+    Returns:
+        dict[str, any]: Result of the job, see "serve"
+    """
+
+    start: float = time.perf_counter()
+    profile: ConversionProfile = ConversionProfile()
+    diagnostics: Diagnostics = Diagnostics()
+    options: dict[str, any] = {
+        "parser": job.get("parser", base.parser),
+        "legacy_encodings": base.legacy_encodings,
+        "lazy": base.flag_lazy,
+        "time_from": job.get("time_from", base.time_from),
+        "time_to": job.get("time_to", base.time_to),
+        "rebase": job.get("rebase", base.flag_rebase),
+        "stage_hook": profile.stage,
+        "counter_hook": profile.count,
+        "diagnostics": diagnostics,
+        "quiet": base.flag_quiet,
+    }
+    offset: int = job.get(
+        "time_offset", base.time_offset if base.flag_time_offset else 0
+    )
+    style: AssStyle = job_style(base, job)
+
+    # Inline content or path of SMI file
+    if "content" in job:
+        result = convert_text(job["content"], style, offset, **options)
+        stem: str = Path(job.get("name", "subtitle.smi")).stem
+    elif "content_base64" in job:
+        result = convert(
+            base64.b64decode(job["content_base64"]), style, offset, **options
+        )
+        stem = Path(job.get("name", "subtitle.smi")).stem
+    else:
+        result = convert(job["input"], style, offset, **options)
+        stem = Path(job["input"]).stem
+
+    outputs: dict[str, str] = {}
+    content: dict[str, str] | None = None
+    if job.get("return_content"):
+        content = result.to_strings()
+    else:
+        ass_path: Path = Path(job.get("output_dir", output_dir))
+        ass_path.mkdir(parents=True, exist_ok=True)
+        for key, file_path in ass_paths(
+            ass_path, stem, result.languages
+        ).items():
+            with profile.stage("save"):
+                save_internal(file_path, result.iter_lines(key))
+            outputs[key] = str(file_path)
+
+    return {
+        "outputs": outputs,
+        "content": content,
+        "encoding": result.encoding,
+        "total_ms": round((time.perf_counter() - start) * 1000, 3),
+        "stages_ms": {
+            key: round(value * 1000, 3)
+            for key, value in profile.stages.items()
+        },
+        "counters": dict(profile.counters),
+        "diagnostics": diagnostics.report(),
+    }
+
+
+def serve(
+    base: smi2ass,
+    output_dir: str,
+    jobs: int = 1,
+    stdin: TextIO | None = None,
+    stdout: TextIO | None = None,
+) -> None:
+    """Reading jobs as JSON lines and writing one JSON result per job, until
+    the input is closed. Settings are loaded once, and the jobs are converted
+    in the threads with shared style. Results are written as the jobs are
+    done, so they can be out of order.
+
+    Job: {"id": any, "input": SMI path, or "content": SMI text, or
+    "content_base64": SMI file in base64, "name": file name of inline SMI,
+    "output_dir": str, "return_content": bool, "time_offset": int,
+    "time_from": int, "time_to": int, "rebase": bool, "parser": str,
+    "style": {"title", "font", "font_size", "resolution"}}
+
+    Result: {"id": any, "ok": bool, "outputs": {language: path}, "content":
+    {language: ASS} or null, "encoding": str, "total_ms": float,
+    "stages_ms": {stage: ms}, "counters": {name: value}, "diagnostics":
+    {"counts": {kind: int}, "samples": {kind: [sample]}}, "warnings":
+    [message], "error": str or null}
+
+    Args:
+        base (smi2ass): Converter that is set up with the command line
+        output_dir (str): Output folder when the job does not have one
+        jobs (int, optional): Number of jobs that are converted at once.
+        Defaults to 1.
+        stdin (TextIO | None, optional): Where jobs are read. Defaults to
+        None, "sys.stdin".
+        stdout (TextIO | None, optional): Where results are written.
+        Defaults to None, "sys.stdout".
+    """
+
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+
+    # Messages are kept for each job, and only results are written
+    output: ThreadOutput = ThreadOutput(sys.stderr)
+    write_lock: threading.Lock = threading.Lock()
+    # Jobs that are read but not done, so input is not read too far ahead
+    pending: threading.BoundedSemaphore = threading.BoundedSemaphore(jobs * 2)
+
+    def write_result(result: dict[str, any]) -> None:
+        with write_lock:
+            stdout.write(json.dumps(result, ensure_ascii=False) + "\n")
+            stdout.flush()
+
+    def worker(job_id: any, job: dict[str, any]) -> None:
+        output.capture()
+        result: dict[str, any] = {"id": job_id, "ok": True}
+        try:
+            result.update(run_job(base, job, output_dir))
+            result["error"] = None
+        except Exception as e:
+            result["ok"] = False
+            result["error"] = f"{type(e).__name__}: {e}"
+        finally:
+            result["warnings"] = output.release().splitlines()
+            pending.release()
+        write_result(result)
+
+    stdout_before: TextIO = sys.stdout
+    sys.stdout = output
+    try:
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            for line in stdin:
+                if line.strip() == "":
+                    continue
+                try:
+                    job: dict[str, any] = json.loads(line)
+                except json.JSONDecodeError as e:
+                    write_result(
+                        {"id": None, "ok": False, "error": f"Bad job: {e}"}
+                    )
+                    continue
+                if not isinstance(job, dict):
+                    write_result(
+                        {
+                            "id": None,
+                            "ok": False,
+                            "error": "Bad job: job has to be JSON object",
+                        }
+                    )
+                    continue
+
+                pending.acquire()
+                executor.submit(worker, job.get("id"), job)
+    finally:
+        sys.stdout = stdout_before
@@ -0,0 +1,513 @@
+# Python built in modules
+import ctypes
+import ctypes.util
+import json
+import os
+import queue
+import select
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+# Custom modules
+from conv_library import (
+    INDEX_NAME,
+    INDEX_SAVE_INTERVAL,
+    SMI_SUFFIX,
+    LibraryIndex,
+    convert_library_file,
+    init_library_worker,
+    library_worker,
+    settings_fingerprint,
+)
+from smi2ass import smi2ass
+
+# Seconds that size and modification time of the file have to stay same
+# before it is converted
+WATCH_SETTLE: float = 2.0
+
+# Seconds between the scans of the folder. With inotify, folder is scanned
+# right after it is changed as well.
+WATCH_INTERVAL: float = 1.0
+
+# Number of recent conversions that latency statistics are made from
+WATCH_LATENCY_WINDOW: int = 1000
+
+# Seconds between the saves of the index. Converted files are recorded in
+# memory, and the whole index is saved at most once in this time or after
+# INDEX_SAVE_INTERVAL files.
+WATCH_SAVE_INTERVAL: float = 5.0
+
+# Times a file is converted again in new process pool, when the pool is
+# broken while converting it (e.g. a process is killed)
+WATCH_POOL_RETRIES: int = 1
+
+# Events of inotify that tells a file is added or changed
+IN_MODIFY: int = 0x00000002
+IN_CLOSE_WRITE: int = 0x00000008
+IN_MOVED_TO: int = 0x00000080
+IN_CREATE: int = 0x00000100
+WATCH_EVENTS: int = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+
+class FolderWaker:
+    def __init__(self) -> None:
+        """Waiting until next scan of the folder. On Linux, inotify is used
+        to wake up as soon as a file is changed, and it is only sleeping on
+        other systems.
+        """
+
+        self.fd: int = -1
+        self.watched: set[str] = set()  # Folders that are watched
+        self.libc: ctypes.CDLL | None = None
+
+        if not sys.platform.startswith("linux"):
+            return
+        try:
+            self.libc = ctypes.CDLL(
+                ctypes.util.find_library("c"), use_errno=True
+            )
+            self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        except (OSError, AttributeError):
+            self.fd = -1
+        if self.fd < 0:
+            print("inotify is not available, folder is only scanned")
+
+    def add(self, folder: str) -> None:
+        """Watching the folder, it is only done once for each folder
+
+        Args:
+            folder (str): Folder to watch
+        """
+
+        if self.fd < 0 or folder in self.watched:
+            return
+        self.watched.add(folder)
+        self.libc.inotify_add_watch(self.fd, os.fsencode(folder), WATCH_EVENTS)
+
+    def wait(self, timeout: float) -> None:
+        """Waiting until timeout or until a watched folder is changed
+
+        Args:
+            timeout (float): Seconds to wait
+        """
+
+        if self.fd < 0:
+            time.sleep(timeout)
+            return
+
+        if select.select([self.fd], [], [], timeout)[0]:
+            # Events are not needed, the folder is scanned again anyway
+            try:
+                while os.read(self.fd, 64 * 1024):
+                    pass
+            except BlockingIOError:
+                pass
+
+    def close(self) -> None:
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class WatchFolder:
+    def __init__(
+        self,
+        obj: smi2ass,
+        watch_dir: str | Path,
+        output_dir: str | Path,
+        jobs: int = 1,
+        settle: float = WATCH_SETTLE,
+        interval: float = WATCH_INTERVAL,
+        max_queue: int | None = None,
+        index_path: str | Path | None = None,
+    ) -> None:
+        """Converting SMI files that are added or changed in the folder,
+        until it is stopped. Files are converted once they stopped changing,
+        by "to_ass().save()" of the converter that is kept loaded. Converted
+        files are recorded in the index of "sync_library", so files are not
+        converted again after restart.
+
+        Args:
+            obj (smi2ass): Converter that is set up with the settings, it has to
+            be picklable when "jobs" is more than 1
+            watch_dir (str | Path): Folder to watch, sub folders are watched
+            as well
+            output_dir (str | Path): Output folder, folder structure is kept
+            jobs (int, optional): Number of files that are converted at once,
+            in the processes when it is more than 1. Defaults to 1.
+            settle (float, optional): Seconds that file has to stay same.
+            Defaults to WATCH_SETTLE.
+            interval (float, optional): Seconds between the scans. Defaults
+            to WATCH_INTERVAL.
+            max_queue (int | None, optional): Number of files waiting for
+            the workers, files that are ready are kept until there is room.
+            Defaults to None, 2 for each job.
+            index_path (str | Path | None, optional): Index file. Defaults to
+            None, INDEX_NAME in the output folder.
+        """
+
+        self.obj: smi2ass = obj
+        self.watch_dir: Path = Path(watch_dir).resolve()
+        self.output_dir: Path = Path(output_dir)
+        self.jobs: int = jobs
+        self.settle: float = settle
+        self.interval: float = interval
+
+        self.index: LibraryIndex = LibraryIndex(
+            index_path or self.output_dir.joinpath(INDEX_NAME)
+        )
+        self.fingerprint: str = settings_fingerprint(obj)
+        self.lock: threading.Lock = threading.Lock()  # Index and statistics
+
+        # Files that are waiting to be stable, path as key and size,
+        # modification time and when it was seen with them as value
+        self.pending: dict[str, tuple[int, int, float]] = {}
+        # Files that are queued or being converted
+        self.working: set[str] = set()
+        # Size and modification time of the files that failed to convert, so
+        # they are only converted again when they are changed
+        self.failed: dict[str, tuple[int, int]] = {}
+        # Ready files, with the output folder, status and when it was queued
+        self.queue: queue.Queue = queue.Queue(
+            maxsize=max_queue if max_queue is not None else jobs * 2
+        )
+
+        # Statistics of this object
+        self.start: float = time.monotonic()
+        self.stats: dict[str, int] = {
+            "converted": 0,
+            "failed": 0,
+            "blocked": 0,  # Ready files that did not fit in the queue
+            "pool_restarts": 0,
+        }
+        # Seconds from queued to saved, and seconds of the conversion only
+        self.latencies: deque = deque(maxlen=WATCH_LATENCY_WINDOW)
+        self.convert_times: deque = deque(maxlen=WATCH_LATENCY_WINDOW)
+
+        # Converted files that are not saved in the index file yet, and when
+        # the index was saved
+        self.unsaved: int = 0
+        self.last_save: float = self.start
+
+        # Process pool of the workers, it is started by "run"
+        self.executor: ProcessPoolExecutor | None = None
+
+    def __create_executor(self) -> ProcessPoolExecutor | None:
+        """Starting process pool with the converter loaded in each process
+
+        Returns:
+            ProcessPoolExecutor | None: Process pool, None when files are
+            converted in the worker threads
+        """
+
+        if self.jobs <= 1:
+            return None
+
+        return ProcessPoolExecutor(
+            max_workers=self.jobs,
+            initializer=init_library_worker,
+            initargs=(self.obj,),
+        )
+
+    def __submit(
+        self, smi_path: str, smi_output_dir: Path
+    ) -> tuple[str, str | None, str, dict[str, str]]:
+        """Converting file in the process pool. When the pool is broken,
+        it is replaced with new pool and the file is converted again, so the
+        other files are not failed by single killed process.
+
+        Args:
+            smi_path (str): SMI file
+            smi_output_dir (Path): Where converted files are saved
+
+        Returns:
+            tuple[str, str | None, str, dict[str, str]]: Same as
+            "library_worker"
+        """
+
+        error: str = ""
+        for _ in range(WATCH_POOL_RETRIES + 1):
+            executor: ProcessPoolExecutor = self.executor  # type: ignore
+            try:
+                return executor.submit(
+                    library_worker, smi_path, str(smi_output_dir)
+                ).result()
+            except BrokenProcessPool as e:
+                error = f"{type(e).__name__}: {e}"
+                with self.lock:
+                    # Other worker may have replaced it already
+                    if self.executor is executor:
+                        executor.shutdown(wait=False)
+                        self.executor = self.__create_executor()
+                        self.stats["pool_restarts"] += 1
+                        print("Process pool is broken, restarting it")
+            except Exception as e:
+                return "", f"{type(e).__name__}: {e}", "", {}
+
+        # Same file broke new pool as well, so it is not tried again until
+        # it is changed
+        return "", error, "", {}
+
+    def scan(self, waker: FolderWaker | None = None) -> float:
+        """Scanning the folder once, and queuing files that stopped changing
+
+        Args:
+            waker (FolderWaker | None, optional): Sub folders are added to
+            it. Defaults to None.
+
+        Returns:
+            float: Seconds until the next pending file could be stable
+        """
+
+        now: float = time.monotonic()
+        found: set[str] = set()
+        next_check: float = self.interval
+
+        for tmp_dir, tmp_dirs, tmp_files in os.walk(self.watch_dir):
+            tmp_dirs.sort()
+            if waker is not None:
+                waker.add(tmp_dir)
+            for tmp_name in sorted(tmp_files):
+                if not tmp_name.lower().endswith(SMI_SUFFIX):
+                    continue
+                smi_path: str = os.path.join(tmp_dir, tmp_name)
+                found.add(smi_path)
+                if smi_path in self.working:
+                    continue
+                try:
+                    tmp_stat: os.stat_result = os.stat(smi_path)
+                except OSError:  # Removed while scanning
+                    continue
+
+                state: tuple[int, int] = (
+                    tmp_stat.st_size,
+                    tmp_stat.st_mtime_ns,
+                )
+                if self.failed.get(smi_path) == state:
+                    continue
+                with self.lock:
+                    flag_current: bool = self.index.is_current(
+                        smi_path, tmp_stat, self.fingerprint
+                    )
+                if flag_current:
+                    self.pending.pop(smi_path, None)
+                    continue
+
+                # File is stable when it is not changed for "settle" seconds
+                seen: tuple[int, int, float] | None = self.pending.get(
+                    smi_path
+                )
+                if seen is None or seen[:2] != state:
+                    self.pending[smi_path] = (*state, now)
+                    next_check = min(next_check, self.settle)
+                    continue
+                if now - seen[2] < self.settle:
+                    next_check = min(next_check, self.settle - now + seen[2])
+                    continue
+
+                try:
+                    self.queue.put_nowait(
+                        (
+                            smi_path,
+                            self.output_dir.joinpath(
+                                os.path.relpath(tmp_dir, self.watch_dir)
+                            ),
+                            tmp_stat,
+                            now,
+                        )
+                    )
+                except queue.Full:
+                    # Workers are busy, it is queued in the next scan
+                    with self.lock:
+                        self.stats["blocked"] += 1
+                    continue
+                del self.pending[smi_path]
+                self.working.add(smi_path)
+
+        # Removed files are not waited anymore
+        for smi_path in list(self.pending.keys()):
+            if smi_path not in found:
+                del self.pending[smi_path]
+
+        return next_check
+
+    def worker(self) -> None:
+        """Converting queued files until None is queued. Files are
+        converted in "executor", or in this thread when it is None.
+        """
+
+        while (item := self.queue.get()) is not None:
+            smi_path, smi_output_dir, tmp_stat, queued = item
+            start: float = time.monotonic()
+            if self.executor is None:
+                try:
+                    sha256, outputs = convert_library_file(
+                        self.obj, smi_path, str(smi_output_dir)
+                    )
+                    error: str | None = None
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"
+            else:
+                msg, error, sha256, outputs = self.__submit(
+                    smi_path, smi_output_dir
+                )
+                print(msg, end="")
+            end: float = time.monotonic()
+
+            with self.lock:
+                if error is None:
+                    self.index.update(
+                        smi_path, tmp_stat, sha256, self.fingerprint, outputs
+                    )
+                    self.unsaved += 1
+                    self.stats["converted"] += 1
+                    self.failed.pop(smi_path, None)
+                else:
+                    print(f"Failed to convert {smi_path}: {error}")
+                    self.stats["failed"] += 1
+                    self.failed[smi_path] = (
+                        tmp_stat.st_size,
+                        tmp_stat.st_mtime_ns,
+                    )
+                self.latencies.append(end - queued)
+                self.convert_times.append(end - start)
+                self.working.discard(smi_path)
+            self.save_index()
+
+    def save_index(self, force: bool = False) -> None:
+        """Saving the index when files are converted after the last save,
+        and WATCH_SAVE_INTERVAL seconds or INDEX_SAVE_INTERVAL files are
+        passed. Failing to save does not stop watching, it is saved again
+        later.
+
+        Args:
+            force (bool, optional): Saving without waiting for the interval.
+            Defaults to False.
+        """
+
+        with self.lock:
+            if self.unsaved == 0:
+                return
+            if (
+                not force
+                and self.unsaved < INDEX_SAVE_INTERVAL
+                and time.monotonic() - self.last_save < WATCH_SAVE_INTERVAL
+            ):
+                return
+            try:
+                self.index.save()
+            except OSError as e:
+                print(f"Failed to save index {self.index.index_path}: {e}")
+                return
+            self.unsaved = 0
+            self.last_save = time.monotonic()
+
+    def metrics(self) -> dict[str, any]:
+        """Composing statistics for monitoring
+
+        Returns:
+            dict[str, any]: JSON serializable statistics, latency is from
+            the file is queued until it is saved
+        """
+
+        with self.lock:
+            return {
+                "uptime_s": round(time.monotonic() - self.start, 3),
+                "queue_depth": self.queue.qsize(),
+                "in_progress": len(self.working) - self.queue.qsize(),
+                "pending": len(self.pending),
+                **self.stats,
+                "latency_ms": latency_summary(self.latencies),
+                "convert_ms": latency_summary(self.convert_times),
+            }
+
+    def run(
+        self,
+        stop: threading.Event | None = None,
+        metrics_path: str | Path | None = None,
+    ) -> None:
+        """Watching the folder until "stop" is set or it is interrupted.
+        Files that are queued are converted before it returns.
+
+        Args:
+            stop (threading.Event | None, optional): Event to stop watching.
+            Defaults to None, watching until KeyboardInterrupt.
+            metrics_path (str | Path | None, optional): File where "metrics"
+            is written as JSON after each scan. Defaults to None.
+        """
+
+        stop = stop or threading.Event()
+        waker: FolderWaker = FolderWaker()
+        self.executor = self.__create_executor()
+        # Single converter is not shared by the threads
+        workers: list[threading.Thread] = [
+            threading.Thread(target=self.worker)
+            for _ in range(self.jobs if self.executor is not None else 1)
+        ]
+        for tmp in workers:
+            tmp.start()
+
+        print(f"Watching... \n{self.watch_dir}")
+        try:
+            while not stop.is_set():
+                next_check: float = self.scan(waker)
+                self.save_index()
+                if metrics_path is not None:
+                    write_metrics(metrics_path, self.metrics())
+                waker.wait(next_check)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for _ in workers:
+                self.queue.put(None)
+            for tmp in workers:
+                tmp.join()
+            if self.executor is not None:
+                self.executor.shutdown()
+            self.save_index(force=True)
+            waker.close()
+            if metrics_path is not None:
+                write_metrics(metrics_path, self.metrics())
+
+
+def latency_summary(values: deque) -> dict[str, float]:
+    """Summarizing recent latencies
+
+    Args:
+        values (deque): Latencies in second
+
+    Returns:
+        dict[str, float]: Last, average, 95th percentile and maximum in
+        millisecond, empty when there is none
+    """
+
+    if len(values) == 0:
+        return {}
+
+    tmp_sorted: list[float] = sorted(values)
+    return {
+        "last": round(values[-1] * 1000, 3),
+        "avg": round(sum(tmp_sorted) / len(tmp_sorted) * 1000, 3),
+        "p95": round(tmp_sorted[int(len(tmp_sorted) * 0.95)] * 1000, 3),
+        "max": round(tmp_sorted[-1] * 1000, 3),
+    }
+
+
+def write_metrics(path: str | Path, metrics: dict[str, any]) -> None:
+    """Writing statistics as JSON, file is replaced at once so monitoring
+    never reads half written file
+
+    Args:
+        path (str | Path): Output file
+        metrics (dict[str, any]): Statistics from "WatchFolder.metrics"
+    """
+
+    tmp_part: Path = Path(f"{path}.{os.getpid()}")
+    with open(tmp_part, "w", encoding="utf-8") as f:
+        json.dump(metrics, f)
+    os.replace(tmp_part, path)
@@ -0,0 +1,70 @@
+"""Default settings that are same as JSON files in "setting" folder. They
+are used when the JSON file is not found, so converter can start without
+reading setting files.
+"""
+
+# Same as "setting/lan_code.json"
+DEFAULT_LAN_CODE: dict[str, str] = {
+    "KRCC": "kor",
+    "KOCC": "kor",
+    "KR": "kor",
+    "KO": "kor",
+    "KOREANSC": "kor",
+    "KRC": "kor",
+    "ENCC": "eng",
+    "EGCC": "eng",
+    "EN": "eng",
+    "EnglishSC": "eng",
+    "ENUSCC": "eng",
+    "ERCC": "eng",
+    "CNCC": "chi",
+    "JPCC": "jpn",
+    "UNKNOWNCC": "und",
+    "UNKNWN": "und",
+    "COMMENTARY": "commentary",
+}
+
+# Same as "setting/ass_styles.json"
+DEFAULT_ASS_STYLES: dict[str, any] = {
+    "ScriptInfo": {
+        "Head": "[Script Info]",
+        "msg": [
+            ";This is an Advanced Sub Station Alpha v4+ script.",
+            ";Converted by smi2ass",
+        ],
+        "Title": "0",
+        "ScriptType": "v4.00+",
+        "ScaledBorderAndShadow": "Yes",
+        "Collisions": "Normal",
+        "PlayDepth": 0,
+        "PlayResX": 1920,
+        "PlayResY": 1080,
+        "Timer": 100.0,
+    },
+    "style": {
+        "Head": "[V4+ Styles]",
+        "Name": "Default",
+        "Fontname": "Malgun Gothic",
+        "Fontsize": 64,
+        "PrimaryColour": "&H00FFFFFF",
+        "SecondaryColour": "&H0000FFFF",
+        "OutlineColour": "&H00000000",
+        "BackColour": "&H00000000",
+        "Bold": 0,
+        "Italic": 0,
+        "Underline": 0,
+        "StrikeOut": 0,
+        "ScaleX": 100,
+        "ScaleY": 100,
+        "Spacing": 0,
+        "Angle": 0,
+        "BorderStyle": 1,
+        "Outline": 1,
+        "Shadow": 0,
+        "Alignment": 2,
+        "MarginL": 12,
+        "MarginR": 12,
+        "MarginV": 30,
+        "Encoding": 1,
+    },
+}
@@ -0,0 +1,478 @@
+# Python built in modules
+import re
+from html import unescape
+from html.entities import html5
+from typing import Iterator
+
+
+# Tags that can be appeared inside of <SYNC> block. When tokenizer founds any
+# other tag inside of the block, it gives up and let BeautifulSoup to parse.
+INLINE_TAGS: frozenset[str] = frozenset(
+    ["p", "br", "b", "i", "u", "s", "rt", "rp", "ruby", "font"]
+)
+
+# Text inside of these tags are not shown by BeautifulSoup's ".text"
+HIDDEN_TEXT_TAGS: frozenset[str] = frozenset(["rt", "rp"])
+
+# Tags that html.parser (and BeautifulSoup) closes right after it is opened
+VOID_TAGS: frozenset[str] = frozenset(
+    [
+        "area", "base", "basefont", "bgsound", "br", "col", "command",
+        "embed", "frame", "hr", "image", "img", "input", "isindex", "keygen",
+        "link", "menuitem", "meta", "nextid", "param", "source", "spacer",
+        "track", "wbr",
+    ]
+)  # fmt: skip
+
+# If <SYNC> is opened inside of these tags, text is handled differently by
+# BeautifulSoup. Those are too rare in the SMI, so just fall back.
+UNSAFE_PARENT_TAGS: frozenset[str] = frozenset(
+    ["pre", "textarea", "rt", "rp", "template", "style", "script"]
+)
+
+# Tags that hold raw text (no tag inside)
+CDATA_TAGS: frozenset[str] = frozenset(["style", "script"])
+
+# ASCII white spaces, BeautifulSoup collapses text with only these characters
+ASCII_SPACES: str = "\x20\x0a\x09\x0c\x0d"
+
+# Regular expressions, these are same with python's html.parser, so the
+# tokenizer founds same tags and attributes with BeautifulSoup's html.parser
+interesting: re.Pattern = re.compile(r"[&<]")
+entityref: re.Pattern = re.compile(r"&([a-zA-Z][-.a-zA-Z0-9]*)[^a-zA-Z0-9]")
+charref: re.Pattern = re.compile(r"&#(?:[0-9]+|[xX][0-9a-fA-F]+)[^0-9a-fA-F]")
+commentclose: re.Pattern = re.compile(r"--\s*>")
+tagfind_tolerant: re.Pattern = re.compile(
+    r"([a-zA-Z][^\t\n\r\f />\x00]*)(?:\s|/(?!>))*"
+)
+attrfind_tolerant: re.Pattern = re.compile(
+    r"((?<=[\'\"\s/])[^\s/>][^\s/=>]*)(\s*=+\s*"
+    r"(\'[^\']*\'|\"[^\"]*\"|(?![\'\"])[^>\s]*))?(?:\s|/(?!>))*"
+)
+locatestarttagend_tolerant: re.Pattern = re.compile(
+    r"""
+  <[a-zA-Z][^\t\n\r\f />\x00]*       # tag name
+  (?:[\s/]*                          # optional whitespace before attribute name
+    (?:(?<=['"\s/])[^\s/>][^\s/=>]*  # attribute name
+      (?:\s*=+\s*                    # value indicator
+        (?:'[^']*'                   # LITA-enclosed value
+          |"[^"]*"                   # LIT-enclosed value
+          |(?!['"])[^>\s]*           # bare value
+         )
+        \s*                          # possibly followed by a space
+       )?(?:\s|/(?!>))*
+     )*
+   )?
+  \s*                                # trailing whitespace
+""",
+    re.VERBOSE,
+)
+endtagfind: re.Pattern = re.compile(r"</\s*([a-zA-Z][-.a-zA-Z0-9:_]*)\s*>")
+nonwhitespace: re.Pattern = re.compile(r"\S+")
+
+
+class SamiSyntaxError(ValueError):
+    """Raised when SMI has markup that tokenizer is not handling. In that case
+    the whole document should be parsed by BeautifulSoup.
+    """
+
+
+class SmiTag:
+    """Light weight tag of the SMI. It only keeps what smi2ass needs, and
+    names are following BeautifulSoup's Tag, so both can be used in same way.
+    """
+
+    __slots__ = ("name", "attrs", "contents")
+
+    def __init__(self, name: str, attrs: dict[str, any]) -> None:
+        self.name: str = name
+        self.attrs: dict[str, any] = attrs
+        # Child tags and text (str) in order of the document
+        self.contents: list[SmiTag | str] = []
+
+    def __getitem__(self, key: str) -> any:
+        return self.attrs[key]
+
+    def find(self, name: str) -> "SmiTag | None":
+        """Find first tag that matching name in the document order
+
+        Args:
+            name (str): Tag name in lower case
+
+        Returns:
+            SmiTag | None: Found tag, None when there is no matching tag
+        """
+
+        for tmp in self.contents:
+            if isinstance(tmp, SmiTag):
+                if tmp.name == name:
+                    return tmp
+                found: SmiTag | None = tmp.find(name)
+                if found is not None:
+                    return found
+
+        return None
+
+
+class SyncBlock(SmiTag):
+    """<SYNC> tag, it remembers where it is located in the source, so it can
+    be printed when there is error.
+    """
+
+    __slots__ = ("source", "pos", "endpos")
+
+    def __init__(self, attrs: dict[str, any], source: str, pos: int) -> None:
+        super().__init__("sync", attrs)
+        self.source: str = source
+        self.pos: int = pos
+        self.endpos: int = pos
+
+    def __str__(self) -> str:
+        return self.source[self.pos : self.endpos]
+
+
+class TokenizerState:
+    """State of the tokenizer that is carried from one <SYNC> block to the
+    next. It lets a part of the document to be tokenized separately, starting
+    from the state where previous part ended.
+    """
+
+    __slots__ = ("stack", "void_closed", "void_missed", "flag_block_open")
+
+    def __init__(self, stack: list[str] | None = None) -> None:
+        # Open tags outside of <SYNC> block, e.g. ["sami", "body"]
+        self.stack: list[str] = list(stack or [])
+        # Void tags that are closed by itself, their end tags are ignored
+        self.void_closed: dict[str, int] = {}
+        # End tags of void tags that are found when "void_closed" had none of
+        # them. Those would be ignored if earlier part had the void tags.
+        self.void_missed: dict[str, int] = {}
+        # Flag <SYNC> block was still open at the end of the document
+        self.flag_block_open: bool = False
+
+
+def iter_sync_blocks(
+    sgml: str, state: TokenizerState | None = None
+) -> Iterator[SyncBlock]:
+    """Tokenizing SMI and yields <SYNC> blocks one by one in single pass.
+    It is producing same tree with BeautifulSoup's html.parser for the tags
+    that are used in SMI subtitle (p, br, b, i, u, s, rt, font).
+
+    Args:
+        sgml (str): SMI document that already has </sync> before each <sync>
+        state (TokenizerState | None, optional): State to start from, it is
+        updated while tokenizing, so it holds the state at the end of the
+        document once all blocks are yielded. Defaults to None.
+
+    Raises:
+        SamiSyntaxError: Document has markup that is not handled by the
+        tokenizer.
+
+    Yields:
+        Iterator[SyncBlock]: Parsed <SYNC> block
+    """
+
+    if state is None:
+        state = TokenizerState()
+
+    n: int = len(sgml)
+    pos: int = 0
+
+    # Open tags in the whole document, nodes are only exist inside of block
+    stack: list[str] = state.stack
+    nodes: list[SmiTag] = []
+    block: SyncBlock | None = None
+    block_depth: int = 0  # Position of <SYNC> in the stack
+    hidden_depth: int = 0  # Number of open <rt> and <rp> in the block
+
+    data: list[str] = []  # Text that is not added to the tree yet
+    void_closed: dict[str, int] = state.void_closed
+
+    def end_data() -> None:
+        if not data:
+            return
+        text: str = "".join(data)
+        data.clear()
+        if hidden_depth:
+            return
+        # BeautifulSoup replaces text with only white spaces to one character
+        if not text.strip(ASCII_SPACES):
+            text = "\n" if "\n" in text else " "
+        nodes[-1].contents.append(text)
+
+    while pos < n:
+        # Text
+        if block is None:
+            nxt: int = sgml.find("<", pos)
+            if nxt < 0:
+                nxt = n
+            check_charref(sgml, pos, nxt)
+            pos = nxt
+        else:
+            match = interesting.search(sgml, pos)
+            nxt = match.start() if match else n
+            if pos < nxt:
+                data.append(sgml[pos:nxt])
+            pos = nxt
+            if pos < n and sgml[pos] == "&":
+                pos = read_reference(sgml, pos, data)
+                continue
+
+        if pos >= n:
+            break
+
+        # Markup
+        if pos + 1 >= n:
+            raise SamiSyntaxError(f"Unexpected end of document at {pos}")
+        next_char: str = sgml[pos + 1]
+
+        if next_char.isascii() and next_char.isalpha():  # Start tag
+            endpos: int = find_starttag_end(sgml, pos)
+            match = tagfind_tolerant.match(sgml, pos + 1)
+            name: str = match.group(1).lower()
+            attrs: dict[str, any]
+            self_closing: bool
+            attrs, self_closing = read_attrs(sgml, match.end(), endpos)
+
+            end_data()
+            if name == "sync":
+                if block is not None:
+                    raise SamiSyntaxError(f"Nested <sync> at {pos}")
+                if UNSAFE_PARENT_TAGS.intersection(stack):
+                    raise SamiSyntaxError(f"<sync> in unsafe tag at {pos}")
+                block = SyncBlock(attrs, sgml, pos)
+                if self_closing:
+                    # <sync/> is opened and closed right away
+                    block.endpos = endpos
+                    yield block
+                    block = None
+                else:
+                    block_depth = len(stack)
+                    stack.append(name)
+                    nodes.append(block)
+            elif block is not None:
+                if name not in INLINE_TAGS:
+                    raise SamiSyntaxError(f"Unexpected <{name}> at {pos}")
+                tag: SmiTag = SmiTag(name, attrs)
+                nodes[-1].contents.append(tag)
+                if self_closing:
+                    pass
+                elif name in VOID_TAGS:
+                    void_closed[name] = void_closed.get(name, 0) + 1
+                else:
+                    stack.append(name)
+                    nodes.append(tag)
+                    if name in HIDDEN_TEXT_TAGS:
+                        hidden_depth += 1
+            elif self_closing:
+                pass
+            elif name in VOID_TAGS:
+                void_closed[name] = void_closed.get(name, 0) + 1
+            else:
+                stack.append(name)
+                if name in CDATA_TAGS:
+                    # Skip raw text until the closing tag
+                    match = re.compile(rf"</\s*{name}\s*>", re.I).search(
+                        sgml, endpos
+                    )
+                    if match is None:
+                        raise SamiSyntaxError(f"<{name}> is not closed")
+                    endpos = match.start()
+            pos = endpos
+
+        elif next_char == "/":  # End tag
+            match = endtagfind.match(sgml, pos)
+            if match is None:
+                raise SamiSyntaxError(f"Malformed end tag at {pos}")
+            name = match.group(1).lower()
+
+            if void_closed.get(name):
+                # End tag of void tag, html.parser ignores it silently
+                void_closed[name] -= 1
+                pos = match.end()
+                continue
+            if name in VOID_TAGS:
+                state.void_missed[name] = state.void_missed.get(name, 0) + 1
+
+            end_data()
+            if name in stack:
+                # Closing the most recent tag with same name and all tags
+                # that are opened after it
+                idx: int = len(stack) - 1 - stack[::-1].index(name)
+                if block is not None and idx <= block_depth:
+                    block.endpos = pos
+                    yield block
+                    block = None
+                    hidden_depth = 0
+                    del nodes[:]
+                elif block is not None:
+                    for tmp in nodes[idx - block_depth :]:
+                        if tmp.name in HIDDEN_TEXT_TAGS:
+                            hidden_depth -= 1
+                    del nodes[idx - block_depth :]
+                del stack[idx:]
+            pos = match.end()
+
+        elif sgml.startswith("<!--", pos):  # Comment
+            match = commentclose.search(sgml, pos + 4)
+            if match is None:
+                raise SamiSyntaxError(f"Comment is not closed at {pos}")
+            end_data()
+            pos = match.end()
+
+        elif next_char in "!?":  # Declaration, processing instruction
+            if sgml.startswith("<![", pos):
+                raise SamiSyntaxError(f"Marked section at {pos}")
+            endpos = sgml.find(">", pos + 2)
+            if endpos < 0:
+                raise SamiSyntaxError(f"Declaration is not closed at {pos}")
+            end_data()
+            pos = endpos + 1
+
+        else:  # "<" is just a text
+            if block is not None:
+                data.append("<")
+            pos += 1
+
+    if block is not None:
+        state.flag_block_open = True
+        end_data()
+        block.endpos = n
+        yield block
+
+
+def check_charref(sgml: str, pos: int, endpos: int) -> None:
+    """html.parser gives up parsing rest of document as text when it founds
+    broken numeric character reference more than once. Thus, tokenizer just
+    does not try such a document.
+
+    Args:
+        sgml (str): SMI document
+        pos (int): Start of the text
+        endpos (int): End of the text
+
+    Raises:
+        SamiSyntaxError: Broken numeric character reference found
+    """
+
+    idx: int = sgml.find("&#", pos, endpos)
+    while idx >= 0:
+        if charref.match(sgml, idx) is None:
+            raise SamiSyntaxError(f"Broken character reference at {idx}")
+        idx = sgml.find("&#", idx + 2, endpos)
+
+
+def read_reference(sgml: str, pos: int, data: list[str]) -> int:
+    """Converting character reference (e.g. &nbsp; &#160;) to the character
+
+    Args:
+        sgml (str): SMI document
+        pos (int): Position of "&"
+        data (list[str]): Text buffer to add converted character
+
+    Raises:
+        SamiSyntaxError: Reference that html.parser handles differently
+
+    Returns:
+        int: Position after the reference
+    """
+
+    if sgml.startswith("&#", pos):
+        match = charref.match(sgml, pos)
+        if match is None:
+            raise SamiSyntaxError(f"Broken character reference at {pos}")
+        name: str = match.group()[2:-1]
+        code: int = int(name[1:], 16) if name[0] in "xX" else int(name, 10)
+        if 0x80 <= code <= 0x9F:
+            # BeautifulSoup maps these with windows-1252 table
+            raise SamiSyntaxError(f"Control character reference at {pos}")
+        if code == 0 or code > 0x10FFFF or 0xD800 <= code <= 0xDFFF:
+            data.append("�")
+        else:
+            data.append(chr(code))
+    else:
+        match = entityref.match(sgml, pos)
+        if match is None:
+            if (
+                pos + 1 < len(sgml)
+                and sgml[pos + 1].isascii()
+                and (sgml[pos + 1].isalpha())
+            ):
+                # Reference is cut at the end of the document
+                raise SamiSyntaxError(f"Incomplete reference at {pos}")
+            data.append("&")
+            return pos + 1
+        name = match.group(1)
+        data.append(html5.get(name + ";", "&" + name))
+
+    # ";" is part of reference, other characters are not
+    endpos: int = match.end()
+    return endpos if sgml[endpos - 1] == ";" else endpos - 1
+
+
+def find_starttag_end(sgml: str, pos: int) -> int:
+    """Finding where the start tag is ending. It is following html.parser
+
+    Args:
+        sgml (str): SMI document
+        pos (int): Position of "<"
+
+    Raises:
+        SamiSyntaxError: Tag is not closed correctly
+
+    Returns:
+        int: Position after the ">"
+    """
+
+    endpos: int = locatestarttagend_tolerant.match(sgml, pos).end()
+    if sgml.startswith(">", endpos):
+        return endpos + 1
+    if sgml.startswith("/>", endpos):
+        return endpos + 2
+    raise SamiSyntaxError(f"Malformed start tag at {pos}")
+
+
+def read_attrs(
+    sgml: str, pos: int, endpos: int
+) -> tuple[dict[str, any], bool]:
+    """Reading attributes of the start tag in same way with html.parser and
+    BeautifulSoup.
+
+    Args:
+        sgml (str): SMI document
+        pos (int): Position after tag name
+        endpos (int): Position after the ">"
+
+    Raises:
+        SamiSyntaxError: Tag has text that is not attribute
+
+    Returns:
+        tuple[dict[str, any], bool]: Attributes and flag for self closing tag
+        (e.g. <br/>). "class" attribute is split in to the list.
+    """
+
+    attrs: dict[str, any] = {}
+    while pos < endpos:
+        match = attrfind_tolerant.match(sgml, pos)
+        if not match:
+            break
+        attr_name, rest, attr_value = match.group(1, 2, 3)
+        if not rest:
+            attr_value = ""
+        elif attr_value[:1] == "'" == attr_value[-1:] or (
+            attr_value[:1] == '"' == attr_value[-1:]
+        ):
+            attr_value = attr_value[1:-1]
+        if attr_value:
+            attr_value = unescape(attr_value)
+        attrs[attr_name.lower()] = attr_value
+        pos = match.end()
+
+    end: str = sgml[pos:endpos].strip()
+    if end not in (">", "/>"):
+        raise SamiSyntaxError(f"Malformed attribute at {pos}")
+
+    if "class" in attrs:
+        attrs["class"] = nonwhitespace.findall(attrs["class"])
+
+    return attrs, end == "/>"
@@ -1,50 +1,1369 @@
 # Python built in modules
+import contextlib
+import gc
+import io
+import mmap
+import os
 import re
-from typing import Self
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    ContextManager,
+    Iterable,
+    BinaryIO,
+    Iterator,
+    Mapping,
+    NamedTuple,
+    Self,
+    TextIO,
+)
 from collections import defaultdict
-from operator import itemgetter
+from functools import partial
+from operator import attrgetter
 from pathlib import Path
+from types import MappingProxyType
 import html
 
-# PIP installed modules
-import chardet
-from bs4 import BeautifulSoup as bs
-from bs4 import ResultSet
+# PIP installed modules, BeautifulSoup is slow to import so it is imported
+# by "load_bs4" only when it is used
+if TYPE_CHECKING:
+    from bs4 import ResultSet, Tag
+
+    # Cache is only imported when it is set
+    from conv_cache import ConversionCache
 
 # Custom modules
-from ass_settings import AssStyle
+from ass_settings import AssStyle, override_style
+from sami_tokenizer import (
+    SamiSyntaxError,
+    SmiTag,
+    SyncBlock,
+    TokenizerState,
+    iter_sync_blocks,
+)
+from smi_diagnostics import Diagnostics
+from smi_encoding import (
+    LEGACY_ENCODINGS,
+    decode_smi,
+    detect_encoding,
+    normalize_newlines,
+)
+from smi_index import SyncIndex, build_sync_index, map_smi
+from sub_formats import (
+    FORMAT_EMITTERS,
+    MARKUP_BREAK,
+    MARKUP_MARK,
+    MARKUP_TAGS,
+    SubtitleEmitter,
+    markup_font,
+    markup_font_close,
+)
+
+# Version of the converter, it is part of the cache key. It has to be
+# increased whenever converted output is changed.
+__version__: str = "1.5.1"
+
+# Parser engines that can be used to parse SMI
+PARSER_ENGINES: tuple[str, ...] = ("sami", "bs4")
+
+# Patterns to rewrite SMI before it is parsed, they are combined to one
+# pattern so the document is scanned once. Spaces that are right after or
+# before a tag becomes single place holder "smi2ass_unicode(32)". Every
+# alternative starts with "<" or space, the lookahead lets the engine skip
+# other characters without trying each alternative.
+SMI_NORMALIZE: re.Pattern = re.compile(
+    r"(?=[ <])(?:"
+    # Remove </sync>, it is added again right before <sync>
+    r"(?P<sync_close></ *[Ss][Yy][Nn][Cc] *>)"
+    # Add </sync> right before <sync>
+    r"|(?P<sync_open>< *[Ss][Yy][Nn][Cc] +(?![ <]))"
+    # Malformed font tags, < ="font name">
+    r'|(?P<font>< ="(?P<face>[^"]*)")'
+    # No place holder for the spaces inside of <rt>
+    r"|(?P<rt_open>< *[Rr][Tt] *>) +"
+    r"| +(?P<rt_close></ *[Rr][Tt] *>)"
+    # Spaces around a tag
+    r"|(?<=>) +| +(?=<)"
+    r")"
+)
+
+# Where SMI is split to convert in multiple processes, see "set_shards"
+SHARD_BOUNDARY: str = "</sync><sync "
+# Smaller SMI is not split, starting the processes takes longer than that
+SHARD_MIN_SIZE: int = 1024 * 1024
+
+# Size of the part that is decoded and parsed at once by "set_lazy", in
+# bytes. <SYNC> blocks are grouped up to this size.
+LAZY_PART_SIZE: int = 64 * 1024
+
+# Number of blocks that are read at least after the time window, when a
+# language in the window has no line after it yet
+WINDOW_EXTEND_BLOCKS: int = 64
+
+# Buffer size of the writer that saves ASS file, in bytes
+WRITE_BUFFER_SIZE: int = 256 * 1024
+
+# Number of threads that save the files of one SMI at once
+SAVE_WORKERS: int = 4
+
+# Encoding of "convert_text" input, since it is not decoded by smi2ass
+TEXT_ENCODING: str = "str"
+
+# Types of the text that is shown in the subtitle. NavigableString is added
+# when BeautifulSoup is loaded, and its subclasses (comments and ruby text)
+# are not shown.
+TEXT_TYPES: set[type] = {str}
+
+# Hex color code in font color
+HEX_COLOR: re.Pattern = re.compile("[0-9a-fA-F]{6}")
+
+
+class SmiEvent(NamedTuple):
+    """One <SYNC> block of a language. Only start time and converted text are
+    kept, so parse tree can be released after the block is converted.
+    """
+
+    start: int  # Start time in millisecond
+    text: str  # Converted text in the markup of "sub_formats"
+
+
+class ConversionResult(NamedTuple):
+    """Converted subtitle of one SMI file, it is not changed after it is made
+    by "convert". Dialogue lines are only composed when they are asked, so
+    lines of large subtitle don't have to be kept. Events keep the time code
+    of SMI, time offset is only added when lines are composed.
+    """
+
+    # ASS header that was composed from the style
+    header: str
+    # Events of each language, the language code in ASS is used as key
+    events: Mapping[str, tuple[SmiEvent, ...]]
+    # Encoding of SMI file and which detection tier found it
+    encoding: str
+    encoding_tier: str
+    # Time in millisecond to add on subtitle
+    offset: int = 0
+
+    @property
+    def languages(self) -> list[str]:
+        return list(self.events.keys())
+
+    def variant(self, header: str, offset: int) -> "ConversionResult":
+        """Same subtitle with other ASS header and time offset. Events are
+        shared, so it only costs composing the lines.
+
+        Args:
+            header (str): ASS style header
+            offset (int): Time in millisecond to add on subtitle
+
+        Returns:
+            ConversionResult: Subtitle of the variant
+        """
+
+        return self._replace(header=header, offset=offset)
+
+    def iter_lines(self, lang: str, fmt: str = "ass") -> Iterator[str]:
+        """Composing lines of one language, composed lines are yielded one
+        by one so they can be written while converting. Time offset is added
+        and time stamps are formatted here, lines that start at 0 or before 0
+        with the offset are dropped, same as the lines at 0 without it.
+
+        Args:
+            lang (str): Language code in ASS
+            fmt (str, optional): Subtitle format in FORMAT_EMITTERS. Defaults
+            to "ass".
+
+        Yields:
+            Iterator[str]: Header and then each line, e.g. ASS style header
+            and Dialogue lines
+        """
+
+        emitter: SubtitleEmitter = FORMAT_EMITTERS[fmt]
+
+        # First item is the header
+        yield emitter.compose_header(self.header, self.events[lang])
+
+        tmp_iter: Iterator[SmiEvent] = iter(self.events[lang])
+        if self.offset != 0:
+            tmp_iter = (
+                SmiEvent(tmp.start + self.offset, tmp.text)
+                for tmp in self.events[lang]
+                if tmp.start + self.offset > 0
+            )
+
+        # End time of the line is start time of the next line, so one line is
+        # looked ahead
+        tmp_line: SmiEvent | None = next(tmp_iter, None)
+        line_count: int = 0
+        while tmp_line is not None:
+            tmp_next: SmiEvent | None = next(tmp_iter, None)
+
+            # Only add converted line when there is content
+            if len(tmp_line.text.strip()) != 0:
+                if tmp_next is not None:
+                    track_end: int = tmp_next.start  # End time of subtitles
+                else:
+                    """
+                    Due to how the SMI subtitle is structure, there isn't
+                    indication for end time for the line. Thus, adding 1s to
+                    the last time code, os it cant convert without error
+                    """
+                    track_end: int = tmp_line.start + 1000
+
+                tmp_text: str = emitter.compose_line(
+                    line_count + 1, tmp_line.start, track_end, tmp_line.text
+                )
+                if tmp_text != "":
+                    line_count += 1
+                    yield tmp_text
+
+            tmp_line = tmp_next
+
+    def ass_lines(self) -> dict[str, list[str]]:
+        """Composing lines of all languages
+
+        Returns:
+            dict[str, list[str]]: Language code as key and lines of ASS
+            subtitle as value
+        """
+
+        return {key: list(self.iter_lines(key)) for key in self.events}
+
+    def to_strings(self, fmt: str = "ass") -> dict[str, str]:
+        """Composing subtitle of all languages
+
+        Args:
+            fmt (str, optional): Subtitle format in FORMAT_EMITTERS. Defaults
+            to "ass".
+
+        Returns:
+            dict[str, str]: Language code as key and subtitle as value
+        """
+
+        return {key: "".join(self.iter_lines(key, fmt)) for key in self.events}
+
+    def to_bytes(self, encoding: str = "utf-8") -> dict[str, bytes]:
+        """Composing encoded ASS subtitle of all languages
+
+        Args:
+            encoding (str, optional): Encoding of ASS subtitle. Defaults to
+            "utf-8".
+
+        Returns:
+            dict[str, bytes]: Language code as key and ASS subtitle as value
+        """
+
+        return {
+            key: "".join(self.iter_lines(key)).encode(encoding)
+            for key in self.events
+        }
+
+    def write(
+        self,
+        stream: BinaryIO | TextIO,
+        lang: str,
+        encoding: str = "utf-8",
+        fmt: str = "ass",
+    ) -> None:
+        """Writing subtitle of one language into the stream, lines are
+        composed while they are written
+
+        Args:
+            stream (BinaryIO | TextIO): Text or binary stream to write
+            lang (str): Language code in ASS
+            encoding (str, optional): Encoding of the subtitle, when stream
+            is binary. Defaults to "utf-8".
+            fmt (str, optional): Subtitle format in FORMAT_EMITTERS. Defaults
+            to "ass".
+        """
+
+        write_lines(stream, self.iter_lines(lang, fmt), encoding)
+
+
+class RenderVariant(NamedTuple):
+    """Other rendering of the subtitle from the same parsed SMI"""
+
+    name: str  # Added to the file name, e.g. "test.NAME.ass"
+    style: dict[str, any]  # Style overrides, see "override_style"
+    offset: int | None  # Time offset, None to use the one of the converter
+
+
+class SmiConverter:
+    def __init__(
+        self,
+        style: AssStyle,
+        offset: int = 0,
+        parser: str = "sami",
+        legacy_encodings: list[str] | None = None,
+        shards: int = 1,
+        shard_min_size: int = SHARD_MIN_SIZE,
+        lazy: bool = False,
+        time_from: int = 0,
+        time_to: int | None = None,
+        rebase: bool = False,
+        stage_hook: Callable[[str], ContextManager] | None = None,
+        counter_hook: Callable[[str, int], None] | None = None,
+        diagnostics: Diagnostics | None = None,
+        quiet: bool = False,
+    ) -> None:
+        """Converter of one SMI file, it is made by "convert" for each call.
+        It only reads settings from the style, so same style can be shared by
+        converters in many threads.
+
+        Args:
+            style (AssStyle): Style and language codes to use
+            offset (int, optional): Time in millisecond to add on subtitle.
+            Defaults to 0.
+            parser (str, optional): Parser engine, "sami" or "bs4". Defaults
+            to "sami".
+            legacy_encodings (list[str] | None, optional): Encodings that are
+            tried before chardet is used. Defaults to None, "LEGACY_ENCODINGS".
+            shards (int, optional): Number of processes to convert large SMI.
+            Defaults to 1.
+            shard_min_size (int, optional): SMI smaller than this, in
+            characters, is not split. Defaults to SHARD_MIN_SIZE.
+            lazy (bool, optional): Decoding and parsing <SYNC> blocks one by
+            one, see "smi2ass.set_lazy". Defaults to False.
+            time_from (int, optional): Start of the time window in
+            millisecond, see "smi2ass.set_window". Defaults to 0.
+            time_to (int | None, optional): End of the time window in
+            millisecond. Defaults to None, until the end.
+            rebase (bool, optional): Moving the window start to 0. Defaults
+            to False.
+            stage_hook (Callable[[str], ContextManager] | None, optional): See
+            "smi2ass.set_stage_hook". Defaults to None.
+            counter_hook (Callable[[str, int], None] | None, optional): See
+            "smi2ass.set_counter_hook". Defaults to None.
+            diagnostics (Diagnostics | None, optional): Collector of the
+            warnings, e.g. <SYNC> without language class. Defaults to None,
+            new one is made.
+            quiet (bool, optional): Not printing summary of the warnings.
+            Defaults to False.
+
+        Raises:
+            ValueError: Time window is empty or starts before 0
+        """
+
+        if time_from < 0 or (time_to is not None and time_to <= time_from):
+            raise ValueError(f"Bad time window: {time_from} to {time_to}")
+
+        self.style: AssStyle = style
+        self.time_offset: int = offset
+        self.parser: str = parser
+        self.legacy_encodings: list[str] = (
+            list(LEGACY_ENCODINGS)
+            if legacy_encodings is None
+            else list(legacy_encodings)
+        )
+        self.shard_jobs: int = shards
+        self.shard_min_size: int = shard_min_size
+        self.flag_lazy: bool = lazy
+        self.time_from: int = time_from
+        self.time_to: int | None = time_to
+        self.flag_rebase: bool = rebase
+        # Flag only part of the subtitle is converted
+        self.flag_window: bool = time_from > 0 or time_to is not None
+        self.stage_hook: Callable[[str], ContextManager] | None = stage_hook
+        self.counter_hook: Callable[[str, int], None] | None = counter_hook
+        self.diagnostics: Diagnostics = (
+            Diagnostics() if diagnostics is None else diagnostics
+        )
+        self.flag_quiet: bool = quiet
+
+        self.smi_sgml: str = ""
+        # Where the blocks that are converted by "convert_blocks" are located
+        # in normalized SMI, None when it is not known
+        self.source_base: int | None = 0
+        # Converted font colors, SMI color as key and BGR color as value
+        self.color_cache: dict[str, str | None] = {}
+        # Number of converted font tags, it is reported by "__time_lan"
+        self.font_tag_count: int = 0
+
+    def __stage(self, name: str) -> ContextManager:
+        """Wrapping a stage of the conversion with "stage_hook"
+
+        Args:
+            name (str): Name of the stage
+
+        Returns:
+            ContextManager: Context manager from the hook, or one that does
+            nothing when hook is not set
+        """
+
+        if self.stage_hook is None:
+            return contextlib.nullcontext()
+        return self.stage_hook(name)
+
+    def __count(self, name: str, value: int) -> None:
+        """Reporting counter to "counter_hook"
+
+        Args:
+            name (str): Name of the counter
+            value (int): Value to add on the counter
+        """
+
+        if self.counter_hook is not None:
+            self.counter_hook(name, value)
+
+    def read(self, smi_path: str | Path) -> bytes:
+        """Reading SMI file
+
+        Args:
+            smi_path (str | Path): SMI file path
+
+        Raises:
+            IOError: Neither file is not exist or cannot access file
+
+        Returns:
+            bytes: Content of SMI file
+        """
+
+        try:
+            with self.__stage("read"), open(smi_path, "rb") as f:
+                return f.read()
+        except IOError as e:
+            raise IOError(f"Failed to open the file {smi_path}: {e}")
+
+    def run(
+        self, smi_raw: "bytes | bytearray | memoryview | mmap.mmap"
+    ) -> ConversionResult:
+        """Decoding and parsing SMI file, and separating out lines of each
+        language
+
+        Args:
+            smi_raw (bytes | bytearray | memoryview | mmap.mmap): Content of
+            SMI file
+
+        Returns:
+            ConversionResult: Converted subtitle
+        """
+
+        # Time window is found from <SYNC> tags in the bytes as well
+        if (self.flag_lazy or self.flag_window) and self.parser == "sami":
+            result: ConversionResult | None = self.__run_lazy(smi_raw)
+            if result is not None:
+                return result
+
+        # Identify encoding of the file and decode it
+        with self.__stage("decode"):
+            smi_sgml, encoding, encoding_tier = decode_smi(
+                smi_raw, self.legacy_encodings
+            )
+
+        return self.run_text(smi_sgml, encoding, encoding_tier)
+
+    def run_text(
+        self,
+        smi_sgml: str,
+        encoding: str = TEXT_ENCODING,
+        encoding_tier: str = TEXT_ENCODING,
+    ) -> ConversionResult:
+        """Parsing decoded SMI, and separating out lines of each language
+
+        Args:
+            smi_sgml (str): Decoded SMI
+            encoding (str, optional): Encoding of SMI file, it is only
+            reported in the result. Defaults to TEXT_ENCODING.
+            encoding_tier (str, optional): Which detection tier found the
+            encoding. Defaults to TEXT_ENCODING.
+
+        Returns:
+            ConversionResult: Converted subtitle
+        """
+
+        self.smi_sgml = normalize_newlines(smi_sgml)
+
+        # Preprocess raw string before parse SMI lines
+        with self.__stage("normalize"):
+            self.__normalize()
+
+        self.font_tag_count = 0
+        self.source_base = 0
+
+        # Large SMI can be split and converted in multiple processes
+        events: Iterable[tuple[str, int, str | None]] | None = None
+        if (
+            self.shard_jobs > 1
+            and self.parser == "sami"
+            and len(self.smi_sgml) >= self.shard_min_size
+        ):
+            with self.__stage("parse"), gc_paused():
+                events = self.__parse_shards()
+
+        if events is None:
+            # Parse SMI with selected parser engine
+            with self.__stage("parse"), gc_paused():
+                sync_blocks: "ResultSet | list[SmiTag]" = self.__parse()
+            self.__count("sync_blocks", len(sync_blocks))
+            # Blocks are released while they are converted
+            with self.__stage("convert"):
+                events = list(self.convert_blocks(sync_blocks))
+
+        # Only events are needed from now, release SMI
+        self.smi_sgml = ""
+
+        # Get timecode for each lines and septate out subtitle in each language
+        with self.__stage("time_lan"):
+            smi_lines: dict[str, list[SmiEvent]] = self.__time_lan(events)
+
+        return self.__result(smi_lines, encoding, encoding_tier)
+
+    def __result(
+        self,
+        smi_lines: dict[str, list[SmiEvent]],
+        encoding: str,
+        encoding_tier: str,
+    ) -> ConversionResult:
+        """Making immutable result from separated lines
+
+        Args:
+            smi_lines (dict[str, list[SmiEvent]]): Lines of each language
+            encoding (str): Encoding of SMI file
+            encoding_tier (str): Which detection tier found the encoding
+
+        Returns:
+            ConversionResult: Converted subtitle
+        """
+
+        if len(self.diagnostics) > 0 and not self.flag_quiet:
+            print(self.diagnostics.summary())
+
+        return ConversionResult(
+            self.style.ass_header(),
+            MappingProxyType(
+                {key: tuple(value) for key, value in smi_lines.items()}
+            ),
+            encoding,
+            encoding_tier,
+            self.time_offset,
+        )
+
+    def __run_lazy(
+        self, smi_raw: "bytes | bytearray | memoryview | mmap.mmap"
+    ) -> ConversionResult | None:
+        """Converting SMI without decoding whole file. <SYNC> tags are found
+        in the bytes first, and blocks are decoded, parsed and converted by
+        small parts only when they are reached, so whole decoded SMI and its
+        parse tree are never kept in memory. With time window, only blocks in
+        the window are converted when start times are in ascending order.
+
+        Args:
+            smi_raw (bytes | bytearray | memoryview | mmap.mmap): Content of
+            SMI file
+
+        Returns:
+            ConversionResult | None: Converted subtitle, None when SMI can't
+            be converted by blocks, then it should be decoded as a whole
+        """
+
+        with self.__stage("decode"):
+            encoding, encoding_tier, errors = detect_encoding(
+                smi_raw, self.legacy_encodings
+            )
+
+        # Offsets are found in bytes, so ASCII characters have to be kept as
+        # it is by the encoding (not UTF-16 or UTF-32)
+        if not "<sync ".encode(encoding).endswith(b"<sync "):
+            return None
+
+        with self.__stage("index"):
+            index: SyncIndex = build_sync_index(smi_raw)
+        if len(index) == 0:
+            return None
+
+        # Blocks to convert
+        first: int = 0
+        stop: int = len(index)
+        flag_search: bool = self.flag_window and index.flag_sorted
+        if flag_search:
+            first, stop = index.find_window(self.time_from, self.time_to)
+        elif not self.flag_lazy:
+            return None
+
+        self.font_tag_count = 0
+        with gc_paused():
+            events: list[tuple[str, int, str | None]] | None = (
+                self.__parse_lazy(
+                    smi_raw, index, encoding, errors, first, stop
+                )
+            )
+            # Last line of each language ends at the next line of the same
+            # language, so blocks after the window are read until every
+            # language in the window has one
+            while (
+                flag_search
+                and events is not None
+                and stop < len(index)
+                and languages_without_end(events, self.time_from, self.time_to)
+            ):
+                tmp_stop: int = index.extend_window(
+                    stop, max(stop - first, WINDOW_EXTEND_BLOCKS)
+                )
+                tmp_events: list[tuple[str, int, str | None]] | None = (
+                    self.__parse_lazy(
+                        smi_raw, index, encoding, errors, stop, tmp_stop
+                    )
+                )
+                events = None if tmp_events is None else events + tmp_events
+                stop = tmp_stop
+        if events is None:
+            return None
+        if flag_search:
+            self.__count("skipped_blocks", len(index) - (stop - first))
+
+        with self.__stage("time_lan"):
+            smi_lines: dict[str, list[SmiEvent]] = self.__time_lan(events)
+
+        return self.__result(smi_lines, encoding, encoding_tier)
+
+    def __parse_lazy(
+        self,
+        smi_raw: "bytes | bytearray | memoryview | mmap.mmap",
+        index: SyncIndex,
+        encoding: str,
+        errors: str,
+        first: int = 0,
+        stop: int | None = None,
+    ) -> list[tuple[str, int, str | None]] | None:
+        """Decoding, parsing and converting <SYNC> blocks by parts of
+        LAZY_PART_SIZE. Like "__parse_shards", each part is tokenized from
+        the state where the header ended, and it has to end in that state as
+        well.
+
+        Args:
+            smi_raw (bytes | bytearray | memoryview | mmap.mmap): Content of
+            SMI file
+            index (SyncIndex): <SYNC> tags of the file
+            encoding (str): Encoding of SMI file
+            errors (str): Error handler to decode the file with
+            first (int, optional): Index of the first block to convert.
+            Defaults to 0.
+            stop (int | None, optional): Index after the last block to
+            convert. Defaults to None, until the last block.
+
+        Returns:
+            list[tuple[str, int, str | None]] | None: Converted blocks in the
+            document order, same with "convert_blocks". None when SMI can't
+            be converted by blocks.
+        """
+
+        def read_part(start: int, end: int, flag_last: bool) -> str:
+            # Spaces at the end are followed by next <sync>, and </sync>
+            # before it is tokenized with this part, same with whole SMI
+            text: str = normalize_newlines(
+                str(smi_raw[start:end], encoding, errors)
+            )
+            if flag_last:
+                return SMI_NORMALIZE.sub(normalize_repl, text)
+            return SMI_NORMALIZE.sub(normalize_repl, text + "<")[:-1] + (
+                "</sync>"
+            )
+
+        reason: str = ""
+        events: list[tuple[str, int, str | None]] = []
+        block_count: int = 0
+        header_state: TokenizerState = TokenizerState()
+        with self.__stage("parse"):
+            header: str = read_part(0, index.offsets[0], False)
+            try:
+                if list(iter_sync_blocks(header, header_state)):
+                    return None
+            except SamiSyntaxError:
+                return None
+
+        # Where the part starts in normalized SMI, </sync> at the end of each
+        # part is same with the one at the start of the next part. It is not
+        # known after the skipped blocks.
+        part_base: int | None = (
+            len(header) - len("</sync>") if first == 0 else None
+        )
+        # Warnings are only kept when every part is converted, otherwise SMI
+        # is converted again as a whole
+        diagnostics: Diagnostics = self.diagnostics
+        self.diagnostics = Diagnostics(
+            diagnostics.max_samples, diagnostics.sample_length
+        )
+
+        # Void tags of the skipped blocks are not known
+        void_closed: dict[str, int] | None = (
+            dict(header_state.void_closed) if first == 0 else None
+        )
+        for start, end in index.iter_parts(LAZY_PART_SIZE, first, stop):
+            with self.__stage("parse"):
+                flag_last: bool = end == index.size
+                part: str = read_part(start, end, flag_last)
+                if not part.startswith("</sync>"):
+                    reason = "<SYNC> is not found where it is indexed"
+                    break
+
+                # </sync> in front of it is already tokenized with previous part
+                state: TokenizerState = TokenizerState(header_state.stack)
+                try:
+                    sync_blocks: list[SmiTag] = list(
+                        iter_sync_blocks(part[len("</sync>") :], state)
+                    )
+                except SamiSyntaxError:
+                    reason = "markup is not handled by the tokenizer"
+                    break
+                if not flag_last and (
+                    state.stack != header_state.stack or state.flag_block_open
+                ):
+                    reason = "tags are crossing <SYNC> blocks"
+                    break
+                if any(
+                    void_closed is None or void_closed.get(key, 0)
+                    for key in state.void_missed.keys()
+                ):
+                    reason = "end tags of void tags are crossing <SYNC> blocks"
+                    break
+                if void_closed is not None:
+                    for key, value in state.void_closed.items():
+                        void_closed[key] = void_closed.get(key, 0) + value
+
+            block_count += len(sync_blocks)
+            self.source_base = (
+                None if part_base is None else part_base + len("</sync>")
+            )
+            with self.__stage("convert"):
+                events += self.convert_blocks(sync_blocks)
+            if part_base is not None:
+                part_base += len(part) - len("</sync>")
+
+        diagnostics, self.diagnostics = self.diagnostics, diagnostics
+        if reason != "":
+            print(f"Failed to read SMI by blocks ({reason}), reading all")
+            return None
+        self.__count("sync_blocks", block_count)
+        self.diagnostics.merge(diagnostics)
+
+        return events
+
+    def __normalize(self) -> None:
+        """Rewriting raw SMI string before parsing it, in single scan.
+        - Spaces around a tag are replaced with place holder, so that they
+          are not stripped when we replace a tag, but not inside of <rt>.
+        - Closing the <sync> tags to avoid tag recursion when it is parsed.
+        - Fixing malformed font tags.
+        """
+
+        self.smi_sgml = SMI_NORMALIZE.sub(normalize_repl, self.smi_sgml)
+
+    def __parse(self) -> "ResultSet | list[SmiTag]":
+        """Parse <SYNC> blocks from SMI. Built in tokenizer is used by
+        default, and BeautifulSoup with HTML parser is used when tokenizer
+        can't handle the SMI or "bs4" parser is selected.
+
+        Returns:
+            ResultSet | list[SmiTag]: Parsed <SYNC> blocks
+        """
+
+        if self.parser == "sami":
+            try:
+                return list(iter_sync_blocks(self.smi_sgml))
+            except SamiSyntaxError as e:
+                print(
+                    f"Failed to tokenize SMI ({e}), parsing with BeautifulSoup"
+                )
+                self.__count("bs4_fallbacks", 1)
+
+        bs = load_bs4()
+        return bs(self.smi_sgml, "html.parser").find_all("sync")
+
+    def __parse_shards(self) -> list[tuple[str, int, str | None]] | None:
+        """Splitting SMI into parts at <SYNC> and converting each part in
+        the process pool, through "convert_blocks". Each part is tokenized
+        from the state where the header ended, and it is only used when
+        every part ended in that state as well, so converted lines are same
+        with single process conversion.
+
+        Returns:
+            list[tuple[str, int, str | None]] | None: Converted blocks in the
+            document order, same with "convert_blocks". None when SMI can't
+            be split, then it should be converted in single process.
+        """
+
+        # The process pool is only imported when it is used
+        from concurrent.futures import ProcessPoolExecutor
+
+        # Every <sync> has </sync> in front of it after "__normalize", part
+        # is starting right after that
+        boundaries: list[int] = []
+        n: int = len(self.smi_sgml)
+        idx: int = self.smi_sgml.find(SHARD_BOUNDARY)
+        if idx < 0:
+            return None
+        start: int = idx + len("</sync>")
+        for tmp in range(1, self.shard_jobs):
+            idx = self.smi_sgml.find(
+                SHARD_BOUNDARY, start + (n - start) * tmp // self.shard_jobs
+            )
+            if idx < 0:
+                break
+            if not boundaries or boundaries[-1] < idx + len("</sync>"):
+                boundaries.append(idx + len("</sync>"))
+        if not boundaries:
+            return None
+
+        # State of the tokenizer at the first <sync>
+        header_state: TokenizerState = TokenizerState()
+        try:
+            if list(iter_sync_blocks(self.smi_sgml[:start], header_state)):
+                return None
+        except SamiSyntaxError:
+            return None
+
+        edges: list[int] = [start] + boundaries + [n]
+        print(f"Converting in {len(edges) - 1} parts")
+        with ProcessPoolExecutor(
+            max_workers=len(edges) - 1,
+            initializer=init_shard_worker,
+            initargs=(
+                self.style.lan_code,
+                self.diagnostics.max_samples,
+                self.diagnostics.sample_length,
+            ),
+        ) as executor:
+            results = list(
+                executor.map(
+                    convert_shard,
+                    (
+                        self.smi_sgml[edges[tmp] : edges[tmp + 1]]
+                        for tmp in range(len(edges) - 1)
+                    ),
+                    [header_state.stack] * (len(edges) - 1),
+                )
+            )
+
+        # Checking each part was tokenized from the correct state. Void tags
+        # that are opened in earlier parts are carried to the next one.
+        reason: str = ""
+        void_closed: dict[str, int] = dict(header_state.void_closed)
+        for tmp_idx, result in enumerate(results):
+            if result is None:
+                reason = "markup is not handled by the tokenizer"
+                break
+            state: TokenizerState = result[3]
+            flag_last: bool = tmp_idx == len(results) - 1
+            if not flag_last and (
+                state.stack != header_state.stack or state.flag_block_open
+            ):
+                reason = "tags are crossing <SYNC> blocks"
+                break
+            if any(
+                void_closed.get(key, 0) for key in state.void_missed.keys()
+            ):
+                reason = "end tags of void tags are crossing <SYNC> blocks"
+                break
+            for key, value in state.void_closed.items():
+                void_closed[key] = void_closed.get(key, 0) + value
+
+        if reason != "":
+            print(f"Failed to split SMI ({reason}), converting in one process")
+            return None
+
+        events: list[tuple[str, int, str | None]] = []
+        for tmp_idx, result in enumerate(results):
+            tmp_events, msg, font_tag_count, _, error, diagnostics = result
+            print(msg, end="")
+            if error is not None:
+                raise error
+            self.font_tag_count += font_tag_count
+            self.diagnostics.merge(diagnostics, edges[tmp_idx])
+            events += tmp_events
+        self.__count("sync_blocks", len(events))
+        self.__count("shards", len(results))
+
+        return events
+
+    def __time_lan(
+        self, events: Iterable[tuple[str, int, str | None]]
+    ) -> dict[str, list[SmiEvent]]:
+        """Form original SMI file, get timecode in millisecond and in case
+        of the subtitle contained multiple language separate out for each
+        language.
+
+        If language is less then 10% compare with largest language, it might
+        be misuse of class name tag on SMI subtile.
+        Thus, in that case this function will be merge language to largest
+
+        Args:
+            events (Iterable[tuple[str, int, str | None]]): Language code,
+            time code and converted text of each <SYNC> block, from
+            "convert_blocks"
+
+        Returns:
+            dict[str, list[SmiEvent]]: Lines of each language
+        """
+
+        tmp_lines: dict[str, list[SmiEvent]] = defaultdict(list)
+        dropped: int = 0  # Lines without valid time code
+
+        # The key of the dictionary is language code in ass.
+        for ass_lang_code, time_code, text in events:
+            if text is None:
+                dropped += 1
+            else:
+                tmp_lines[ass_lang_code].append(SmiEvent(time_code, text))
+
+        # Sort the dictionary by the length of the list associated with
+        # each key
+        tmp_lines = dict(
+            sorted(tmp_lines.items(), key=lambda item: len(item[1]))
+        )
+
+        # Prepare list to hold language code and present of language compare
+        # with largest language.
+        # line_count structure: [lan code: str, percent: float]
+        line_count: list[any] = []
+        # Last key from the dictionary, which has largest lines.
+        largest_key: str = next(reversed(tmp_lines.keys()), "")
+        for tmp_lang in tmp_lines.keys():
+            tmp_len: int = len(tmp_lines[tmp_lang])
+            line_count.append(
+                [tmp_lang, tmp_len, tmp_len / len(tmp_lines[largest_key])]
+            )
+
+        flag_merged: bool = False
+        if len(line_count) != 1:
+            for tmp in line_count:
+                tmp_key: str = tmp[0]
+                # If language is less then or equal to 10%, merge to largest
+                if tmp[2] <= 0.1:
+                    tmp_lines[largest_key] += tmp_lines[tmp_key]
+                    del tmp_lines[tmp_key]
+                    flag_merged = True
+                    self.__count("merged_languages", 1)
+
+        # Sort each language lines based on SMI timecode in millisecond
+        for key, value in tmp_lines.items():
+            # Sorting lines by SMI timecode only more then one language, or
+            # when lines of other language are merged
+            if len(tmp_lines) != 1 or flag_merged:
+                tmp_lines[key] = sorted(value, key=attrgetter("start"))
+
+        # Only lines in the time window are kept
+        if self.flag_window:
+            tmp_lines = self.__window(tmp_lines)
+
+        self.__count("dropped_lines", dropped)
+        self.__count("font_tags", self.font_tag_count)
+        for key, value in tmp_lines.items():
+            self.__count(f"events.{key}", len(value))
+
+        return tmp_lines
+
+    def __window(
+        self, smi_lines: dict[str, list[SmiEvent]]
+    ) -> dict[str, list[SmiEvent]]:
+        """Keeping lines that start in the time window. In each language,
+        lines that start at the first time after the window are kept without
+        text, so the last line ends where it ends in the whole subtitle.
+        Language without text in the window is removed.
+
+        Args:
+            smi_lines (dict[str, list[SmiEvent]]): Lines of each language
+
+        Returns:
+            dict[str, list[SmiEvent]]: Lines in the window
+        """
+
+        time_from: int = self.time_from
+        time_to: int | None = self.time_to
+        shift: int = self.time_from if self.flag_rebase else 0
+
+        tmp_lines: dict[str, list[SmiEvent]] = {}
+        for key, value in smi_lines.items():
+            boundary: int | None = None
+            if time_to is not None:
+                boundary = min(
+                    (tmp.start for tmp in value if tmp.start >= time_to),
+                    default=None,
+                )
+            kept: list[SmiEvent] = [
+                SmiEvent(
+                    tmp.start - shift,
+                    "" if tmp.start == boundary else tmp.text,
+                )
+                for tmp in value
+                if time_from <= tmp.start
+                and (
+                    time_to is None
+                    or tmp.start < time_to
+                    or tmp.start == boundary
+                )
+            ]
+            if any(len(tmp.text.strip()) != 0 for tmp in kept):
+                tmp_lines[key] = kept
+
+        return tmp_lines
+
+    def __font_tag(self, attrs: dict[str, any]) -> tuple[str, str | None]:
+        """Converting font tag attributes to the markup
+
+        Args:
+            attrs (dict[str, any]): Attributes of the font tag
+
+        Returns:
+            tuple[str, str | None]: Opening markup and color of the font.
+            Opening is empty string when there is no convertible attribute,
+            and color is None when there is no color.
+        """
+
+        self.font_tag_count += 1
+
+        # Handle font color
+        color: str | None = None
+        if "color" in attrs:
+            color = self.__font_color(attrs["color"].lower())
+            if color is None:
+                self.diagnostics.warn("unknown_color", attrs["color"])
+
+        # Handle font face
+        face: str | None = attrs.get("face")
+
+        return markup_font(color, face), color
+
+    def __font_color(self, smi_col: str) -> str | None:
+        """Converting SMI font color to hex color code. Converted colors are
+        cached, since same colors are used over and over in the file.
+
+        Args:
+            smi_col (str): Color of font tag in lower case, hex code or name
+
+        Returns:
+            str | None: Hex color code, None when it can't be converted
+        """
+
+        if smi_col in self.color_cache:
+            return self.color_cache[smi_col]
+
+        hexcolor = HEX_COLOR.search(smi_col)
+        color: str | None = None
+        if hexcolor:
+            color = hexcolor.group(0)
+        else:
+            try:
+                color = self.style.color2hex(smi_col)
+            except ValueError:
+                pass
+
+        self.color_cache[smi_col] = color
+        return color
+
+    def __walk(
+        self,
+        tag: "SmiTag | Tag",
+        out: list[str],
+        active: list[str],
+        colors: list[str],
+    ) -> None:
+        """Converting tags in the line to the markup in single depth-first
+        walk. Converted text is added to the output list, and the tag is not
+        modified.
+
+        Args:
+            tag (SmiTag | Tag): Tag to convert, parsed by tokenizer or
+            BeautifulSoup
+            out (list[str]): Output list that converted text is added
+            active (list[str]): Tags (b, i, u, s) that are already applied by
+            the parents
+            colors (list[str]): Font colors that are applied by the parents
+        """
+
+        for tmp in tag.contents:
+            # Only plain text is shown, not comments or ruby text
+            if isinstance(tmp, str):
+                if type(tmp) in TEXT_TYPES:
+                    out.append(
+                        tmp.replace(MARKUP_MARK, "")
+                        if MARKUP_MARK in tmp
+                        else tmp
+                    )
+                continue
+
+            if tmp.name == "br":  # Converting next line (br) tags
+                out.append(MARKUP_BREAK)
+            elif tmp.name in MARKUP_TAGS and tmp.name not in active:
+                # Bold, italics, underline and strikes
+                start: int = len(out)
+                active.append(tmp.name)
+                self.__walk(tmp, out, active, colors)
+                active.pop()
+                # Tag without any content is removed
+                if any(out[start:]):
+                    opening, closing = MARKUP_TAGS[tmp.name]
+                    out.insert(start, opening)
+                    out.append(closing)
+            elif tmp.name == "font":  # Font color and face
+                opening, color = self.__font_tag(tmp.attrs)
+                out.append(opening)
+                if color is None:
+                    self.__walk(tmp, out, active, colors)
+                    continue
+
+                colors.append(color)
+                self.__walk(tmp, out, active, colors)
+                colors.pop()
+                # Going back to color of the parent font tag
+                out.append(markup_font_close(colors[-1] if colors else None))
+            else:
+                self.__walk(tmp, out, active, colors)
+
+    def __convert_line(self, tmp_line: "Tag | SmiTag") -> str:
+        """Converting contents of one SYNC block to text in the markup
+
+        Args:
+            tmp_line (Tag | SmiTag): SYNC block
+
+        Returns:
+            str: Converted text
+        """
+
+        tmp_contents: list[str] = []
+        self.__walk(tmp_line, tmp_contents, [], [])
+        contents: str = "".join(tmp_contents)
+
+        # Converting place holder to actual character
+        contents = re.sub(r"smi2ass_unicode\(([0-9]+)\)", r"&#\1;", contents)
+
+        # Converting ASCII to special character
+        contents = html.unescape(contents)
+
+        # Removes next line character to avoid error when it sets loading
+        contents = re.sub("\n", "", contents, len(contents) - 1)
+
+        return contents
+
+    def convert_blocks(
+        self, sync_blocks: "ResultSet | list[SmiTag]"
+    ) -> Iterator[tuple[str, int, str | None]]:
+        """Getting language, time code and converted text of each <SYNC>
+        block. Blocks are released from the list once they are converted, so
+        parse tree is not kept.
+
+        Args:
+            sync_blocks (ResultSet | list[SmiTag]): Parsed <SYNC> blocks
+
+        Yields:
+            Iterator[tuple[str, int, str | None]]: Language code in ASS, time
+            code of SMI in millisecond and converted text. Text is None when
+            time code is not valid, the line is dropped.
+        """
+
+        time_code: int  # Prepare valuable to hold time in ms.
+        diagnostics: Diagnostics = self.diagnostics
+        for idx in range(len(sync_blocks)):
+            lines: "Tag | SmiTag" = sync_blocks[idx]
+            # Block is not needed after it is converted
+            sync_blocks[idx] = None
+
+            # Language separation is depends on p class tag (<P Class= >)
+            # Get language name from <P Class= > tag
+            try:
+                lang_tag: list[str] = lines.find("p")["class"]
+            except:  # Bad case: <SYNC Start=7630><P>
+                # If no p class, it will set to unknown language
+                lang_tag = ["UNKNOWNCC"]
+                diagnostics.warn(
+                    "missing_lang_class",
+                    sample=partial(block_sample, lines, self.source_base),
+                )
+
+            # Get timecode from <SYNC Start= > tag
+            # If case when there is error, the time_code is set to "-1"
+            try:
+                # original code uses regular expression to get timecode. Based
+                # on some sample SMIs, it seems not need to use regular
+                # expression
+                # time_code = int(re.sub(r'\..*$', '', lines['start']))
+                time_code = int(lines["start"])
+                if time_code < 0:
+                    time_code = -1
+                    diagnostics.warn(
+                        "negative_time_code",
+                        lines["start"],
+                        partial(block_sample, lines, self.source_base),
+                    )
+            except:
+                time_code = -1
+                diagnostics.warn(
+                    "bad_time_code",
+                    sample=partial(block_sample, lines, self.source_base),
+                )
+
+            # Contents of the line is converted here so parse tree is not kept
+            ass_lang_code: str = ""
+            text: str | None = None
+            if time_code > 0:
+                ass_lang_code = self.style.get_lang_code(
+                    lang_tag[0].upper(), diagnostics
+                )
+                text = self.__convert_line(lines)
+
+            yield ass_lang_code, time_code, text
+
+
+def convert(
+    source: (
+        "bytes | bytearray | memoryview | mmap.mmap | BinaryIO | str | Path"
+    ),
+    style: AssStyle,
+    offset: int = 0,
+    **kwargs,
+) -> ConversionResult:
+    """Converting SMI subtitle to ASS. Nothing is kept after it returns, and
+    the style is only read, so it can be called from many threads with same
+    style.
+
+    Args:
+        source (bytes | bytearray | memoryview | mmap.mmap | BinaryIO | str |
+        Path): Content of SMI file, binary stream to read it from, or path to
+        it. Bytes-like content is decoded without copying it, and the file is
+        memory-mapped instead of read with "lazy" option or time window.
+        style (AssStyle): Style and language codes to use
+        offset (int, optional): Time in millisecond to add on subtitle.
+        Defaults to 0.
+        kwargs: Other options of "SmiConverter" (parser, legacy_encodings,
+        shards, shard_min_size, lazy, time_from, time_to, rebase,
+        stage_hook, counter_hook, diagnostics and quiet)
+
+    Raises:
+        IOError: Neither file is not exist or cannot access file
+
+    Returns:
+        ConversionResult: Converted subtitle
+    """
+
+    converter: SmiConverter = SmiConverter(style, offset, **kwargs)
+    if isinstance(source, (str, Path)) and (
+        converter.flag_lazy or converter.flag_window
+    ):
+        mapped: mmap.mmap | bytes = map_smi(source)
+        try:
+            return converter.run(mapped)
+        finally:
+            if isinstance(mapped, mmap.mmap):
+                mapped.close()
+    if isinstance(source, (str, Path)):
+        source = converter.read(source)
+    elif not isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+        source = source.read()  # Binary stream
+
+    return converter.run(source)
+
+
+def convert_text(
+    smi_sgml: str, style: AssStyle, offset: int = 0, **kwargs
+) -> ConversionResult:
+    """Converting SMI subtitle that is already decoded, see "convert"
+
+    Args:
+        smi_sgml (str): Decoded SMI
+        style (AssStyle): Style and language codes to use
+        offset (int, optional): Time in millisecond to add on subtitle.
+        Defaults to 0.
+        kwargs: Other options of "SmiConverter"
+
+    Returns:
+        ConversionResult: Converted subtitle
+    """
+
+    return SmiConverter(style, offset, **kwargs).run_text(smi_sgml)
 
 
 class smi2ass(AssStyle):
-    def __init__(self, smi_path: str = "", **kwargs) -> None:
+    def __init__(
+        self, smi_path: str = "", parser: str = "sami", **kwargs
+    ) -> None:
         """Class constructor, this class only initializes when SMI file path
-        is given as input variable
+        is given as input variable. Conversion itself is done by "convert",
+        this class keeps the settings and the converted subtitle of the last
+        file.
 
         Args:
             smi_path (str, optional): Smi file path. Defaults to "".
+            parser (str, optional): Parser engine, "sami" or "bs4". "sami" is
+            using built in tokenizer and falls back to BeautifulSoup when SMI
+            is malformed. Defaults to "sami".
         """
 
         # Initializing parent class
         super().__init__(**kwargs)
 
         self.path2smi: Path  # Path to SMI file
-        self.smi_sgml: str
-        self.smi_sgml_bs: ResultSet
+        # Encoding of SMI file and which detection tier found it (e.g.
+        # "bom", "utf-8", "legacy" or "chardet")
+        self.encoding: str = ""
+        self.encoding_tier: str = ""
+        # Encodings that are tried before chardet is used
+        self.legacy_encodings: list[str] = list(LEGACY_ENCODINGS)
+        # Content of SMI file, it is memory-mapped file with "set_lazy"
+        self.smi_raw: bytes | bytearray | memoryview | mmap.mmap = b""
+        # Converted subtitle of the last file, None until SMI is parsed
+        self.result: ConversionResult | None = None
         # The value that  hold smi lines by each language. The language code
         # is used as key of the dictionary.
-        # Each dictionary key is holding list as [lines, time code in ass]
-        self.smi_lines: dict[str, list[any]] = defaultdict(list)
+        # Each dictionary key is holding list of SmiEvent, with time code of
+        # SMI since time offset is only added when lines are composed
+        self.smi_lines: dict[str, list[SmiEvent]] = {}
         # The value that holds converted lines from SMI subtitle. The language
         # will be used as key of the dictionary.
         # Each key will hold list as [lines of ass formatted subtitle]
         self.ass_lines: dict[str, list[str]] = defaultdict(list)
         # Flag initialization process is complete before converting to ASS
         self.flag_preprocess: bool = False
+        # Flag SMI is parsed, parsing is delayed when cache is used
+        self.flag_parsed: bool = False
+        # Flag lines are converted while they are saved, instead of keeping
+        # them in "ass_lines"
+        self.flag_stream: bool = False
+        # Key of the converted subtitle that is not saved in cache yet
+        self.cache_key: str = ""
 
         # Setting time offset from original file
         self.flag_time_offset: bool = False
         self.time_offset: int = 0
 
+        # Setting parser engine
+        self.parser: str
+        self.set_parser(parser)
+
+        # Cache of converted subtitle, not used until "set_cache" is called
+        self.cache: "ConversionCache | None" = None
+
+        # Function that gives context manager wrapping each stage of the
+        # conversion, it is called with the stage name. See "set_stage_hook"
+        self.stage_hook: Callable[[str], ContextManager] | None = None
+        # Function that is called with name and value of the counters. See
+        # "set_counter_hook"
+        self.counter_hook: Callable[[str, int], None] | None = None
+
+        # Number of processes to convert single SMI, see "set_shards"
+        self.shard_jobs: int = 1
+        self.shard_min_size: int = SHARD_MIN_SIZE
+
+        # Flag SMI file is memory-mapped and converted by blocks, see
+        # "set_lazy"
+        self.flag_lazy: bool = False
+        # File that is mapped by this class, it is closed with next SMI
+        self.smi_map: mmap.mmap | None = None
+
+        # Time window to convert in millisecond, see "set_window"
+        self.time_from: int = 0
+        self.time_to: int | None = None
+        self.flag_rebase: bool = False
+
+        # Other renderings that are saved with the subtitle, see
+        # "set_variants"
+        self.variants: list[RenderVariant] = []
+        # Subtitle formats to save, see "set_formats"
+        self.formats: list[str] = ["ass"]
+
+        # Warnings of the last file, e.g. <SYNC> without language class
+        self.diagnostics: Diagnostics = Diagnostics()
+        # Flag summary of the warnings is not printed, see "set_quiet"
+        self.flag_quiet: bool = False
+
         # Only initialize the class when SMI file path is provided
         if smi_path != "":
             self.__preprocess(smi_path)
@@ -67,360 +1386,462 @@ class smi2ass(AssStyle):
         print(f"\nConverting... \n{self.path2smi}")
 
         # Check if file is accessible. If it is not, program will raise error.
-        try:
-            # Identify encoding of the file
-            with open(smi_file_input, "rb") as f:
-                f_encoding: str | None = chardet.detect(f.read())["encoding"]
-            # Reading SMI file
-            with open(
-                smi_file_input, "r", encoding=f_encoding, errors="replace"
-            ) as f:
-                self.smi_sgml = f.read()
-        except IOError as e:
-            raise IOError(f"Failed to open the file {smi_file_input}: {e}")
+        smi_raw: bytes | mmap.mmap
+        if self.flag_lazy or self.time_from > 0 or self.time_to is not None:
+            with self.__stage("read"):
+                smi_raw = map_smi(smi_file_input)
+            if isinstance(smi_raw, mmap.mmap):
+                self.smi_map = smi_raw
+        else:
+            try:
+                with self.__stage("read"), open(smi_file_input, "rb") as f:
+                    smi_raw = f.read()
+            except IOError as e:
+                raise IOError(f"Failed to open the file {smi_file_input}: {e}")
 
-        # Preprocess raw string before parse SMI lines
-        self.__convert_whitespace()
-        self.__convert_ss()
-        self.__add_sync_tag()
+        self.__load(smi_raw)
 
-        # Parse SMI with BeautifulSoup with HTML parser
-        self.smi_sgml_bs = bs(self.smi_sgml, "html.parser").find_all("sync")
+    def __load(
+        self, smi_raw: "bytes | bytearray | memoryview | mmap.mmap"
+    ) -> None:
+        """Setting content of SMI file to convert
 
-        # Get timecode for each lines and septate out subtitle in each language
-        self.__time_lan()
+        Args:
+            smi_raw (bytes | bytearray | memoryview | mmap.mmap): Content of
+            SMI file
+        """
+
+        # File that is mapped for the previous SMI is not needed anymore
+        if self.smi_map is not None and self.smi_map is not smi_raw:
+            self.smi_map.close()
+            self.smi_map = None
+        self.smi_raw = smi_raw
+        self.flag_parsed = False
+        self.result = None
+        self.smi_lines = {}
+        self.encoding = self.encoding_tier = ""
+        self.diagnostics = Diagnostics()
+
+        # When cache is used, parse SMI only when it is not cached
+        if self.cache is None:
+            self.__parse_smi()
 
         # Preprocess is complete, not it can convert to ass
         self.flag_preprocess = True
 
-    def __convert_whitespace(self) -> None:
-        """Converting CRLF, LF or TAB to white space."""
-
-        # Some subtitle uses TAB as space character
-        whitespace: list[str] = ["\u000D\u000A", "\u000A", "\u000D"]
-
-        # CRLF, LF to a whitespace
-        for temp in whitespace:
-            self.smi_sgml.replace(temp, " ")
-
-        # TAB to whitespace
-        self.smi_sgml.replace("\t", "    ")
-
-    def __convert_ss(self) -> None:
-        """Converting special characters to ASCII code with defined flag, so
-        it can convert correctly at the end.
-        """
-
-        # Defining special characters in unicode
-        char_ss: list[str] = [
-            "\u00A0",
-            "\u180E",
-            "\u2000",
-            "\u2001",
-            "\u2002",
-            "\u2003",
-            "\u2004",
-            "\u2005",
-            "\u2006",
-            "\u2007",
-            "\u2008",
-            "\u2009",
-            "\u200A",
-            "\u200B",
-            "\u202F",
-            "\u205F",
-            "\u3000",
-        ]
+    def __stage(self, name: str) -> ContextManager:
+        """Wrapping a stage of the conversion with "stage_hook"
 
-        # Replace special space characters so that Beautifulsoup
-        # can't remove them
-        for tmp_ss in char_ss:
-            self.smi_sgml.replace(
-                tmp_ss, f"smi2ass_unicode({str(ord(tmp_ss))})"
-            )
+        Args:
+            name (str): Name of the stage
 
-        # Replace space around a tag with "&nbsp;", so that they are not
-        # stripped when we replace a tag.
-        self.smi_sgml = re.sub(r"> +<", ">smi2ass_unicode(32)<", self.smi_sgml)
-        self.smi_sgml = re.sub(r"> +", ">smi2ass_unicode(32)", self.smi_sgml)
-        self.smi_sgml = re.sub(r" +<", "smi2ass_unicode(32)<", self.smi_sgml)
-
-        # but not <rt>
-        self.smi_sgml = re.sub(
-            r"< *[Rr][Tt] *>(smi2ass_unicode\([0-9]+\))+",
-            "<rt>",
-            self.smi_sgml,
-        )
-        self.smi_sgml = re.sub(
-            r"(smi2ass_unicode\([0-9]+\))+</ *[Rr][Tt] *>",
-            "</rt>",
-            self.smi_sgml,
-        )
+        Returns:
+            ContextManager: Context manager from the hook, or one that does
+            nothing when hook is not set
+        """
 
-    def __add_sync_tag(self) -> None:
-        """Closing the <sync> tags to avoid tag recursion when it is parses by
-        BeautifulSoup
+        if self.stage_hook is None:
+            return contextlib.nullcontext()
+        return self.stage_hook(name)
+
+    def __count(self, name: str, value: int) -> None:
+        """Reporting counter to "counter_hook"
+
+        Args:
+            name (str): Name of the counter
+            value (int): Value to add on the counter
         """
 
-        # Remove </sync>
-        self.smi_sgml = re.sub(r"</ *[Ss][Yy][Nn][Cc] *>", "", self.smi_sgml)
-        # Add </sync> right before <sync>
-        self.smi_sgml = re.sub(
-            r"< *[Ss][Yy][Nn][Cc] +", "</sync><sync ", self.smi_sgml
+        if self.counter_hook is not None:
+            self.counter_hook(name, value)
+
+    def __parse_smi(self) -> None:
+        """Converting SMI file that is read by "__preprocess" with "convert".
+        It separates out lines of each language into "smi_lines".
+        """
+
+        self.result = convert(
+            self.smi_raw,
+            self,
+            self.time_offset if self.flag_time_offset else 0,
+            parser=self.parser,
+            legacy_encodings=self.legacy_encodings,
+            shards=self.shard_jobs,
+            shard_min_size=self.shard_min_size,
+            lazy=self.flag_lazy,
+            time_from=self.time_from,
+            time_to=self.time_to,
+            rebase=self.flag_rebase,
+            stage_hook=self.stage_hook,
+            counter_hook=self.counter_hook,
+            diagnostics=self.diagnostics,
+            quiet=self.flag_quiet,
         )
-        # Fix malformed font tags
-        self.smi_sgml = re.sub(r'< ="([^"]*)"', r'<font face="\1"', self.smi_sgml)
+        self.encoding = self.result.encoding
+        self.encoding_tier = self.result.encoding_tier
+        print(f"Encoding: {self.encoding} (found by {self.encoding_tier})")
+        # Copy of the events, so "result" is not changed through it
+        self.smi_lines = {
+            key: list(value) for key, value in self.result.events.items()
+        }
+
+        self.flag_parsed = True
 
-    def __ms2timestamp(self, ms: int) -> str:
-        """Converting millisecond to h:mm:ss.ff time format
+    def __core(self, lang: str) -> list[str]:
+        return list(self.__iter_core(lang))
+
+    def __iter_core(self, lang: str) -> Iterator[str]:
+        """Composing lines of one language from "result", and counting
+        composed dialogue lines
 
         Args:
-            ms (int): Time in millisecond
+            lang (str): Language code in ASS
 
-        Returns:
-            str: Converted time stamp
+        Yields:
+            Iterator[str]: ASS style header and then each Dialogue line
         """
 
-        hours = int(ms / 3600000)
-        ms -= hours * 3600000
-        minutes = int(ms / 60000)
-        ms -= minutes * 60000
-        seconds = int(ms / 1000)
-        ms -= seconds * 1000
-        ms = round(ms / 10)
-        return "%01d:%02d:%02d.%02d" % (hours, minutes, seconds, ms)
+        line_count: int = 0
+        for tmp in self.result.iter_lines(lang):
+            line_count += 1
+            yield tmp
 
-    def __time_lan(self) -> None:
-        """Form original SMI file, get timecode in millisecond and in case
-        of the subtitle contained multiple language separate out for each
-        language.
+        # First line is the header
+        self.__count("dialogue_lines", line_count - 1)
 
-        If language is less then 10% compare with largest language, it might
-        be misuse of class name tag on SMI subtile.
-        Thus, in that case this function will be merge language to largest
+    def update_file2conv(self, smi_path: str) -> Self:
+        """Re-initialing class with new SMI file
+
+        Args:
+            smi_path (str): SMI file path
+
+        Returns:
+            Self: Returning itself
         """
 
-        tmp_lines: dict[str, list[any]] = defaultdict(list)
-        time_code: int  # Prepare valuable to hold time in ms.
+        self.__preprocess(smi_path)
 
-        # Set for timecode and separate out each language
-        for lines in self.smi_sgml_bs:
+        return self
 
-            # Language separation is depends on p class tag (<P Class= >)
-            # Get language name from <P Class= > tag
-            try:
-                lang_tag: list[str] = lines.find("p")["class"]
-            except:  # Bad case: <SYNC Start=7630><P>
-                # If no p class, it will set to unknown language
-                lang_tag = ["UNKNOWNCC"]
-                print(f"Failed to extract language class: {lines}")
-                print('Language has been set to "UNKNOWNCC"')
+    def update_data2conv(
+        self,
+        smi_data: "bytes | bytearray | memoryview | BinaryIO",
+        smi_name: str = "subtitle.smi",
+    ) -> Self:
+        """Re-initialing class with content of SMI file, instead of reading
+        it from the drive
 
-            # for index, lines in enumerate(self.smi_sgml_bs):
-            # Get timecode from <SYNC Start= > tag
-            # If case when there is error, the time_code is set to "-1"
-            try:
-                # original code uses regular expression to get timecode. Based
-                # on some sample SMIs, it seems not need to use regular
-                # expression
-                # time_code = int(re.sub(r'\..*$', '', lines['start']))
-                time_code = int(lines["start"])
-                if time_code < 0:
-                    time_code = -1
-                    print(f"Negative time code: \n\n{lines}\n")
-            except:
-                time_code = -1
-                print(f"Failed to extract time code: \n\n{lines}\n")
+        Args:
+            smi_data (bytes | bytearray | memoryview | BinaryIO): Content of
+            SMI file, or binary stream to read it from. Bytes-like content is
+            used without copying it.
+            smi_name (str, optional): File name of SMI, it is used to name
+            the saved file. Defaults to "subtitle.smi".
 
-            # Adjust subtitle timecode based on the offset input
-            if self.flag_time_offset:
-                time_code += self.time_offset
+        Returns:
+            Self: Returning itself
+        """
 
-            # The key of the dictionary is language code in ass.
-            # temporarily hols smi line data in to tmp_lines, and data
-            # structure is [smi lines, ass time code, time in ms]
-            if time_code > 0:
-                ass_lang_code: str = self.get_lang_code(lang_tag[0].upper())
-                tmp_lines[ass_lang_code].append(
-                    [lines, self.__ms2timestamp(time_code), time_code]
-                )
+        self.path2smi = Path(smi_name)
 
-        # Sort the dictionary by the length of the list associated with
-        # each key
-        tmp_lines = dict(
-            sorted(tmp_lines.items(), key=lambda item: len(item[1]))
-        )
+        # Printing which file is currently converting
+        print(f"\nConverting... \n{self.path2smi}")
 
-        # Prepare list to hold language code and present of language compare
-        # with largest language.
-        # line_count structure: [lan code: str, percent: float]
-        line_count: list[any] = []
-        # First key from the dictionary, which has largest lines.
-        tmp_key: str = list(tmp_lines.keys())[0]
-        for tmp_lang in tmp_lines.keys():
-            tmp_len: int = len(tmp_lines[tmp_lang])
-            line_count.append(
-                [tmp_lang, tmp_len, tmp_len / len(tmp_lines[tmp_key])]
-            )
+        if not isinstance(smi_data, (bytes, bytearray, memoryview, mmap.mmap)):
+            with self.__stage("read"):
+                smi_data = smi_data.read()  # Binary stream
+        self.__load(smi_data)
 
-        if len(line_count) != 1:
-            for tmp in line_count:
-                tmp_key: str = tmp[0]
-                # If language is less then or equal to 10%, merge to largest
-                if tmp[2] <= 0.1:
-                    tmp_lines[line_count[0]] += tmp_lines[tmp_key]
-                    del tmp_lines[tmp_key]
+        return self
 
-        # Sort each language lines based on SMI timecode in millisecond
-        for key, value in tmp_lines.items():
-            # Sorting lines by SMI timecode only more then one language
-            if len(tmp_lines) != 1:
-                tmp_lines[key] = sorted(value, key=itemgetter(2))
+    def set_time_offset(self, offset: int) -> None:
+        self.flag_time_offset = True
+        self.time_offset = offset
+
+    def set_legacy_encodings(self, encodings: list[str]) -> None:
+        """Setting legacy encodings that are tried when SMI is not in UTF-8,
+        chardet is only used when none of them can decode the file.
 
-        # Copy temperate value to the class values
-        self.smi_lines = tmp_lines
+        Args:
+            encodings (list[str]): Python codec names (e.g. ["cp949"])
+        """
 
-    def __tag_conv(self, tags: list[any], conv_rule: str) -> None:
-        """Converting SMI tags to ASS format based on input rule
+        self.legacy_encodings = list(encodings)
+
+    def set_parser(self, parser: str) -> None:
+        """Selecting parser engine that is used to parse SMI
 
         Args:
-            tags (list[any]): SMI tags that is found in line.
-            conv_rule (str): Conversion rule that in C string format. It must
-            only include one string position. (e.g "example %s test")
+            parser (str): "sami" for built in tokenizer or "bs4" for
+            BeautifulSoup
+
+        Raises:
+            ValueError: Unknown parser engine
         """
 
-        for tmp_tag in tags:
-            if len(tmp_tag.text) != 0:
-                tmp_tag.replaceWith(conv_rule % tmp_tag.text)
-            else:
-                tmp_tag.extract()
+        if parser not in PARSER_ENGINES:
+            raise ValueError(
+                f'Unknown parser "{parser}", choose from {PARSER_ENGINES}'
+            )
+        self.parser = parser
+
+    def set_shards(self, jobs: int, min_size: int = SHARD_MIN_SIZE) -> None:
+        """Splitting large SMI at <SYNC> into parts and converting them in
+        multiple processes. Converted lines are same with single process
+        conversion, and SMI is converted in single process when it can't be
+        split safely (e.g. tags that are crossing <SYNC> blocks). Only used
+        with "sami" parser.
 
-    def __core(self, lines2conv: list[list[any]]) -> list[str]:
-        # Setting first item to be ASS style header
-        tmp_ass_lines: list[str] = [self.ass_header()]
+        Args:
+            jobs (int): Number of processes, 1 to disable and 0 to use all CPU
+            cores
+            min_size (int, optional): SMI smaller than this, in characters,
+            is not split. Defaults to SHARD_MIN_SIZE.
+        """
 
-        for i in range(len(lines2conv)):
-            # Getting current line of SMI
-            tmp_line: bs = lines2conv[i][0]
+        self.shard_jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+        self.shard_min_size = min_size
 
-            # Setting converted timecode
-            track_start: str = lines2conv[i][1]  # Start time of subtitle
+    def set_lazy(self, flag: bool = True) -> None:
+        """Memory-mapping SMI file instead of reading it, and decoding,
+        parsing and converting <SYNC> blocks by small parts as they are
+        reached. Whole decoded SMI and its parse tree are never kept, so it
+        lowers peak memory of large SMI. Converted lines are same, and SMI is
+        decoded as a whole when it can't be converted by blocks (e.g. UTF-16
+        or tags that are crossing <SYNC> blocks). Only used with "sami"
+        parser, and SMI is not split by "set_shards" while it is used.
 
-            # Setting end time code
-            try:
-                track_end: str = lines2conv[i + 1][1]  # End time of subtitles
-            except:
-                """
-                Due to how the SMI subtitle is structure, there isn't
-                indication for end time for the line. Thus, adding 1s to the
-                last time code, os it cant convert without error
-                """
-                track_end: str = self.__ms2timestamp(lines2conv[i][2] + 1000)
+        Args:
+            flag (bool, optional): Enable or disable. Defaults to True.
+        """
 
-            # Converting next line (br) tags
-            for tmp_br in tmp_line.find_all("br"):
-                tmp_br.replaceWith("\\N")
+        self.flag_lazy = flag
+
+    def set_window(
+        self,
+        time_from: int = 0,
+        time_to: int | None = None,
+        rebase: bool = False,
+    ) -> None:
+        """Converting only lines that start in the time window, e.g. for a
+        clip. Lines that start at the first time after the window are used
+        as end time of the last lines. When start times of <SYNC> tags are in
+        ascending order, blocks in the window are found by binary search and
+        other blocks are not decoded or parsed at all. Window is compared
+        with time code in SMI, before time offset is added.
 
-            # Convert bold (b) tags
-            self.__tag_conv(tmp_line.find_all("b"), "{\\b1}%s{\\b0}")
+        Args:
+            time_from (int, optional): Start of the window in millisecond.
+            Defaults to 0.
+            time_to (int | None, optional): End of the window in millisecond,
+            it is not included. Defaults to None, until the end.
+            rebase (bool, optional): Moving the window start to 0, time
+            offset is added after that. Defaults to False.
 
-            # Convert italics (i) tag
-            self.__tag_conv(tmp_line.find_all("i"), "{\\i1}%s{\\i0}")
+        Raises:
+            ValueError: Window is empty or starts before 0
+        """
 
-            # Convert underline (u) tag
-            self.__tag_conv(tmp_line.find_all("u"), "{\\u1}%s{\\u0}")
+        if time_from < 0 or (time_to is not None and time_to <= time_from):
+            raise ValueError(f"Bad time window: {time_from} to {time_to}")
 
-            # Convert strikes (s) tag
-            self.__tag_conv(tmp_line.find_all("s"), "{\\s1}%s{\\s0}")
+        self.time_from = time_from
+        self.time_to = time_to
+        self.flag_rebase = rebase
 
-            # Convert ruby (rt) tag
-            self.__tag_conv(
-                tmp_line.find_all("s"),
-                "{\\fscx50}{\\fscy50}&nbsp;%s&nbsp;{\\fscx100}{\\fscy100}",
-            )
+    def set_variants(self, variants: list[dict[str, any]]) -> None:
+        """Saving other renderings of the subtitle along with it, e.g. for
+        other resolution or release cut. SMI is parsed once, and each variant
+        only composes its header and the time stamps. Variant is saved as
+        "test.NAME.ass", and the style overrides are applied on the settings
+        of this object when it is saved.
 
-            # Convert font color to ass format
-            for tmp_font in tmp_line.find_all("font"):
-                applied_tags = []
-                closing_tags = []
-
-                # Handle font color
-                if "color" in tmp_font.attrs:
-                    smi_col = tmp_font["color"].lower()
-                    hexcolor = re.search("[0-9a-fA-F]{6}", smi_col)
-                    bgr_color = None
-                    if hexcolor:
-                        bgr_color = rgb2bgr(hexcolor.group(0))
-                    else:
-                        try:
-                            bgr_color = rgb2bgr(self.color2hex(smi_col))
-                        except ValueError:
-                            print(f"Failed to convert color name: {smi_col}")
-
-                    if bgr_color:
-                        applied_tags.append(f"\\c&H{bgr_color}&")
-                        closing_tags.insert(0, "\\c")
-
-                # Handle font face
-                if "face" in tmp_font.attrs:
-                    applied_tags.append(f"\\fn{tmp_font['face']}")
-
-                if applied_tags:
-                    opening = "{" + "".join(applied_tags) + "}"
-                    closing = "{" + "".join(closing_tags) + "}" if closing_tags else ""
-                    replacement = f"{opening}{tmp_font.text}{closing}"
-                    tmp_font.replaceWith(replacement)
-                else:
-                    # In case of no convertible attributes, just get the text
-                    tmp_font.replaceWith(tmp_font.text)
+        Args:
+            variants (list[dict[str, any]]): {"name": str, "style":
+            {"title", "font", "font_size", "resolution"}, "time_offset": int}
+            of each variant, empty list to disable
 
-            # Get converted line
-            contents: str = tmp_line.text
+        Raises:
+            ValueError: Name is empty, has path separator or is used twice,
+            or style override is unknown
+        """
 
-            # Converting place holder to actual character
-            contents = re.sub(
-                r"smi2ass_unicode\(([0-9]+)\)", r"&#\1;", contents
+        tmp_variants: list[RenderVariant] = []
+        for tmp in variants:
+            name: str = str(tmp.get("name", ""))
+            if (
+                name == ""
+                or "/" in name
+                or os.sep in name
+                or any(
+                    name == tmp_variant.name for tmp_variant in tmp_variants
+                )
+            ):
+                raise ValueError(f'Bad variant name "{name}"')
+            override_style(self, tmp.get("style"))  # Checking overrides
+            tmp_variants.append(
+                RenderVariant(
+                    name, dict(tmp.get("style") or {}), tmp.get("time_offset")
+                )
             )
 
-            # Converting ASCII to special character
-            contents = html.unescape(contents)
+        self.variants = tmp_variants
 
-            # Removes next line character to avoid error when it sets loading
-            contents = re.sub("\n", "", contents, len(contents) - 1)
+    def set_formats(self, formats: list[str]) -> None:
+        """Selecting subtitle formats that "save" writes. Every format is
+        composed from the same converted subtitle, and the files are written
+        at once.
 
-            # Only add converted line when there is content
-            if len(contents.strip()) != 0:
-                tmp_ass_lines.append(
-                    "Dialogue: 0,%s,%s,Default,,0000,0000,0000,,%s\n"
-                    % (track_start, track_end, contents)
+        Args:
+            formats (list[str]): Formats in FORMAT_EMITTERS, e.g. ["ass",
+            "srt", "vtt"]
+
+        Raises:
+            ValueError: Unknown format or no format
+        """
+
+        for tmp in formats:
+            if tmp not in FORMAT_EMITTERS:
+                raise ValueError(
+                    f'Unknown format "{tmp}", choose from '
+                    + f"{tuple(FORMAT_EMITTERS.keys())}"
                 )
+        if len(formats) == 0:
+            raise ValueError("No subtitle format to save")
 
-        return tmp_ass_lines
+        self.formats = list(dict.fromkeys(formats))
 
-    def update_file2conv(self, smi_path: str) -> Self:
-        """Re-initialing class with new SMI file
+    def set_quiet(self, flag: bool = True) -> None:
+        """Not printing summary of the warnings for each file, e.g. <SYNC>
+        without language class. Warnings are still collected in
+        "diagnostics".
 
         Args:
-            smi_path (str): SMI file path
+            flag (bool, optional): Flag to enable quiet mode. Defaults to
+            True.
+        """
+
+        self.flag_quiet = flag
+
+    def set_stage_hook(
+        self, hook: Callable[[str], ContextManager] | None
+    ) -> None:
+        """Setting hook that wraps each stage of the conversion. Hook is
+        called with the stage name ("read", "cache", "decode", "normalize",
+        "index", "parse", "convert", "time_lan", "core" and "save") and the
+        returned context manager is entered while the stage runs. Same stage
+        can run more than once. In streaming mode, lines are converted in
+        "save" stage. Parts of SMI that are converted in other processes by
+        "set_shards" are reported as "parse".
+
+        Args:
+            hook (Callable[[str], ContextManager] | None): Hook to use, None to
+            remove it
+        """
+
+        self.stage_hook = hook
+
+    def set_counter_hook(
+        self, hook: Callable[[str, int], None] | None
+    ) -> None:
+        """Setting hook that is called with name and value of the counters
+        while converting. Same counter can be reported more than once, values
+        should be added up. Counters are "sync_blocks", "bs4_fallbacks",
+        "dropped_lines", "font_tags", "merged_languages", "events.<language>",
+        "dialogue_lines", "cache_hits" and "shards".
+
+        Args:
+            hook (Callable[[str, int], None] | None): Hook to use, None to
+            remove it
+        """
+
+        self.counter_hook = hook
+
+    def set_cache(self, cache: "ConversionCache | None") -> None:
+        """Setting cache of converted subtitle. When same SMI file is
+        converted with same settings, converted lines are read from the cache
+        instead of parsing SMI file.
+
+        Args:
+            cache (ConversionCache | None): Cache to use, None to disable
+        """
+
+        self.cache = cache
+
+    def cache_fingerprint(self) -> dict[str, any]:
+        """Collecting settings that changes converted output, they are part
+        of the cache key
 
         Returns:
-            Self: Returning itself
+            dict[str, any]: Settings in JSON serializable form
         """
 
-        self.__preprocess(smi_path)
+        fingerprint: dict[str, any] = {
+            "version": __version__,
+            "ass_style": self.ass_style,
+            "lan_code": self.lan_code,
+            "time_offset": self.time_offset if self.flag_time_offset else 0,
+            "legacy_encodings": self.legacy_encodings,
+            "window": [self.time_from, self.time_to, self.flag_rebase],
+        }
+        # Key of the subtitle without variants is not changed
+        if self.variants:
+            fingerprint["variants"] = [list(tmp) for tmp in self.variants]
+        if self.formats != ["ass"]:
+            fingerprint["formats"] = self.formats
+
+        return fingerprint
+
+    def render_variants(self) -> dict[str, ConversionResult]:
+        """Rendering variants of the converted subtitle, see "set_variants".
+        SMI is only parsed when it was not, e.g. it was found in the cache.
 
-        return self
+        Returns:
+            dict[str, ConversionResult]: Name of the variant as key and its
+            subtitle as value
+        """
 
-    def set_time_offset(self, offset: int) -> None:
-        self.flag_time_offset = True
-        self.time_offset = offset
+        if not self.variants:
+            return {}
+        if not self.flag_parsed:
+            self.__parse_smi()
+
+        return {
+            tmp.name: self.result.variant(
+                override_style(self, tmp.style).ass_header(),
+                (
+                    tmp.offset
+                    if tmp.offset is not None
+                    else self.time_offset if self.flag_time_offset else 0
+                ),
+            )
+            for tmp in self.variants
+        }
 
-    def to_ass(self, smi_path: str = "") -> Self:
+    def iter_ass(self) -> Iterator[tuple[str, Iterator[str]]]:
+        """Converting SMI subtitle to ASS without keeping converted lines.
+        Lines of each language are converted as the iterator is consumed.
+
+        Yields:
+            Iterator[tuple[str, Iterator[str]]]: Language code and iterator
+            of the converted lines in that language
+        """
+
+        if not self.flag_parsed:
+            self.__parse_smi()
+
+        for key in self.result.events.keys():
+            yield key, self.__iter_core(key)
+
+    def to_ass(self, smi_path: str = "", stream: bool = False) -> Self:
         """Converting SMI subtitle to ASS
 
         Args:
             smi_path (str, optional): In case when need to update file to
             convert. Defaults to "".
+            stream (bool, optional): Converting lines while "save" writes
+            them, instead of keeping all of them in "ass_lines". Defaults to
+            False.
 
         Returns:
             Self: Returning itself
@@ -437,17 +1858,94 @@ class smi2ass(AssStyle):
                 + 'Please Initialize class by calling "update_file2conv" method'
             )
         else:
-            for key, value in self.smi_lines.items():
-                self.ass_lines[key] = self.__core(value)
+            # Languages from previously converted file should not be saved
+            self.ass_lines = defaultdict(list)
+            self.flag_stream = False
+            self.cache_key = ""
+
+            if self.cache is not None:
+                from conv_cache import make_key
+
+                self.cache_key = make_key(
+                    self.smi_raw, self.cache_fingerprint()
+                )
+                with self.__stage("cache"):
+                    cached = self.cache.get(self.cache_key, len(self.smi_raw))
+                self.__count("cache_hits", int(cached is not None))
+                if cached is not None:
+                    print("Found converted subtitle in the cache")
+                    self.ass_lines.update(cached)
+                    self.cache_key = ""
+                    return self
+
+            if not self.flag_parsed:
+                self.__parse_smi()
+
+            if stream:
+                # Lines are converted in "save"
+                self.flag_stream = True
+                return self
+
+            with self.__stage("core"):
+                for key in self.result.events.keys():
+                    self.ass_lines[key] = self.__core(key)
+
+            if self.cache is not None:
+                with self.__stage("cache"):
+                    self.cache.put(self.cache_key, self.ass_lines)
+                self.cache_key = ""
 
         return self
 
-    def save(self, path2save: str | Path = "") -> None:
+    def write(
+        self,
+        stream: BinaryIO | TextIO,
+        lang: str = "",
+        encoding: str = "utf-8",
+    ) -> None:
+        """Writing converted subtitle of one language into the stream,
+        instead of saving it into the drive. In streaming mode, lines are
+        converted while they are written, and converted subtitle is only
+        saved into the cache by "save".
+
+        Args:
+            stream (BinaryIO | TextIO): Text or binary stream to write
+            lang (str, optional): Language code in ASS. Defaults to "", first
+            language.
+            encoding (str, optional): Encoding of ASS subtitle, when stream
+            is binary. Defaults to "utf-8".
+        """
+
+        lang_keys: list[str] = (
+            list(self.result.events.keys())
+            if self.flag_stream
+            else list(self.ass_lines.keys())
+        )
+        if lang == "":
+            lang = lang_keys[0]
+
+        with self.__stage("save"):
+            write_lines(
+                stream,
+                (
+                    self.__iter_core(lang)
+                    if self.flag_stream
+                    else self.ass_lines[lang]
+                ),
+                encoding,
+            )
+
+    def save(self, path2save: str | Path = "") -> dict[str, Path]:
         """Save converted subtitle into the drive. If output path was not
         provided it will save into where is SMI file located
 
         Args:
             path2save (str | Path, optional): Input path. Defaults to "".
+
+        Returns:
+            dict[str, Path]: Language code as key and saved file as value.
+            Key is "language code.FORMAT" for other formats than ASS, and
+            "NAME/" is added in front of it for the variants.
         """
 
         ass_path: Path  # Preparing value to hole output path
@@ -462,46 +1960,366 @@ class smi2ass(AssStyle):
             ass_path = path2save  # type: ignore
             ass_path.mkdir(parents=True, exist_ok=True)
 
-        # If there is more then one language, on the file name, it will add
-        # what language is in converted  ass file.
-        # e.g test-kor.ass and test-jp.ass
-        lang_keys: list[str] = list(self.ass_lines.keys())
-        if len(lang_keys) == 1:
-            ass_path = ass_path.joinpath(f"{self.path2smi.stem}.ass")
-            save_internal(ass_path, self.ass_lines[lang_keys[0]])
+        # Lines are converted while writing in streaming mode. Converted
+        # lines are still kept when it needs to be saved into the cache.
+        lang_lines: dict[str, Iterator[str] | list[str]] = {}
+        if "ass" not in self.formats:
+            self.cache_key = ""  # ASS lines are not made
+        elif self.flag_stream:
+            lang_lines = dict(self.iter_ass())
+            if self.cache_key != "":
+                for tmp_key in lang_lines.keys():
+                    self.ass_lines[tmp_key] = []
+                    lang_lines[tmp_key] = keep_lines(
+                        lang_lines[tmp_key], self.ass_lines[tmp_key]
+                    )
         else:
-            for tmp_key in lang_keys:
-                ass_path = ass_path.joinpath(
-                    f"{self.path2smi.stem}-{tmp_key.upper()}.ass"
-                )
-                save_internal(ass_path, self.ass_lines[tmp_key])
+            lang_lines = self.ass_lines
+
+        # Files to save, other formats and variants are rendered from the
+        # same parsed subtitle
+        saved: dict[str, Path] = ass_paths(
+            ass_path, self.path2smi.stem, list(lang_lines.keys())
+        )
+        files: list[tuple[Path, Iterator[str] | list[str]]] = [
+            (file_path, lang_lines[tmp_key])
+            for tmp_key, file_path in saved.items()
+        ]
+        results: dict[str, ConversionResult] = {}
+        if self.formats != ["ass"]:
+            if not self.flag_parsed:
+                self.__parse_smi()
+            results[""] = self.result
+        results.update(self.render_variants())
+        for name, result in results.items():
+            stem: str = self.path2smi.stem + (f".{name}" if name else "")
+            for fmt in self.formats:
+                if fmt == "ass" and name == "":
+                    continue
+                for tmp_key, file_path in ass_paths(
+                    ass_path,
+                    stem,
+                    result.languages,
+                    FORMAT_EMITTERS[fmt].extension,
+                ).items():
+                    files.append((file_path, result.iter_lines(tmp_key, fmt)))
+                    saved[
+                        (f"{name}/" if name else "")
+                        + tmp_key
+                        + ("" if fmt == "ass" else f".{fmt}")
+                    ] = file_path
+
+        # Files are written at once, each by its own thread
+        with self.__stage("save"):
+            if len(files) > 1:
+                from concurrent.futures import ThreadPoolExecutor
+
+                with ThreadPoolExecutor(
+                    max_workers=min(len(files), SAVE_WORKERS)
+                ) as executor:
+                    list(executor.map(lambda tmp: save_internal(*tmp), files))
+            else:
+                for tmp in files:
+                    save_internal(*tmp)
 
         # Added message to notify where file has been saved
-        print(f"Converted file has been saved as... \n{ass_path}")
+        for file_path, _ in files:
+            print(f"Converted file has been saved as... \n{file_path}")
+
+        if self.flag_stream and self.cache_key != "":
+            with self.__stage("cache"):
+                self.cache.put(self.cache_key, self.ass_lines)
+            self.cache_key = ""
+
+        return saved
 
 
-def rgb2bgr(rgb: str) -> str:
-    """Converting hex rgb color code to hex bgr color code.
-    based on ASS specs (http://www.tcax.org/docs/ass-specs.htm), font color
-    should given as long integer BGR (blue-green-red)  value.
+# Converter of the shard worker process and limits of its warnings, see
+# "init_shard_worker"
+shard_converter: SmiConverter
+shard_diagnostics: tuple[int, int]
+
+
+def init_shard_worker(
+    lan_code: dict[str, str], max_samples: int, sample_length: int
+) -> None:
+    """Initializer of the worker process that converts part of SMI
+
+    Args:
+        lan_code (dict[str, str]): Language codes of the parent converter
+        max_samples (int): Samples of the warnings to keep for each kind
+        sample_length (int): Length of SMI source to keep for each sample
+    """
+
+    global shard_converter, shard_diagnostics
+    style: AssStyle = AssStyle()
+    style.lan_code = lan_code
+    shard_converter = SmiConverter(style)
+    shard_diagnostics = (max_samples, sample_length)
+
+
+def convert_shard(sgml: str, stack: list[str]) -> (
+    tuple[
+        list[tuple[str, int, str | None]],
+        str,
+        int,
+        TokenizerState,
+        Exception | None,
+        Diagnostics,
+    ]
+    | None
+):
+    """Tokenizing and converting part of normalized SMI in the worker
+    process. Messages are kept and returned, so they can be printed in the
+    order of the document. Error while converting is returned as well, since
+    it is only valid when the part was tokenized from the correct state.
+
+    Args:
+        sgml (str): Part of SMI, starting at <sync>
+        stack (list[str]): Open tags where the part starts
+
+    Returns:
+        tuple[list[tuple[str, int, str | None]], str, int, TokenizerState,
+        Exception | None, Diagnostics] | None: Converted blocks from
+        "convert_blocks", printed messages, number of font tags, the state
+        where tokenizer ended, error while converting and the warnings with
+        offsets in the part. None when tokenizer can't handle the part.
+    """
+
+    state: TokenizerState = TokenizerState(stack)
+    try:
+        with gc_paused():
+            sync_blocks: list[SmiTag] = list(iter_sync_blocks(sgml, state))
+    except SamiSyntaxError:
+        return None
+
+    shard_converter.font_tag_count = 0
+    shard_converter.diagnostics = Diagnostics(*shard_diagnostics)
+    events: list[tuple[str, int, str | None]] = []
+    error: Exception | None = None
+    msg: io.StringIO = io.StringIO()
+    with contextlib.redirect_stdout(msg), gc_paused():
+        try:
+            events.extend(shard_converter.convert_blocks(sync_blocks))
+        except Exception as e:
+            error = e
+
+    return (
+        events,
+        msg.getvalue(),
+        shard_converter.font_tag_count,
+        state,
+        error,
+        shard_converter.diagnostics,
+    )
+
+
+def block_sample(
+    block: "SmiTag | Tag", base: int | None
+) -> tuple[int | None, str]:
+    """Getting where <SYNC> block is located and its source, for the sample
+    of the warning
+
+    Args:
+        block (SmiTag | Tag): <SYNC> block, parsed by tokenizer or
+        BeautifulSoup
+        base (int | None): Where the source of the block starts in
+        normalized SMI, None when it is not known
+
+    Returns:
+        tuple[int | None, str]: Offset of the block in normalized SMI, None
+        when it is not known, and source of the block
+    """
+
+    if isinstance(block, SyncBlock):
+        return (
+            None if base is None else base + block.pos,
+            block.source[block.pos : block.endpos],
+        )
+    # Location is not kept by BeautifulSoup
+    return None, str(block)
+
+
+def languages_without_end(
+    events: Iterable[tuple[str, int, str | None]],
+    time_from: int,
+    time_to: int | None,
+) -> set[str]:
+    """Finding languages that have lines in the time window, but no line
+    after it, so end time of their last line is not known yet
+
+    Args:
+        events (Iterable[tuple[str, int, str | None]]): Converted blocks from
+        "convert_blocks"
+        time_from (int): Start of the window in millisecond
+        time_to (int | None): End of the window in millisecond
+
+    Returns:
+        set[str]: Language codes in ASS
+    """
+
+    if time_to is None:
+        return set()
+
+    inside: set[str] = set()
+    after: set[str] = set()
+    for lang, time_code, text in events:
+        if text is None:
+            continue
+        if time_code >= time_to:
+            after.add(lang)
+        elif time_code >= time_from:
+            inside.add(lang)
+
+    return inside - after
+
+
+@contextlib.contextmanager
+def gc_paused() -> Iterator[None]:
+    """Pausing garbage collector while many objects that are kept alive are
+    made, e.g. parse tree. Collector scans all of them over and over while
+    they are made, which makes time grow faster than the input.
+
+    Yields:
+        Iterator[None]: Nothing
+    """
+
+    flag_enabled: bool = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if flag_enabled:
+            gc.enable()
+
+
+def load_bs4() -> type:
+    """Importing BeautifulSoup when it is needed, and allowing its text type
+    in the subtitle
+
+    Returns:
+        type: BeautifulSoup class
+    """
+
+    from bs4 import BeautifulSoup, NavigableString
+
+    TEXT_TYPES.add(NavigableString)
+
+    return BeautifulSoup
+
+
+def normalize_repl(match: re.Match) -> str:
+    """Replacement function for "SMI_NORMALIZE"
+
+    Args:
+        match (re.Match): Matched part of SMI
+
+    Returns:
+        str: Replaced string
+    """
+
+    kind: str | None = match.lastgroup
+    if kind == "sync_close":
+        return ""
+    if kind == "sync_open":
+        return "</sync><sync "
+    if kind == "font":
+        # Font name can have spaces around a tag as well
+        face: str = SMI_NORMALIZE.sub(normalize_repl, match.group("face"))
+        return f'<font face="{face}"'
+    if kind == "rt_open":
+        return "<rt>"
+    if kind == "rt_close":
+        return "</rt>"
+    return "smi2ass_unicode(32)"
+
+
+def write_lines(
+    stream: BinaryIO | TextIO,
+    lines: Iterable[str],
+    encoding: str = "utf-8",
+) -> None:
+    """Writing lines into the stream. Lines for binary stream are joined up
+    to "WRITE_BUFFER_SIZE" and encoded together.
+
+    Args:
+        stream (BinaryIO | TextIO): Text or binary stream to write
+        lines (Iterable[str]): Lines to write
+        encoding (str, optional): Encoding of the lines, when stream is
+        binary. Defaults to "utf-8".
+    """
+
+    if isinstance(stream, io.TextIOBase):
+        stream.writelines(lines)
+        return
+
+    chunk: list[str] = []
+    chunk_size: int = 0
+    for tmp in lines:
+        chunk.append(tmp)
+        chunk_size += len(tmp)
+        if chunk_size >= WRITE_BUFFER_SIZE:
+            stream.write("".join(chunk).encode(encoding))
+            chunk.clear()
+            chunk_size = 0
+    if chunk:
+        stream.write("".join(chunk).encode(encoding))
+
+
+def ass_paths(
+    ass_path: Path, stem: str, lang_keys: list[str], extension: str = "ass"
+) -> dict[str, Path]:
+    """Naming converted file of each language. If there is more then one
+    language, on the file name, it will add what language is in converted
+    ass file. e.g test-KOR.ass and test-ENG.ass
 
     Args:
-        rgb (str): Hex color code input
+        ass_path (Path): Output folder
+        stem (str): File name of SMI without extension
+        lang_keys (list[str]): Language codes in ASS
+        extension (str, optional): Extension of the subtitle format. Defaults
+        to "ass".
 
     Returns:
-        str: Converted color code in BGR in hex
+        dict[str, Path]: Language code as key and file path as value
     """
 
-    return rgb[4:6] + rgb[2:4] + rgb[0:2]
+    if len(lang_keys) == 1:
+        return {lang_keys[0]: ass_path.joinpath(f"{stem}.{extension}")}
 
+    return {
+        tmp_key: ass_path.joinpath(f"{stem}-{tmp_key.upper()}.{extension}")
+        for tmp_key in lang_keys
+    }
 
-def save_internal(save_path: Path, lines: list[str]):
-    """Helper function to combine save operation. Just try to be lazy
+
+def save_internal(save_path: Path, lines: Iterator[str] | list[str]):
+    """Helper function to combine save operation. Just try to be lazy.
+    Lines are written through the buffer as they are given, so it can be
+    used with the iterator from "iter_ass".
 
     Args:
         save_path (Path): Output path
-        lines (list[str]): Data that try to write into drive
+        lines (Iterator[str] | list[str]): Data that try to write into drive
     """
 
-    with open(save_path, "w", encoding="utf-8") as f:
+    with open(
+        save_path, "w", encoding="utf-8", buffering=WRITE_BUFFER_SIZE
+    ) as f:
         f.writelines(lines)
+
+
+def keep_lines(lines: Iterator[str], kept: list[str]) -> Iterator[str]:
+    """Passing lines through while keeping them in the list
+
+    Args:
+        lines (Iterator[str]): Lines to pass
+        kept (list[str]): List where lines are added
+
+    Yields:
+        Iterator[str]: Same lines from "lines"
+    """
+
+    for tmp in lines:
+        kept.append(tmp)
+        yield tmp
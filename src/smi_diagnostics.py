@@ -0,0 +1,151 @@
+# Python built in modules
+from collections import defaultdict
+from typing import Callable
+
+# Number of samples that are kept for each kind of warning
+DIAG_MAX_SAMPLES: int = 5
+
+# Length of SMI source that is kept for each sample, in characters
+DIAG_SAMPLE_LENGTH: int = 80
+
+# Description of each kind of warning, it is used in the summary
+WARNING_KINDS: dict[str, str] = {
+    "missing_lang_class": 'no <P Class>, language is set to "UNKNOWNCC"',
+    "bad_time_code": "start time of <SYNC> can't be read",
+    "negative_time_code": "start time of <SYNC> is negative",
+    "unknown_lang_code": 'language class is not in "lan_code.json"',
+    "unknown_color": "font color name can't be converted",
+}
+
+
+class Diagnostics:
+    def __init__(
+        self,
+        max_samples: int = DIAG_MAX_SAMPLES,
+        sample_length: int = DIAG_SAMPLE_LENGTH,
+    ) -> None:
+        """Collecting warnings while SMI is converted. Every warning is
+        counted by its kind, but only first samples of each kind are kept, so
+        badly authored file with thousands of same problem stays cheap.
+
+        Args:
+            max_samples (int, optional): Samples to keep for each kind.
+            Defaults to DIAG_MAX_SAMPLES.
+            sample_length (int, optional): Length of SMI source to keep for
+            each sample. Defaults to DIAG_SAMPLE_LENGTH.
+        """
+
+        self.max_samples: int = max_samples
+        self.sample_length: int = sample_length
+        self.counts: dict[str, int] = defaultdict(int)
+        # Kind as key and samples as value, sample is {"offset": offset of
+        # <SYNC> block in normalized SMI or None, "source": beginning of the
+        # block, "detail": str}
+        self.samples: dict[str, list[dict[str, any]]] = defaultdict(list)
+
+    def __len__(self) -> int:
+        return sum(self.counts.values())
+
+    def warn(
+        self,
+        kind: str,
+        detail: str = "",
+        sample: Callable[[], tuple[int | None, str]] | None = None,
+    ) -> None:
+        """Counting a warning
+
+        Args:
+            kind (str): Kind of the warning, e.g. one in WARNING_KINDS
+            detail (str, optional): Value that caused the warning. Defaults
+            to "".
+            sample (Callable[[], tuple[int | None, str]] | None, optional):
+            Function that gives offset and source of the block, it is only
+            called when the sample is kept. Defaults to None.
+        """
+
+        self.counts[kind] += 1
+        if len(self.samples[kind]) >= self.max_samples:
+            return
+
+        offset, source = sample() if sample is not None else (None, "")
+        self.samples[kind].append(
+            {
+                "offset": offset,
+                "source": source[: self.sample_length],
+                "detail": detail,
+            }
+        )
+
+    def merge(self, other: "Diagnostics", offset: int | None = 0) -> None:
+        """Adding warnings that are collected separately, e.g. in the process
+        that converted part of SMI
+
+        Args:
+            other (Diagnostics): Warnings to add
+            offset (int | None, optional): Where the part starts in SMI, it
+            is added on the offsets of the samples. None when it is not
+            known. Defaults to 0.
+        """
+
+        for kind, value in other.counts.items():
+            self.counts[kind] += value
+            samples: list[dict[str, any]] = self.samples[kind]
+            for tmp in other.samples[kind]:
+                if len(samples) >= self.max_samples:
+                    break
+                samples.append(
+                    tmp
+                    | {
+                        "offset": (
+                            None
+                            if tmp["offset"] is None or offset is None
+                            else tmp["offset"] + offset
+                        )
+                    }
+                )
+
+    def report(self) -> dict[str, any]:
+        """Composing the warnings for JSON report
+
+        Returns:
+            dict[str, any]: {"counts": {kind: int}, "samples": {kind:
+            [sample]}}
+        """
+
+        return {
+            "counts": dict(self.counts),
+            "samples": {
+                key: list(value)
+                for key, value in self.samples.items()
+                if value
+            },
+        }
+
+    def summary(self) -> str:
+        """Composing summary of the warnings for one file
+
+        Returns:
+            str: Count of each kind followed by its first sample, empty
+            string when there is no warning
+        """
+
+        lines: list[str] = []
+        for kind, value in sorted(
+            self.counts.items(), key=lambda item: -item[1]
+        ):
+            lines.append(
+                f"Warning: {WARNING_KINDS.get(kind, kind)} ({value} times)"
+            )
+            if not self.samples[kind]:
+                continue
+            first: dict[str, any] = self.samples[kind][0]
+            if first["offset"] is not None:
+                lines.append(
+                    f"  at {first['offset']}: {first['source'].strip()}"
+                )
+            elif first["source"] != "":
+                lines.append(f"  {first['source'].strip()}")
+            elif first["detail"] != "":
+                lines.append(f"  {first['detail']}")
+
+        return "\n".join(lines)
@@ -0,0 +1,154 @@
+# Python built in modules
+import codecs
+
+# Legacy encodings that are tried before running chardet. Most of SMI files
+# that are not in UTF-8 are Korean, and CP949 is superset of EUC-KR.
+LEGACY_ENCODINGS: list[str] = ["cp949"]
+
+# Size of the sample that is given to chardet, in bytes
+CHARDET_SAMPLE_SIZE: int = 64 * 1024
+
+# Size of the chunk that is decoded at once by "detect_encoding", in bytes
+DETECT_CHUNK_SIZE: int = 1024 * 1024
+
+# Byte order marks and matching encodings. UTF-32 has to be checked before
+# UTF-16, since UTF-32 LE BOM starts with UTF-16 LE BOM.
+BOMS: list[tuple[bytes, str]] = [
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+# Which step of "decode_smi" found the encoding
+TIER_BOM: str = "bom"
+TIER_UTF8: str = "utf-8"
+TIER_LEGACY: str = "legacy"
+TIER_CHARDET: str = "chardet"
+
+
+def decode_smi(
+    raw: bytes | bytearray | memoryview,
+    legacy_encodings: list[str] = LEGACY_ENCODINGS,
+) -> tuple[str, str, str]:
+    """Decode SMI file with the encoding found by tiered detection. Encoding
+    is tested by decoding the content, so decoded text is reused when it is
+    successful. Any bytes-like object can be given, it is decoded without
+    copying it into bytes.
+
+    Args:
+        raw (bytes | bytearray | memoryview): Content of SMI file
+        legacy_encodings (list[str], optional): Encodings to try after UTF-8.
+        Defaults to LEGACY_ENCODINGS.
+
+    Returns:
+        tuple[str, str, str]: Decoded text, encoding and tier that found the
+        encoding
+    """
+
+    text: str | None = None
+    encoding: str = "utf-8"
+    tier: str = TIER_CHARDET
+
+    # 1st tier, check BOM
+    for bom, bom_encoding in BOMS:
+        if raw[: len(bom)] == bom:
+            encoding, tier = bom_encoding, TIER_BOM
+            text = str(raw, encoding, errors="replace")
+            break
+
+    # 2nd and 3rd tier, try strict decode with UTF-8 and legacy encodings
+    if text is None:
+        for tmp_encoding, tmp_tier in [(TIER_UTF8, TIER_UTF8)] + [
+            (tmp, TIER_LEGACY) for tmp in legacy_encodings
+        ]:
+            try:
+                text = str(raw, tmp_encoding)
+            except (UnicodeDecodeError, LookupError):
+                continue
+            encoding, tier = tmp_encoding, tmp_tier
+            break
+
+    # Last tier, let chardet guess encoding from the sample. It is imported
+    # only here since it is slow to import.
+    if text is None:
+        import chardet
+
+        encoding = (
+            chardet.detect(bytes(raw[:CHARDET_SAMPLE_SIZE]))["encoding"]
+            or "utf-8"
+        )
+        try:
+            text = str(raw, encoding, errors="replace")
+        except LookupError:  # Python does not know the encoding
+            encoding = "utf-8"
+            text = str(raw, encoding, errors="replace")
+
+    return normalize_newlines(text), encoding, tier
+
+
+def normalize_newlines(text: str) -> str:
+    """Same as reading file in text mode, all newlines are converted to LF
+
+    Args:
+        text (str): Decoded SMI
+
+    Returns:
+        str: SMI with LF newlines
+    """
+
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+
+    return text
+
+
+def detect_encoding(
+    raw: bytes | bytearray | memoryview,
+    legacy_encodings: list[str] = LEGACY_ENCODINGS,
+) -> tuple[str, str, str]:
+    """Finding encoding of SMI file with same tiers with "decode_smi", but
+    content is decoded in chunks and decoded text is not kept
+
+    Args:
+        raw (bytes | bytearray | memoryview): Content of SMI file, it can be
+        memory-mapped file
+        legacy_encodings (list[str], optional): Encodings to try after UTF-8.
+        Defaults to LEGACY_ENCODINGS.
+
+    Returns:
+        tuple[str, str, str]: Encoding, tier that found the encoding and the
+        error handler to decode the content with ("strict" or "replace")
+    """
+
+    # 1st tier, check BOM
+    for bom, bom_encoding in BOMS:
+        if raw[: len(bom)] == bom:
+            return bom_encoding, TIER_BOM, "replace"
+
+    # 2nd and 3rd tier, try strict decode with UTF-8 and legacy encodings
+    for tmp_encoding, tmp_tier in [(TIER_UTF8, TIER_UTF8)] + [
+        (tmp, TIER_LEGACY) for tmp in legacy_encodings
+    ]:
+        try:
+            decoder = codecs.getincrementaldecoder(tmp_encoding)()
+            for pos in range(0, len(raw), DETECT_CHUNK_SIZE):
+                decoder.decode(raw[pos : pos + DETECT_CHUNK_SIZE])
+            decoder.decode(b"", final=True)
+        except (UnicodeDecodeError, LookupError):
+            continue
+        return tmp_encoding, tmp_tier, "strict"
+
+    # Last tier, let chardet guess encoding from the sample
+    import chardet
+
+    encoding: str = (
+        chardet.detect(bytes(raw[:CHARDET_SAMPLE_SIZE]))["encoding"] or "utf-8"
+    )
+    try:
+        codecs.lookup(encoding)
+    except LookupError:  # Python does not know the encoding
+        encoding = "utf-8"
+
+    return encoding, TIER_CHARDET, "replace"
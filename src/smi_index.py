@@ -0,0 +1,178 @@
+# Python built in modules
+import mmap
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Iterator
+
+# Opening of <SYNC> tag, same with the pattern in "SMI_NORMALIZE", so the
+# blocks are split at the same place where </sync> is added. Start time is
+# captured when it is plain number inside of the tag.
+SYNC_OPEN: re.Pattern = re.compile(
+    rb"< *[Ss][Yy][Nn][Cc] +(?![ <])"
+    rb"(?:[^<>]*?(?<![\w-])[Ss][Tt][Aa][Rr][Tt]\s*=\s*[\"']?\s*"
+    rb"([-+]?[0-9]+)(?=[\"'\s>/]))?"
+)
+
+
+class SyncIndex:
+    """Byte offsets and start times of <SYNC> tags in SMI file, it is made
+    with single scan of the file without decoding it
+    """
+
+    __slots__ = ("offsets", "starts", "size", "flag_sorted")
+
+    def __init__(self, size: int) -> None:
+        self.offsets: array = array("q")  # Where <SYNC> tag starts
+        # Start time in millisecond, -1 when it is not plain number
+        self.starts: array = array("q")
+        self.size: int = size  # Size of the file
+        # Flag every start time is known and they are in ascending order, so
+        # blocks can be found by binary search
+        self.flag_sorted: bool = True
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def block_range(self, idx: int) -> tuple[int, int]:
+        """Byte range of <SYNC> block, until next <SYNC> tag
+
+        Args:
+            idx (int): Index of the block
+
+        Returns:
+            tuple[int, int]: Start and end offset of the block
+        """
+
+        end: int = (
+            self.offsets[idx + 1] if idx + 1 < len(self.offsets) else self.size
+        )
+        return self.offsets[idx], end
+
+    def iter_parts(
+        self, part_size: int, first: int = 0, stop: int | None = None
+    ) -> Iterator[tuple[int, int]]:
+        """Grouping consecutive <SYNC> blocks into parts of about
+        "part_size" bytes
+
+        Args:
+            part_size (int): Size of each part in bytes, part is larger when
+            single block is larger than it
+            first (int, optional): Index of the first block. Defaults to 0.
+            stop (int | None, optional): Index after the last block. Defaults
+            to None, until the last block.
+
+        Yields:
+            Iterator[tuple[int, int]]: Start and end offset of each part
+        """
+
+        if stop is None:
+            stop = len(self.offsets)
+        idx: int = first
+        while idx < stop:
+            nxt: int = bisect_left(
+                self.offsets, self.offsets[idx] + part_size, idx + 1, stop
+            )
+            yield self.offsets[idx], self.block_range(nxt - 1)[1]
+            idx = nxt
+
+    def find_window(
+        self, time_from: int, time_to: int | None
+    ) -> tuple[int, int]:
+        """Finding blocks that start in the time window by binary search,
+        with the blocks that start at the first time after the window, since
+        they give end time of the last lines. Languages are not known by the
+        index, so "extend_window" gives more blocks when a language has no
+        line in them. Only used when "flag_sorted".
+
+        Args:
+            time_from (int): Start of the window in millisecond
+            time_to (int | None): End of the window in millisecond, it is not
+            included. None for the end of the subtitle.
+
+        Returns:
+            tuple[int, int]: Index of the first block and index after the
+            last block
+        """
+
+        first: int = bisect_left(self.starts, time_from)
+        if time_to is None:
+            return first, len(self.starts)
+
+        stop: int = bisect_left(self.starts, time_to, first)
+        if stop < len(self.starts):
+            stop = bisect_right(self.starts, self.starts[stop], stop)
+        return first, stop
+
+    def extend_window(self, stop: int, count: int) -> int:
+        """Adding blocks after the blocks from "find_window", blocks with
+        same start time are not split
+
+        Args:
+            stop (int): Index after the last block
+            count (int): Number of blocks to add at least
+
+        Returns:
+            int: New index after the last block
+        """
+
+        stop = min(stop + count, len(self.starts))
+        if stop < len(self.starts):
+            stop = bisect_right(self.starts, self.starts[stop - 1], stop)
+        return stop
+
+
+def build_sync_index(raw: bytes | bytearray | memoryview) -> SyncIndex:
+    """Finding <SYNC> tags in SMI file. File has to be in encoding that
+    keeps ASCII characters as it is, e.g. UTF-8 or CP949.
+
+    Args:
+        raw (bytes | bytearray | memoryview): Content of SMI file, it can be
+        memory-mapped file
+
+    Returns:
+        SyncIndex: Offsets and start times of <SYNC> tags
+    """
+
+    index: SyncIndex = SyncIndex(len(raw))
+    last: int = -1  # Start time of previous block
+    for match in SYNC_OPEN.finditer(raw):
+        index.offsets.append(match.start())
+        if match.group(1) is None:
+            index.starts.append(-1)
+            index.flag_sorted = False
+            continue
+
+        start: int = int(match.group(1))
+        index.starts.append(start)
+        if start < last:
+            index.flag_sorted = False
+        last = start
+
+    return index
+
+
+def map_smi(smi_path: str | Path) -> mmap.mmap | bytes:
+    """Memory-mapping SMI file for reading, pages of the file are read by OS
+    only when they are accessed. Caller has to close the mapped file.
+
+    Args:
+        smi_path (str | Path): SMI file path
+
+    Raises:
+        IOError: Neither file is not exist or cannot access file
+
+    Returns:
+        mmap.mmap | bytes: Mapped file, empty bytes for empty file since it
+        can't be mapped
+    """
+
+    try:
+        with open(smi_path, "rb") as f:
+            try:
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # Empty file
+                return b""
+    except IOError as e:
+        raise IOError(f"Failed to open the file {smi_path}: {e}")
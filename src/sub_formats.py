@@ -0,0 +1,374 @@
+# Python built in modules
+import html
+import re
+from abc import ABC, abstractmethod
+from typing import Sequence
+
+# Converted text of each <SYNC> block is kept in format neutral markup, and
+# it is turned into ASS, SRT or WebVTT by the emitters when lines are
+# composed. Markup is plain text with tokens between MARKUP_MARK, so events
+# stay as compact as strings.
+MARKUP_MARK: str = "\x01"
+
+# Tokens of the markup
+# b1, b0, i1, i0, u1, u0, s1, s0: Opening and closing of bold, italic,
+# underline and strike
+# N: Next line
+# fCOLOR=FACE: Opening font tag, color and face are optional. Color is the
+# one in SMI, hex code with or without "#".
+# cCOLOR: Closing font tag that had color, COLOR is color of the parent font
+# tag and empty when there is no parent
+MARKUP_TOKEN: re.Pattern = re.compile("\x01([^\x01]*)\x01")
+
+# Markup of the SMI tags, as [opening, closing]
+MARKUP_TAGS: dict[str, tuple[str, str]] = {
+    "b": ("\x01b1\x01", "\x01b0\x01"),
+    "i": ("\x01i1\x01", "\x01i0\x01"),
+    "u": ("\x01u1\x01", "\x01u0\x01"),
+    "s": ("\x01s1\x01", "\x01s0\x01"),
+}
+MARKUP_BREAK: str = "\x01N\x01"
+
+
+def markup_font(color: str | None, face: str | None) -> str:
+    """Markup of opening font tag
+
+    Args:
+        color (str | None): Color in SMI, None when there is no color
+        face (str | None): Font face, None when there is no face
+
+    Returns:
+        str: Markup, empty string when there is neither color nor face
+    """
+
+    if color is None and face is None:
+        return ""
+    if face is None:
+        return f"\x01f{color}\x01"
+    return f"\x01f{color or ''}={face.replace(MARKUP_MARK, '')}\x01"
+
+
+def markup_font_close(parent: str | None) -> str:
+    """Markup of closing font tag that had color
+
+    Args:
+        parent (str | None): Color of the parent font tag, None when there is
+        no parent
+
+    Returns:
+        str: Markup
+    """
+
+    return f"\x01c{parent or ''}\x01"
+
+
+def split_font(token: str) -> tuple[str, str | None]:
+    """Getting color and face from opening font token
+
+    Args:
+        token (str): Token without MARKUP_MARK, starting with "f"
+
+    Returns:
+        tuple[str, str | None]: Color, empty string when there is no color,
+        and face, None when there is no face
+    """
+
+    color, _, face = token[1:].partition("=")
+    return color, face if "=" in token else None
+
+
+def hex_color(color: str) -> str:
+    """Hex color code in RGB from the color in the markup
+
+    Args:
+        color (str): Color in the markup
+
+    Returns:
+        str: Hex color code without "#", e.g. "ff0000"
+    """
+
+    return color.lstrip("#")[:6].lower()
+
+
+class SubtitleEmitter(ABC):
+    """Composer of one subtitle format from the events. Emitters are shared
+    by the threads, so they should not keep state of one subtitle. New format
+    can be added to FORMAT_EMITTERS.
+    """
+
+    # Extension of the saved file
+    extension: str = ""
+
+    def compose_header(
+        self, ass_header: str, events: Sequence[tuple[int, str]]
+    ) -> str:
+        """Composing beginning of the subtitle
+
+        Args:
+            ass_header (str): ASS header composed from the style
+            events (Sequence[tuple[int, str]]): Start time and markup of all
+            events, before time offset
+
+        Returns:
+            str: Header of the subtitle
+        """
+
+        return ""
+
+    @abstractmethod
+    def compose_line(self, idx: int, start: int, end: int, text: str) -> str:
+        """Composing one line of the subtitle
+
+        Args:
+            idx (int): Number of the line, starting from 1
+            start (int): Start time in millisecond
+            end (int): End time in millisecond
+            text (str): Text in the markup
+
+        Returns:
+            str: Composed line, empty string to skip the line
+        """
+
+    @abstractmethod
+    def convert_token(self, token: str) -> str:
+        """Converting one token of the markup
+
+        Args:
+            token (str): Token without MARKUP_MARK
+
+        Returns:
+            str: Converted token
+        """
+
+    def convert_text(self, text: str) -> str:
+        """Converting text in the markup
+
+        Args:
+            text (str): Text in the markup
+
+        Returns:
+            str: Converted text
+        """
+
+        if MARKUP_MARK not in text:
+            return text
+
+        # Tokens are at the odd places
+        parts: list[str] = text.split(MARKUP_MARK)
+        parts[1::2] = map(self.convert_token, parts[1::2])
+        return "".join(parts)
+
+
+class AssEmitter(SubtitleEmitter):
+    extension = "ass"
+
+    def __init__(self) -> None:
+        # Converted tokens, same tokens are used over and over in the file
+        self.token_cache: dict[str, str] = {}
+
+    def compose_header(
+        self, ass_header: str, events: Sequence[tuple[int, str]]
+    ) -> str:
+        return ass_header
+
+    def compose_line(self, idx: int, start: int, end: int, text: str) -> str:
+        return "Dialogue: 0,%s,%s,Default,,0000,0000,0000,,%s\n" % (
+            ms2timestamp(start),
+            ms2timestamp(end),
+            self.convert_text(text),
+        )
+
+    def convert_text(self, text: str) -> str:
+        if MARKUP_MARK not in text:
+            return text
+
+        parts: list[str] = text.split(MARKUP_MARK)
+        cache: dict[str, str] = self.token_cache
+        parts[1::2] = [
+            cache.get(tmp) or self.convert_token(tmp) for tmp in parts[1::2]
+        ]
+        return "".join(parts)
+
+    def convert_token(self, token: str) -> str:
+        converted: str | None = self.token_cache.get(token)
+        if converted is not None:
+            return converted
+
+        if token == "N":
+            converted = "\\N"
+        elif token[0] == "f":
+            color, face = split_font(token)
+            converted = "{%s%s}" % (
+                f"\\c&H{rgb2bgr(color)}&" if color else "",
+                "" if face is None else f"\\fn{face}",
+            )
+        elif token[0] == "c":
+            converted = (
+                f"{{\\c&H{rgb2bgr(token[1:])}&}}" if token[1:] else "{\\c}"
+            )
+        else:
+            converted = f"{{\\{token}}}"  # Bold, italic, underline, strike
+
+        self.token_cache[token] = converted
+        return converted
+
+
+class SrtEmitter(SubtitleEmitter):
+    """SubRip subtitle. Font color is kept as <font color>, and font face is
+    not kept.
+    """
+
+    extension = "srt"
+
+    def compose_line(self, idx: int, start: int, end: int, text: str) -> str:
+        text = join_text_lines(self.convert_text(text))
+        if text == "":
+            return ""
+        return "%d\n%s --> %s\n%s\n\n" % (
+            idx,
+            ms2clock(start, ","),
+            ms2clock(end, ","),
+            text,
+        )
+
+    def convert_token(self, token: str) -> str:
+        if token == "N":
+            return "\n"
+        if token[0] == "f":
+            color, _ = split_font(token)
+            return f'<font color="#{hex_color(color)}">' if color else ""
+        if token[0] == "c":
+            return "</font>"
+        return f"<{token[0]}>" if token[1] == "1" else f"</{token[0]}>"
+
+
+class VttEmitter(SubtitleEmitter):
+    """WebVTT subtitle. Font color is kept as class of <c> tag that is styled
+    in the header, and strike and font face are not kept.
+    """
+
+    extension = "vtt"
+
+    def compose_header(
+        self, ass_header: str, events: Sequence[tuple[int, str]]
+    ) -> str:
+        # Colors should be styled before the first cue
+        colors: set[str] = set()
+        for _, text in events:
+            if "\x01f" in text:
+                for token in MARKUP_TOKEN.findall(text):
+                    if token[0] == "f" and (color := split_font(token)[0]):
+                        colors.add(hex_color(color))
+
+        if not colors:
+            return "WEBVTT\n\n"
+        return (
+            "WEBVTT\n\nSTYLE\n"
+            + "".join(
+                f"::cue(.c_{tmp}) {{ color: #{tmp}; }}\n"
+                for tmp in sorted(colors)
+            )
+            + "\n"
+        )
+
+    def compose_line(self, idx: int, start: int, end: int, text: str) -> str:
+        # Text can't have "<" and "&" other than the tags
+        text = join_text_lines(
+            self.convert_text(html.escape(text, quote=False))
+        )
+        if text == "":
+            return ""
+        return "%s --> %s\n%s\n\n" % (
+            ms2clock(start, "."),
+            ms2clock(end, "."),
+            text,
+        )
+
+    def convert_token(self, token: str) -> str:
+        if token == "N":
+            return "\n"
+        if token[0] == "f":
+            color, _ = split_font(token)
+            return f"<c.c_{hex_color(color)}>" if color else ""
+        if token[0] == "c":
+            return "</c>"
+        if token[0] == "s":
+            return ""
+        return f"<{token[0]}>" if token[1] == "1" else f"</{token[0]}>"
+
+
+# Emitter of each format, format name is used as key
+FORMAT_EMITTERS: dict[str, SubtitleEmitter] = {
+    "ass": AssEmitter(),
+    "srt": SrtEmitter(),
+    "vtt": VttEmitter(),
+}
+
+
+def join_text_lines(text: str) -> str:
+    """Removing blank lines in the text, since blank line ends a cue in SRT
+    and WebVTT
+
+    Args:
+        text (str): Converted text
+
+    Returns:
+        str: Text without blank lines, empty string when there is no text
+    """
+
+    if "\n" not in text:
+        return text if text.strip() else ""
+    return "\n".join(tmp for tmp in text.split("\n") if tmp.strip())
+
+
+def ms2timestamp(ms: int) -> str:
+    """Converting millisecond to h:mm:ss.ff time format
+
+    Args:
+        ms (int): Time in millisecond
+
+    Returns:
+        str: Converted time stamp
+    """
+
+    hours = int(ms / 3600000)
+    ms -= hours * 3600000
+    minutes = int(ms / 60000)
+    ms -= minutes * 60000
+    seconds = int(ms / 1000)
+    ms -= seconds * 1000
+    ms = round(ms / 10)
+    return "%01d:%02d:%02d.%02d" % (hours, minutes, seconds, ms)
+
+
+def ms2clock(ms: int, separator: str) -> str:
+    """Converting millisecond to hh:mm:ss,mmm time format of SRT and WebVTT
+
+    Args:
+        ms (int): Time in millisecond
+        separator (str): Separator of millisecond, "," for SRT and "." for
+        WebVTT
+
+    Returns:
+        str: Converted time stamp
+    """
+
+    seconds, ms = divmod(ms, 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return "%02d:%02d:%02d%s%03d" % (hours, minutes, seconds, separator, ms)
+
+
+def rgb2bgr(rgb: str) -> str:
+    """Converting hex rgb color code to hex bgr color code.
+    based on ASS specs (http://www.tcax.org/docs/ass-specs.htm), font color
+    should given as long integer BGR (blue-green-red)  value.
+
+    Args:
+        rgb (str): Hex color code input
+
+    Returns:
+        str: Converted color code in BGR in hex
+    """
+
+    return rgb[4:6] + rgb[2:4] + rgb[0:2]
@@ -0,0 +1,75 @@
+# Python built in modules
+import json
+import os
+from pathlib import Path
+
+# PIP installed modules
+import pytest
+
+# Custom modules
+from ass_settings import SETTING_CACHE, AssStyle, load_setting
+from default_settings import DEFAULT_ASS_STYLES, DEFAULT_LAN_CODE
+
+SETTING_DIR: Path = Path(__file__).resolve().parents[2].joinpath("setting")
+
+
+def test_header_cache() -> None:
+    style: AssStyle = AssStyle()
+    setters: list[tuple[str, tuple, str]] = [
+        ("update_title", ("Test Title",), "Title: Test Title"),
+        ("update_font_name", ("Test Font",), ",Test Font,"),
+        ("update_font_size", (123,), ",123,"),
+        ("update_res", (3840, 2160), "PlayResX: 3840\nPlayResY: 2160"),
+    ]
+
+    # Header is composed once, and again after each setter
+    for setter, args, expected in setters:
+        header: str = style.ass_header()
+        assert style.ass_header() is header
+        assert expected not in header
+
+        getattr(style, setter)(*args)
+        assert style.header_cache is None
+        assert expected in style.ass_header()
+
+
+def test_setting_cache(tmp_path: Path) -> None:
+    setting_path: Path = tmp_path.joinpath("lan_code.json")
+    lan_code: dict[str, str] = {"KRCC": "kor", "TESTCC": "tst"}
+    setting_path.write_text(json.dumps(lan_code))
+    os.utime(setting_path, ns=(10**18, 10**18))
+
+    assert AssStyle(str(tmp_path)).lan_code == lan_code
+    assert SETTING_CACHE[str(setting_path)][1] == lan_code
+
+    # Same modification time, so the file is not read again
+    setting_path.write_text(json.dumps({"TESTCC": "new"}))
+    os.utime(setting_path, ns=(10**18, 10**18))
+    loaded: dict[str, str] = load_setting("lan_code.json", tmp_path)
+    assert loaded == lan_code
+    # Changing the returned copy does not change the cache
+    loaded["TESTCC"] = "changed"
+    assert load_setting("lan_code.json", tmp_path) == lan_code
+
+    # File is read again when it is modified
+    os.utime(setting_path, ns=(2 * 10**18, 2 * 10**18))
+    assert AssStyle(str(tmp_path)).lan_code == {"TESTCC": "new"}
+
+
+def test_default_settings(tmp_path: Path) -> None:
+    # Bundled settings are same as the files in "setting" folder
+    assert load_setting("lan_code.json", SETTING_DIR) == DEFAULT_LAN_CODE
+    assert load_setting("ass_styles.json", SETTING_DIR) == DEFAULT_ASS_STYLES
+
+    # Bundled settings are used when there is no setting file
+    style: AssStyle = AssStyle(str(tmp_path))
+    assert style.lan_code == DEFAULT_LAN_CODE
+    assert style.ass_style == DEFAULT_ASS_STYLES
+    assert style.ass_header() == AssStyle(str(SETTING_DIR)).ass_header()
+
+    # Changing the style does not change the bundled one
+    style.update_font_name("Test Font")
+    assert DEFAULT_ASS_STYLES["style"]["Fontname"] != "Test Font"
+
+    with pytest.raises(FileNotFoundError):
+        load_setting("lan_code.json", tmp_path)
@@ -0,0 +1,58 @@
+# Python built in modules
+import asyncio
+import subprocess
+import sys
+from pathlib import Path
+
+# Custom modules
+from ass_settings import AssStyle
+from conv_async import convert_batch
+from smi2ass import smi2ass
+
+SRC_DIR: Path = Path(__file__).resolve().parents[1]
+TEST_SMIS_DIR: Path = Path(__file__).resolve().parents[2].joinpath("test_smis")
+
+
+def test_convert_batch(tmp_path: Path) -> None:
+    smi_paths: list[str] = [
+        str(tmp) for tmp in sorted(TEST_SMIS_DIR.glob("*.smi"))
+    ] + [str(tmp_path.joinpath("missing.smi"))]
+
+    results: list[dict[str, any]] = asyncio.run(
+        convert_batch(smi_paths, AssStyle(), tmp_path, max_in_flight=1)
+    )
+
+    # Results are in the order of the input
+    assert [tmp["file"] for tmp in results] == smi_paths
+    assert results[-1]["error"] is not None
+    for result in results[:-1]:
+        assert result["error"] is None
+        expected: dict[str, list[str]] = (
+            smi2ass().to_ass(result["file"]).ass_lines
+        )
+        for key, file_path in result["outputs"].items():
+            with open(file_path, "r", encoding="utf-8") as f:
+                assert f.read() == "".join(expected[key])
+
+
+def test_pipeline_options(tmp_path: Path) -> None:
+    smi_path: str = str(TEST_SMIS_DIR.joinpath("Bakemonogatari-01.smi"))
+
+    # Options that pipeline does not support are rejected
+    for option in (
+        ["--format", "srt"],
+        ["--variants", "variants.json"],
+        ["--lazy"],
+        ["--shards", "2"],
+    ):
+        process: subprocess.CompletedProcess = subprocess.run(
+            [sys.executable, str(SRC_DIR.joinpath("__main__.py"))]
+            + ["--pipeline", "-o", str(tmp_path)]
+            + option
+            + [smi_path],
+            capture_output=True,
+            text=True,
+        )
+        assert process.returncode == 2
+        assert f"--pipeline cannot be used with {option[0]}" in process.stderr
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,97 @@
+# Python built in modules
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# Custom modules
+from conv_cache import ConversionCache, make_key
+from smi2ass import smi2ass
+
+SRC_DIR: Path = Path(__file__).resolve().parents[1]
+TEST_SMIS_DIR: Path = Path(__file__).resolve().parents[2].joinpath("test_smis")
+
+
+def test_hit_and_miss(tmp_path: Path) -> None:
+    smi_path: Path = TEST_SMIS_DIR.joinpath("Bakemonogatari-01.smi")
+    cache: ConversionCache = ConversionCache(tmp_path.joinpath("cache"))
+
+    # First conversion is saved into the cache, and second one is read
+    saved: dict[str, bytes] = {}
+    for tmp_dir in ("first", "second", "plain"):
+        tmp_smi: smi2ass = smi2ass()
+        if tmp_dir != "plain":
+            tmp_smi.set_cache(cache)
+        for tmp in (
+            tmp_smi.to_ass(str(smi_path))
+            .save(tmp_path.joinpath(tmp_dir))
+            .values()
+        ):
+            saved[tmp_dir] = tmp.read_bytes()
+
+    assert cache.stats == {
+        "hits": 1,
+        "misses": 1,
+        "bytes_saved": smi_path.stat().st_size,
+    }
+    # Cached subtitle is same with converting without the cache
+    assert saved["first"] == saved["second"] == saved["plain"]
+
+    # Other settings are not read from the same entry
+    tmp_smi = smi2ass()
+    tmp_smi.set_cache(cache)
+    tmp_smi.set_time_offset(500)
+    tmp_smi.to_ass(str(smi_path))
+    assert cache.stats["misses"] == 2
+
+
+def test_eviction(tmp_path: Path) -> None:
+    cache: ConversionCache = ConversionCache(tmp_path, max_size=1024 * 1024)
+    lines: dict[str, list[str]] = {"kor": ["x" * 300 * 1024]}
+    keys: list[str] = [make_key(bytes([tmp]), {}) for tmp in range(4)]
+    for idx, key in enumerate(keys[:3]):
+        cache.put(key, lines)
+        # Access time is kept as modification time
+        os.utime(tmp_path.joinpath(key + ".json"), (idx, idx))
+
+    # Least recently used one is removed, not the one that was read
+    cache.get(keys[0])
+    cache.put(keys[3], lines)
+    assert cache.get(keys[1]) is None
+    assert all(cache.get(tmp) == lines for tmp in (keys[0], keys[2], keys[3]))
+    assert cache.total_size <= cache.max_size
+
+    # Saving same entry again does not grow the size
+    cache = ConversionCache(tmp_path.joinpath("other"))
+    for _ in range(2):
+        cache.put(keys[0], lines)
+    assert cache.total_size == sum(
+        tmp.stat().st_size for tmp in cache.cache_dir.iterdir()
+    )
+
+
+def test_duplicates_with_jobs(tmp_path: Path) -> None:
+    smi_path: str = str(TEST_SMIS_DIR.joinpath("Bakemonogatari-01.smi"))
+    other_path: str = str(TEST_SMIS_DIR.joinpath("Angel Beats! 01.smi"))
+
+    # Same file is converted once, and the copy is read from the cache
+    output: str = subprocess.run(
+        [
+            sys.executable,
+            str(SRC_DIR.joinpath("__main__.py")),
+            "-j",
+            "2",
+            "--cache_dir",
+            str(tmp_path.joinpath("cache")),
+            "-o",
+            str(tmp_path.joinpath("out")),
+            smi_path,
+            other_path,
+            smi_path,
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    assert output.count("Found converted subtitle in the cache") == 1
+    assert "Cache hits: 1, misses: 2" in output
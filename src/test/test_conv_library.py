@@ -0,0 +1,49 @@
+# Python built in modules
+import os
+import shutil
+from pathlib import Path
+
+# Custom modules
+from conv_library import sync_library
+from smi2ass import smi2ass
+
+TEST_SMIS_DIR: Path = Path(__file__).resolve().parents[2].joinpath("test_smis")
+
+
+def test_sync_library(tmp_path: Path) -> None:
+    library: Path = tmp_path.joinpath("library")
+    output_dir: Path = tmp_path.joinpath("out")
+    for tmp_name, tmp_dir in (
+        ("Bakemonogatari-01.smi", "a"),
+        ("Angel Beats! 01.smi", "a/b"),
+        ("Durarara!! - 01.smi", "c"),
+    ):
+        library.joinpath(tmp_dir).mkdir(parents=True, exist_ok=True)
+        shutil.copy(
+            TEST_SMIS_DIR.joinpath(tmp_name), library.joinpath(tmp_dir)
+        )
+
+    summary: dict[str, any] = sync_library(smi2ass(), [library], output_dir)
+    assert len(summary["converted"]) == 3
+    assert output_dir.joinpath("a", "b", "Angel Beats! 01.ass").exists()
+
+    # Nothing is converted again, even when only modification time changed
+    smi_path: Path = library.joinpath("a", "Bakemonogatari-01.smi")
+    os.utime(smi_path, ns=(0, 0))
+    summary = sync_library(smi2ass(), [library], output_dir)
+    assert summary["converted"] == [] and summary["unchanged"] == 3
+
+    # Changed file and changed settings are converted again
+    with open(smi_path, "ab") as f:
+        f.write(b"\n")
+    assert sync_library(smi2ass(), [library], output_dir)["converted"] == [
+        str(smi_path)
+    ]
+    tmp_smi: smi2ass = smi2ass()
+    tmp_smi.update_title("Changed")
+    assert len(sync_library(tmp_smi, [library], output_dir)["converted"]) == 3
+
+    # Converted files of deleted SMI are reported
+    os.remove(smi_path)
+    summary = sync_library(tmp_smi, [library], output_dir)
+    assert list(summary["orphaned"].keys()) == [str(smi_path)]
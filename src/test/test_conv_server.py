@@ -0,0 +1,51 @@
+# Python built in modules
+import io
+import json
+from pathlib import Path
+
+# Custom modules
+from conv_server import serve
+from smi2ass import smi2ass
+
+TEST_SMIS_DIR: Path = Path(__file__).resolve().parents[2].joinpath("test_smis")
+
+
+def test_serve(tmp_path: Path) -> None:
+    base: smi2ass = smi2ass()
+    jobs: list[dict[str, any]] = [
+        {
+            "id": 1,
+            "input": str(TEST_SMIS_DIR.joinpath("Bakemonogatari-01.smi")),
+        },
+        {
+            "id": 2,
+            "content": "<SAMI><BODY><SYNC Start=100><P Class=KRCC>a</SAMI>",
+            "return_content": True,
+            "style": {"font": "Test Font"},
+        },
+        {"id": 3, "input": str(tmp_path.joinpath("missing.smi"))},
+    ]
+    stdout: io.StringIO = io.StringIO()
+    serve(
+        base,
+        str(tmp_path),
+        jobs=2,
+        stdin=io.StringIO(
+            # Valid JSON that is not a job does not stop the server
+            '[1, 2]\n"x"\n'
+            + "".join(json.dumps(tmp) + "\n" for tmp in jobs)
+        ),
+        stdout=stdout,
+    )
+
+    outputs: list[dict[str, any]] = list(
+        map(json.loads, stdout.getvalue().split("\n")[:-1])
+    )
+    assert [tmp["ok"] for tmp in outputs if tmp["id"] is None] == [False] * 2
+    results: dict[int, dict[str, any]] = {tmp["id"]: tmp for tmp in outputs}
+    assert Path(results[1]["outputs"]["kor"]).exists()
+    assert "Test Font" in results[2]["content"]["kor"]
+    assert not results[3]["ok"]
+
+    # Style override of the job does not change the shared style
+    assert base.font_name != "Test Font"
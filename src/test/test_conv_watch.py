@@ -0,0 +1,133 @@
+# Python built in modules
+import json
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+# PIP installed modules
+import pytest
+
+# Custom modules
+from conv_watch import WatchFolder
+from smi2ass import smi2ass
+
+TEST_SMIS_DIR: Path = Path(__file__).resolve().parents[2].joinpath("test_smis")
+
+
+def test_watch_folder(tmp_path: Path) -> None:
+    watch_dir: Path = tmp_path.joinpath("incoming")
+    output_dir: Path = tmp_path.joinpath("out")
+    metrics_path: Path = tmp_path.joinpath("metrics.json")
+    watch_dir.joinpath("show").mkdir(parents=True)
+
+    watch: WatchFolder = WatchFolder(
+        smi2ass(), watch_dir, output_dir, settle=0.2, interval=0.05
+    )
+    stop: threading.Event = threading.Event()
+    thread: threading.Thread = threading.Thread(
+        target=watch.run, args=(stop, metrics_path)
+    )
+    thread.start()
+    try:
+        shutil.copy(
+            TEST_SMIS_DIR.joinpath("Bakemonogatari-01.smi"),
+            watch_dir.joinpath("show"),
+        )
+        deadline: float = time.monotonic() + 30
+        while watch.metrics()["converted"] == 0:
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+    finally:
+        stop.set()
+        thread.join()
+
+    assert output_dir.joinpath("show", "Bakemonogatari-01.ass").exists()
+    with open(metrics_path, "r", encoding="utf-8") as f:
+        metrics: dict[str, any] = json.load(f)
+    assert metrics["converted"] == 1 and metrics["queue_depth"] == 0
+    assert metrics["latency_ms"]["max"] >= metrics["convert_ms"]["max"]
+
+    # Converted file is not converted again after restart
+    watch = WatchFolder(smi2ass(), watch_dir, output_dir, settle=0)
+    watch.scan()
+    assert watch.queue.qsize() == 0 and len(watch.pending) == 0
+
+
+def queue_file(tmp_path: Path, jobs: int, **kwargs) -> WatchFolder:
+    watch_dir: Path = tmp_path.joinpath("incoming")
+    watch_dir.mkdir()
+    shutil.copy(TEST_SMIS_DIR.joinpath("Bakemonogatari-01.smi"), watch_dir)
+    watch: WatchFolder = WatchFolder(
+        smi2ass(),
+        watch_dir,
+        tmp_path.joinpath("out"),
+        jobs=jobs,
+        settle=0,
+        **kwargs,
+    )
+    watch.scan()
+    watch.scan()
+    assert watch.queue.qsize() == 1
+
+    return watch
+
+
+def test_worker_error(tmp_path: Path) -> None:
+    watch: WatchFolder = queue_file(tmp_path, 1)
+
+    # Pool that cannot take the job fails the file, and worker keeps running
+    watch.executor = ProcessPoolExecutor(max_workers=1)
+    watch.executor.shutdown()
+    watch.queue.put(None)
+    watch.worker()
+
+    metrics: dict[str, any] = watch.metrics()
+    assert metrics["failed"] == 1 and metrics["in_progress"] == 0
+    assert str(watch.watch_dir.joinpath("Bakemonogatari-01.smi")) in (
+        watch.failed
+    )
+
+
+def test_broken_pool(tmp_path: Path) -> None:
+    watch: WatchFolder = queue_file(tmp_path, 2)
+
+    # Pool is broken by killed process, so new pool converts the file
+    watch.executor = ProcessPoolExecutor(max_workers=1)
+    with pytest.raises(BrokenProcessPool):
+        watch.executor.submit(os._exit, 1).result()
+    watch.queue.put(None)
+    try:
+        watch.worker()
+    finally:
+        watch.executor.shutdown()
+
+    metrics: dict[str, any] = watch.metrics()
+    assert metrics["converted"] == 1 and metrics["failed"] == 0
+    assert metrics["pool_restarts"] == 1 and len(watch.failed) == 0
+    assert tmp_path.joinpath("out", "Bakemonogatari-01.ass").exists()
+
+
+def test_save_index(tmp_path: Path) -> None:
+    index_path: Path = tmp_path.joinpath("index.json")
+    watch: WatchFolder = queue_file(tmp_path, 1, index_path=index_path)
+
+    # Index can't be saved, since there is a folder with the same name
+    index_path.mkdir()
+    watch.queue.put(None)
+    watch.worker()
+    watch.save_index(force=True)
+    assert watch.metrics()["converted"] == 1 and watch.unsaved == 1
+
+    # Index is saved later, and the file is not converted again
+    index_path.rmdir()
+    watch.save_index(force=True)
+    assert watch.unsaved == 0 and index_path.exists()
+    watch = WatchFolder(
+        smi2ass(), watch.watch_dir, watch.output_dir, index_path=index_path
+    )
+    watch.scan()
+    assert len(watch.pending) == 0
@@ -0,0 +1,94 @@
+# Python built in modules
+from pathlib import Path
+
+# PIP installed modules
+import pytest
+from bs4 import BeautifulSoup, NavigableString
+
+# Custom modules
+from ass_settings import AssStyle
+from sami_tokenizer import SamiSyntaxError, SmiTag, iter_sync_blocks
+from smi2ass import (
+    SMI_NORMALIZE,
+    ConversionResult,
+    convert_text,
+    normalize_repl,
+)
+from smi_encoding import decode_smi, normalize_newlines
+
+TEST_SMIS_DIR: Path = Path(__file__).resolve().parents[2].joinpath("test_smis")
+
+# SYNC blocks that are not well formed, but handled by the tokenizer
+MALFORMED_SMIS: list[str] = [
+    "<SYNC Start=100><P Class=KRCC>a<b>b<i>c</b>d</i>e",
+    "<SYNC Start=100><P Class=KRCC><font color=#ff0000 face='A B'>a",
+    '<SYNC Start=100><P Class="KRCC ENCC">a<br/>b<br>c</br>d',
+    "<SYNC Start=100><P Class=KRCC>&amp;&nbsp;&lt&#65;&#x42; &unknown; a&b",
+    "<SYNC Start=100><P Class=KRCC>a<!-- note -->b<ruby>c<rt>d</rt></ruby>",
+    "<SYNC Start=100><P Class=KRCC>a < b <><p>c</sync>d",
+    "<SYNC Start=100><P>a<SYNC Start=200 End=300><P Class=KRCC></P>\n \n",
+    "<SYNC Start=100><P Class=KRCC><U><S>a</font></U>b",
+]
+
+
+def normalize(smi_sgml: str) -> str:
+    return SMI_NORMALIZE.sub(normalize_repl, normalize_newlines(smi_sgml))
+
+
+def dump(tag: "SmiTag | BeautifulSoup") -> tuple:
+    """Tree of the tag that can be compared, only with the text that is shown
+    in the subtitle
+    """
+
+    return (
+        tag.name,
+        tag.attrs,
+        [
+            dump(tmp) if not isinstance(tmp, str) else tmp
+            for tmp in tag.contents
+            if not isinstance(tmp, str) or type(tmp) in (str, NavigableString)
+        ],
+    )
+
+
+def assert_same_blocks(smi_sgml: str) -> None:
+    expected: list[tuple] = [
+        dump(tmp)
+        for tmp in BeautifulSoup(smi_sgml, "html.parser").find_all("sync")
+    ]
+    assert expected
+    assert [dump(tmp) for tmp in iter_sync_blocks(smi_sgml)] == expected
+
+
+def test_fixtures() -> None:
+    for smi_path in sorted(TEST_SMIS_DIR.glob("*.smi")):
+        with open(smi_path, "rb") as f:
+            assert_same_blocks(normalize(decode_smi(f.read())[0]))
+
+
+@pytest.mark.parametrize("smi_sgml", MALFORMED_SMIS)
+def test_malformed(smi_sgml: str) -> None:
+    assert_same_blocks(normalize(f"<SAMI><BODY>{smi_sgml}</BODY></SAMI>"))
+
+
+def test_fallback() -> None:
+    smi_sgml: str = (
+        "<SAMI><BODY><SYNC Start=100><P Class=KRCC>a<table>b</table>"
+        + "<SYNC Start=200><P Class=KRCC>c&#x80;</BODY></SAMI>"
+    )
+    with pytest.raises(SamiSyntaxError):
+        list(iter_sync_blocks(normalize(smi_sgml)))
+
+    # Same subtitle with BeautifulSoup, when tokenizer gives up
+    counters: dict[str, int] = {}
+    style: AssStyle = AssStyle()
+    result: ConversionResult = convert_text(
+        smi_sgml,
+        style,
+        counter_hook=lambda key, value: counters.update({key: value}),
+    )
+    assert counters["bs4_fallbacks"] == 1
+    assert result.languages == ["kor"]
+    assert result.ass_lines() == (
+        convert_text(smi_sgml, style, parser="bs4").ass_lines()
+    )
@@ -1,22 +1,348 @@
-from smi2ass import Smi2Ass
+# Python built in modules
+import io
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
+# Custom modules
+from ass_settings import AssStyle
+from smi2ass import ConversionResult, convert, convert_text, smi2ass
+from smi_diagnostics import Diagnostics
 
-def main() -> None:
-    tmp_smi: Smi2Ass = Smi2Ass("./test_smis/Psycho-Pass - S01E15.smi")
+SRC_DIR: Path = Path(__file__).resolve().parents[1]
+TEST_SMIS_DIR: Path = Path(__file__).resolve().parents[2].joinpath("test_smis")
 
-    print("writing test file 1")
+
+def test_update_file2conv() -> None:
+    tmp_smi: smi2ass = smi2ass(
+        str(TEST_SMIS_DIR.joinpath("Psycho-Pass - S01E15.smi"))
+    )
     tmp_lines = tmp_smi.smi_lines[list(tmp_smi.smi_lines.keys())[0]]
-    with open("test1.txt", "w", encoding="utf-8") as f:
-        f.writelines([str(tmp[0]) + "\n" for tmp in tmp_lines])
+    assert len(tmp_lines) > 0
 
-    print("writing test file 2")
-    tmp_smi.update_file2conv("./test_smis/Bakemonogatari-01.smi")
+    tmp_smi.update_file2conv(
+        str(TEST_SMIS_DIR.joinpath("Bakemonogatari-01.smi"))
+    )
     tmp_lines = tmp_smi.smi_lines[list(tmp_smi.smi_lines.keys())[0]]
-    with open("test2.txt", "w", encoding="utf-8") as f:
-        f.writelines([str(tmp[0]) + "\n" for tmp in tmp_lines])
+    assert len(tmp_lines) > 0
+    # Lines are sorted by start time
+    assert tmp_lines == sorted(tmp_lines, key=lambda tmp: tmp.start)
+
+
+def test_to_ass(tmp_path: Path) -> None:
+    tmp_smi: smi2ass = smi2ass()
+    tmp_smi.to_ass(str(TEST_SMIS_DIR.joinpath("Bakemonogatari-01.smi")))
+    tmp_lines: list[str] = tmp_smi.ass_lines[list(tmp_smi.ass_lines)[0]]
+    assert tmp_lines[0] == tmp_smi.ass_header()
+    assert all(tmp.startswith("Dialogue: 0,") for tmp in tmp_lines[1:])
+
+    # Streamed output is same as converted lines
+    tmp_smi.to_ass(
+        str(TEST_SMIS_DIR.joinpath("Bakemonogatari-01.smi")), stream=True
+    ).save(tmp_path)
+    with open(
+        tmp_path.joinpath("Bakemonogatari-01.ass"), "r", encoding="utf-8"
+    ) as f:
+        assert f.read() == "".join(tmp_lines)
+
+
+def test_shards() -> None:
+    tmp_path: str = str(TEST_SMIS_DIR.joinpath("Psycho-Pass - S01E15.smi"))
+    tmp_lines: dict[str, list[str]] = dict(
+        smi2ass().to_ass(tmp_path).ass_lines
+    )
+
+    # Split conversion gives same lines, even with small file
+    tmp_smi: smi2ass = smi2ass()
+    tmp_smi.set_shards(3, min_size=0)
+    assert dict(tmp_smi.to_ass(tmp_path).ass_lines) == tmp_lines
+
+
+def test_lazy() -> None:
+    style: AssStyle = AssStyle()
+
+    # UTF-8, CP949 and UTF-16 (decoded as a whole) files give same lines
+    for smi_path in sorted(TEST_SMIS_DIR.glob("*.smi")):
+        assert (
+            convert(smi_path, style, lazy=True).ass_lines()
+            == convert(smi_path, style).ass_lines()
+        )
+
+
+def test_window() -> None:
+    style: AssStyle = AssStyle()
+    smi_path: Path = TEST_SMIS_DIR.joinpath("Bakemonogatari-01.smi")
+    smi_text: str = smi_path.read_text(encoding="utf-8")
+    window: dict[str, int] = {"time_from": 60000, "time_to": 120000}
+
+    # Blocks found by binary search give same lines with the whole SMI
+    for rebase in (False, True):
+        assert (
+            convert(smi_path, style, rebase=rebase, **window).ass_lines()
+            == convert_text(
+                smi_text, style, rebase=rebase, **window
+            ).ass_lines()
+        )
+
+    result: ConversionResult = convert(smi_path, style, rebase=True, **window)
+    for events in result.events.values():
+        assert 0 <= events[0].start and events[-2].start < 60000
+
+
+def test_window_languages() -> None:
+    style: AssStyle = AssStyle()
+    blocks: list[tuple[int, str, str]] = [
+        (tmp, "KRCC", str(tmp)) for tmp in range(1000, 60000, 1000)
+    ]
+    blocks += [(9500, "ENCC", "eng")] + [
+        (tmp, "ENCC", str(tmp)) for tmp in range(30000, 130000, 10000)
+    ]
+    smi_text: str = (
+        "<SAMI><BODY>"
+        + "".join(
+            f"<SYNC Start={tmp[0]}><P Class={tmp[1]}>{tmp[2]}\n"
+            for tmp in sorted(blocks)
+        )
+        + "</BODY></SAMI>"
+    )
+    full: dict[str, list[str]] = convert_text(smi_text, style).ass_lines()
+    eng_line: str = next(tmp for tmp in full["eng"] if tmp.endswith(",eng\n"))
+    assert ",0:00:09.50,0:00:30.00," in eng_line
+
+    # Last line of each language ends where it ends in the whole subtitle
+    window: dict[str, int] = {"time_from": 9000, "time_to": 12000}
+    for result in (
+        convert_text(smi_text, style, **window),
+        convert(smi_text.encode(), style, **window),
+        convert(smi_text.encode(), style, lazy=True, **window),
+    ):
+        lines: dict[str, list[str]] = result.ass_lines()
+        assert lines["eng"][1:] == [eng_line]
+        assert lines["kor"][-1].startswith("Dialogue: 0,0:00:11.00,0:00:12.00")
+
+
+def test_convert() -> None:
+    style: AssStyle = AssStyle()
+    smi_paths: list[Path] = sorted(TEST_SMIS_DIR.glob("*.smi")) * 2
+
+    # Same style is shared by the threads
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results: list[ConversionResult] = list(
+            executor.map(lambda tmp: convert(tmp, style), smi_paths)
+        )
+
+    for smi_path, result in zip(smi_paths, results):
+        assert result.ass_lines() == dict(
+            smi2ass().to_ass(str(smi_path)).ass_lines
+        )
+
+
+def test_convert_in_memory() -> None:
+    style: AssStyle = AssStyle()
+    smi_path: Path = TEST_SMIS_DIR.joinpath("Bakemonogatari-01.smi")
+    with open(smi_path, "rb") as f:
+        smi_raw: bytes = f.read()
+    expected: dict[str, bytes] = convert(smi_path, style).to_bytes()
+
+    # Bytes, memory view, binary stream and decoded text
+    assert convert(smi_raw, style).to_bytes() == expected
+    assert convert(memoryview(smi_raw), style).to_bytes() == expected
+    assert convert(io.BytesIO(smi_raw), style).to_bytes() == expected
+    result: ConversionResult = convert_text(smi_raw.decode("utf-8"), style)
+    assert result.to_bytes() == expected
+
+    # Writing into binary and text stream of the caller
+    lang: str = result.languages[0]
+    binary: io.BytesIO = io.BytesIO()
+    result.write(binary, lang)
+    assert binary.getvalue() == expected[lang]
+    text: io.StringIO = io.StringIO()
+    smi2ass().update_data2conv(smi_raw).to_ass(stream=True).write(text)
+    assert text.getvalue() == result.to_strings()[lang]
+
+
+def test_variants(tmp_path: Path) -> None:
+    smi_path: str = str(TEST_SMIS_DIR.joinpath("Bakemonogatari-01.smi"))
+    tmp_smi: smi2ass = smi2ass()
+    tmp_smi.set_variants(
+        [
+            {"name": "2160p", "style": {"resolution": [3840, 2160]}},
+            {"name": "cut", "time_offset": 1500},
+        ]
+    )
+    saved: dict[str, Path] = tmp_smi.to_ass(smi_path).save(tmp_path)
+    tmp_key: str = list(tmp_smi.ass_lines)[0]
+    assert sorted(saved.keys()) == [
+        f"2160p/{tmp_key}",
+        f"cut/{tmp_key}",
+        tmp_key,
+    ]
+    assert saved["cut/" + tmp_key].name == "Bakemonogatari-01.cut.ass"
+    # Settings of the converter are not changed by the variants
+    assert tmp_smi.resolution != [3840, 2160]
+
+    # Only the header is different
+    main_text: str = saved[tmp_key].read_text("utf-8")
+    tmp_text: str = saved["2160p/" + tmp_key].read_text("utf-8")
+    assert "PlayResX: 3840" in tmp_text
+    assert main_text.split("[Events]")[1] == tmp_text.split("[Events]")[1]
+
+    # Offset of the variant is same as converting with the offset
+    tmp_offset: smi2ass = smi2ass()
+    tmp_offset.set_time_offset(1500)
+    tmp_offset.to_ass(smi_path)
+    assert saved["cut/" + tmp_key].read_text("utf-8") == "".join(
+        tmp_offset.ass_lines[tmp_key]
+    )
+
+
+def test_offset() -> None:
+    style: AssStyle = AssStyle()
+    smi_text: str = (
+        "<SAMI><BODY>"
+        + "<SYNC Start=1000><P Class=KRCC>a\n"
+        + "<SYNC Start=1500><P Class=KRCC>b\n"
+        + "<SYNC Start=3000><P Class=KRCC>&nbsp;\n"
+        + "</BODY></SAMI>"
+    )
+
+    # Line that is shifted to 0 is dropped, same as line at 0 in SMI
+    result: ConversionResult = convert_text(smi_text, style, offset=-1000)
+    assert result.ass_lines()["kor"][1:] == [
+        "Dialogue: 0,0:00:00.50,0:00:02.00,Default,,0000,0000,0000,,b\n"
+    ]
+    assert (
+        convert_text(smi_text, style).variant(result.header, -1000).ass_lines()
+        == result.ass_lines()
+    )
+
+
+def test_formats(tmp_path: Path) -> None:
+    result: ConversionResult = convert_text(
+        "<SAMI><BODY>"
+        + "<SYNC Start=1000><P Class=KRCC><b>A &amp; B</b><br>"
+        + "<font color=#ff0000>C<font color=blue>D</font></font>"
+        + "<SYNC Start=2500><P Class=KRCC><s>E</s>"
+        + "</BODY></SAMI>",
+        AssStyle(),
+    )
+    lang: str = result.languages[0]
+    assert list(result.iter_lines(lang, "srt"))[1:] == [
+        "1\n00:00:01,000 --> 00:00:02,500\n<b>A & B</b>\n"
+        + '<font color="#ff0000">C<font color="#0000ff">D</font></font>\n\n',
+        "2\n00:00:02,500 --> 00:00:03,500\n<s>E</s>\n\n",
+    ]
+    vtt_text: str = result.to_strings("vtt")[lang]
+    assert vtt_text.startswith("WEBVTT\n\nSTYLE\n::cue(.c_0000ff)")
+    assert "<b>A &amp; B</b>\n<c.c_ff0000>C<c.c_0000ff>D</c></c>" in vtt_text
+    assert "00:00:02.500 --> 00:00:03.500\nE\n" in vtt_text
+
+    # Every format is saved from one conversion
+    tmp_smi: smi2ass = smi2ass()
+    tmp_smi.set_formats(["srt", "vtt"])
+    saved: dict[str, Path] = tmp_smi.to_ass(
+        str(TEST_SMIS_DIR.joinpath("Bakemonogatari-01.smi")), stream=True
+    ).save(tmp_path)
+    assert sorted(tmp.suffix for tmp in saved.values()) == [".srt", ".vtt"]
+    assert saved[f"{tmp_smi.result.languages[0]}.srt"].read_text(
+        "utf-8"
+    ) == "".join(tmp_smi.result.iter_lines(tmp_smi.result.languages[0], "srt"))
+
+
+def test_diagnostics(capsys) -> None:
+    smi_text: str = (
+        "<SAMI><BODY>"
+        + "".join(f"<SYNC Start={tmp}000><P>{tmp}\n" for tmp in range(1, 21))
+        + "<SYNC Start=x><P Class=KRCC>A\n"
+        + "<SYNC Start=30000><P Class=KRCC><font color=nocolor>B</font>\n"
+        + "</BODY></SAMI>"
+    )
+    style: AssStyle = AssStyle()
+
+    # Every warning is counted, but only first samples are kept
+    diagnostics: Diagnostics = Diagnostics(max_samples=3)
+    convert_text(smi_text, style, diagnostics=diagnostics, quiet=True)
+    assert capsys.readouterr().out == ""
+    report: dict[str, any] = diagnostics.report()
+    assert report["counts"] == {
+        "missing_lang_class": 20,
+        "bad_time_code": 1,
+        "unknown_color": 1,
+    }
+    samples: list[dict[str, any]] = report["samples"]["missing_lang_class"]
+    assert len(samples) == 3
+    assert samples[1]["source"].startswith("<sync Start=2000>")
+
+    # Same warnings and offsets from the parts that are converted separately
+    for options in ({"lazy": True}, {"shards": 2, "shard_min_size": 0}):
+        tmp: Diagnostics = Diagnostics(max_samples=3)
+        convert(
+            smi_text.encode(), style, diagnostics=tmp, quiet=True, **options
+        )
+        assert tmp.report() == report
+
+    # Summary is printed once for the file
+    convert_text(smi_text, style)
+    assert capsys.readouterr().out.count("(20 times)") == 1
+
+
+def test_merged_languages() -> None:
+    counters: dict[str, int] = {}
+    result: ConversionResult = convert_text(
+        "<SAMI><BODY>"
+        + "".join(
+            f"<SYNC Start={tmp}000><P Class=KRCC>{tmp}\n"
+            for tmp in range(1, 101)
+        )
+        + "<SYNC Start=50500><P Class=ENCC>A\n"
+        + "<SYNC Start=70500><P Class=ENCC>B\n"
+        + "</BODY></SAMI>",
+        AssStyle(),
+        counter_hook=lambda key, value: counters.update(
+            {key: counters.get(key, 0) + value}
+        ),
+    )
+
+    # Language with 10% or less lines is merged into the largest one
+    assert result.languages == ["kor"]
+    assert counters["merged_languages"] == 1
+    starts: list[int] = [tmp.start for tmp in result.events["kor"]]
+    assert len(starts) == 102 and starts == sorted(starts)
+
 
-    tmp_smi.to_ass()
+def test_jobs(tmp_path: Path) -> None:
+    smi_paths: list[str] = [
+        str(TEST_SMIS_DIR.joinpath(tmp))
+        for tmp in (
+            "Bakemonogatari-01.smi",
+            "Angel Beats! 01.smi",
+            "Psycho-Pass - S01E15.smi",
+        )
+    ]
 
+    # Converting in the process pool gives same files as converting one by
+    # one, and messages are printed in the order of input
+    outputs: dict[str, str] = {}
+    for jobs in ("1", "2"):
+        outputs[jobs] = subprocess.run(
+            [sys.executable, str(SRC_DIR.joinpath("__main__.py"))]
+            + ["-j", jobs, "-o", str(tmp_path.joinpath(jobs))]
+            + smi_paths,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
 
-if __name__ == "__main__":
-    main()
+    positions: list[int] = [outputs["2"].find(tmp) for tmp in smi_paths]
+    assert -1 not in positions
+    assert positions == sorted(positions)
+    saved: dict[str, dict[str, bytes]] = {
+        jobs: {
+            tmp.name: tmp.read_bytes()
+            for tmp in tmp_path.joinpath(jobs).iterdir()
+        }
+        for jobs in outputs
+    }
+    assert len(saved["1"]) >= len(smi_paths)
+    assert saved["1"] == saved["2"]
@@ -0,0 +1,79 @@
+# Python built in modules
+import codecs
+
+# PIP installed modules
+import pytest
+
+# Custom modules
+from smi2ass import smi2ass
+from smi_encoding import (
+    TIER_BOM,
+    TIER_CHARDET,
+    TIER_LEGACY,
+    TIER_UTF8,
+    decode_smi,
+    detect_encoding,
+)
+
+SMI_TEMPLATE: str = (
+    "<SAMI><BODY>\r\n<SYNC Start=1000><P Class=KRCC>{}\r\n"
+    + "<SYNC Start=2000><P Class=KRCC>&nbsp;\r\n</BODY></SAMI>\r\n"
+)
+KOREAN_TEXT: str = "안녕하세요, 한글 자막입니다"
+# Not valid in both UTF-8 and CP949, only chardet can find its encoding
+CYRILLIC_TEXT: str = "Съешь же ещё этих мягких французских булок, да выпей чаю"
+
+# Content, expected encoding and tier
+ENCODING_CASES: list[tuple[bytes, str, str]] = [
+    (
+        codecs.BOM_UTF8 + SMI_TEMPLATE.format(KOREAN_TEXT).encode("utf-8"),
+        "utf-8-sig",
+        TIER_BOM,
+    ),
+    (SMI_TEMPLATE.format(KOREAN_TEXT).encode("utf-16"), "utf-16", TIER_BOM),
+    (SMI_TEMPLATE.format(KOREAN_TEXT).encode("utf-32"), "utf-32", TIER_BOM),
+    (SMI_TEMPLATE.format(KOREAN_TEXT).encode("utf-8"), "utf-8", TIER_UTF8),
+    (SMI_TEMPLATE.format(KOREAN_TEXT).encode("cp949"), "cp949", TIER_LEGACY),
+]
+
+
+@pytest.mark.parametrize("raw, encoding, tier", ENCODING_CASES)
+def test_tiers(raw: bytes, encoding: str, tier: str) -> None:
+    text, found_encoding, found_tier = decode_smi(raw)
+    assert (found_encoding, found_tier) == (encoding, tier)
+    # Newlines are normalized and BOM is not kept in the text
+    assert text == SMI_TEMPLATE.format(KOREAN_TEXT).replace("\r\n", "\n")
+
+    # Same encoding is found when the content is not decoded at once
+    assert detect_encoding(memoryview(raw))[:2] == (encoding, tier)
+
+
+def test_chardet() -> None:
+    raw: bytes = (SMI_TEMPLATE.format(CYRILLIC_TEXT) * 20).encode("cp1251")
+    text, encoding, tier = decode_smi(raw)
+    assert tier == TIER_CHARDET
+    assert CYRILLIC_TEXT in text
+    assert detect_encoding(raw) == (encoding, TIER_CHARDET, "replace")
+
+    # Legacy encodings can be changed, and are tried before chardet
+    assert decode_smi(raw, ["cp1251"])[1:] == ("cp1251", TIER_LEGACY)
+    assert detect_encoding(raw, ["cp1251"]) == (
+        "cp1251",
+        TIER_LEGACY,
+        "strict",
+    )
+
+
+@pytest.mark.parametrize("raw, encoding, tier", ENCODING_CASES)
+def test_encoding_tier(raw: bytes, encoding: str, tier: str) -> None:
+    tmp_smi: smi2ass = smi2ass().update_data2conv(raw)
+    assert (tmp_smi.encoding, tmp_smi.encoding_tier) == (encoding, tier)
+    assert KOREAN_TEXT in tmp_smi.result.ass_lines()["kor"][-1]
+
+
+def test_encoding_tier_legacy_encodings() -> None:
+    raw: bytes = SMI_TEMPLATE.format(KOREAN_TEXT).encode("cp949")
+    tmp_smi: smi2ass = smi2ass()
+    tmp_smi.set_legacy_encodings([])
+    tmp_smi.update_data2conv(raw)
+    assert tmp_smi.encoding_tier == TIER_CHARDET